@@ -0,0 +1,6 @@
+def profile(request):
+    request_profile = getattr(request, 'profile', None)
+    return {
+        'profile': request_profile,
+        'user_type': request_profile.user_type if request_profile is not None else None,
+    }
@@ -0,0 +1,97 @@
+"""Plain-text extraction from resume files.
+
+``extract_text`` runs in worker processes (see ``accounts.resumes``), so this
+module only reads files and must not touch the ORM.
+"""
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+# Longer resumes are cut; nobody searches page forty of a CV.
+MAX_TEXT_LENGTH = 100_000
+
+# Uncompressed size of a DOCX document part we are willing to parse.
+MAX_DOCX_XML_SIZE = 20 * 2 ** 20
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_WHITESPACE_RE = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def _plain_text(path):
+    with open(path, 'rb') as f:
+        data = f.read(MAX_TEXT_LENGTH * 4)
+    return data.decode('utf-8', errors='replace')
+
+
+def _docx_text(path):
+    with zipfile.ZipFile(path) as archive:
+        try:
+            info = archive.getinfo('word/document.xml')
+        except KeyError:
+            raise ExtractionError('Not a Word document')
+        if info.file_size > MAX_DOCX_XML_SIZE:
+            raise ExtractionError('Document is too large')
+        root = ElementTree.fromstring(archive.read(info))
+    paragraphs = (
+        ''.join(node.text or '' for node in paragraph.iter(f'{_WORD_NS}t'))
+        for paragraph in root.iter(f'{_WORD_NS}p')
+    )
+    return '\n'.join(paragraphs)
+
+
+def _pdf_text(path):
+    if pypdf is None:
+        raise ExtractionError('PDF extraction needs the pypdf package')
+    reader = pypdf.PdfReader(path)
+    pages = []
+    length = 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        pages.append(text)
+        length += len(text)
+        if length >= MAX_TEXT_LENGTH:
+            break
+    return '\n'.join(pages)
+
+
+EXTRACTORS = {
+    '.txt': _plain_text,
+    '.docx': _docx_text,
+    '.pdf': _pdf_text,
+}
+
+
+def normalize_text(text):
+    text = _WHITESPACE_RE.sub(' ', text.replace('\x00', ''))
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()[:MAX_TEXT_LENGTH]
+
+
+def extract_text(path):
+    """Return ``(text, error)`` for the resume stored at ``path``.
+
+    Exactly one of the two is non-empty unless the file holds no text.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        return '', f'Unsupported file type {extension or "(none)"}'
+    try:
+        return normalize_text(extractor(path)), ''
+    except ExtractionError as e:
+        return '', str(e)
+    except Exception as e:
+        # Uploaded files are arbitrary bytes and the parsers fail in many
+        # ways; a broken resume must not stop the batch
+        return '', f'{type(e).__name__}: {e}'[:200]
@@ -1,7 +1,13 @@
+from functools import partial
+
 from django import forms
+from django.db import transaction
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from jobs.skills import sync_seeker_skills
+from . import resumes
 from .models import UserProfile, EmployerProfile, JobSeekerProfile
+from .tasks import extract_resume_texts
 
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -49,6 +55,35 @@ class JobSeekerProfileForm(forms.ModelForm):
             'education': forms.TextInput(attrs={'placeholder': 'e.g., Bachelor of Computer Science'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.original_resume = self.instance.resume.name
+
+    def save(self, commit=True):
+        if 'resume' in self.changed_data:
+            # Picked up again by the extraction stage (extract_resumes)
+            self.instance.resume_text = None
+        profile = super().save(commit)
+        if commit:
+            self.after_save()
+        else:
+            save_m2m = self.save_m2m
+
+            def save_m2m_and_after_save():
+                save_m2m()
+                self.after_save()
+            self.save_m2m = save_m2m_and_after_save
+        return profile
+
+    def after_save(self):
+        sync_seeker_skills(self.instance)
+        # The replaced file may be shared with other profiles; release()
+        # only deletes it once nothing references it
+        if self.original_resume and self.original_resume != self.instance.resume.name:
+            transaction.on_commit(partial(resumes.release, [self.original_resume]))
+        if self.instance.resume and self.original_resume != self.instance.resume.name:
+            extract_resume_texts.enqueue()
+
 class UserProfileUpdateForm(forms.ModelForm):
     class Meta:
         model = UserProfile
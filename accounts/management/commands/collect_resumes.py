@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from accounts import resumes
+
+
+class Command(BaseCommand):
+    help = 'Delete stored resume files that no job seeker profile references any more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the files, do not delete them.')
+        parser.add_argument('--grace-minutes', type=int, default=int(resumes.GRACE_PERIOD.total_seconds() // 60),
+                            help='Keep files written or reused more recently than this.')
+
+    def handle(self, *args, **options):
+        deleted = resumes.collect(
+            dry_run=options['dry_run'], grace_period=timedelta(minutes=options['grace_minutes'])
+        )
+        if options['dry_run'] or options['verbosity'] > 1:
+            for name in deleted:
+                self.stdout.write(name)
+        if options['dry_run']:
+            self.stdout.write(f'{len(deleted)} unreferenced resume files; run without --dry-run to delete them.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {len(deleted)} unreferenced resume files.'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import resumes
+
+
+class Command(BaseCommand):
+    help = 'Extract the text of new resumes and add it to the resume search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Extraction processes; defaults to the number of CPUs.')
+        parser.add_argument('--batch-size', type=int, default=resumes.EXTRACT_BATCH_SIZE)
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Extract files again whose extraction failed before.')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running, looking for new resumes every this many seconds.')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f'Retrying {resumes.forget_failed()} failed resumes.')
+        while True:
+            linked, extracted, failed = resumes.extract_pending(
+                workers=options['workers'], batch_size=options['batch_size']
+            )
+            if linked or failed or options['interval'] is None:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Linked {linked} profiles; extracted {extracted} new resumes, {failed} failed.'
+                ))
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,122 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+
+from .models import EmployerProfile, JobSeekerProfile, UserProfile
+
+SESSION_KEY = '_profile_user_type'
+
+
+class RequestProfile:
+    """The current user's profile and role profile, resolved once per request.
+
+    Everything is loaded lazily with a single ``select_related`` query the
+    first time it is needed. With ``PROFILE_SESSION_CACHE`` enabled the user
+    type is also remembered in the session, so plain role checks cost no
+    query at all.
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    @property
+    def _user(self):
+        user = getattr(self._request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
+
+    @cached_property
+    def user_profile(self):
+        user = self._user
+        if user is None:
+            return None
+        try:
+            user_profile = (
+                UserProfile.objects
+                .select_related('employerprofile', 'jobseekerprofile')
+                .get(user_id=user.pk)
+            )
+        except UserProfile.DoesNotExist:
+            return None
+        # Share the objects with request.user so user.userprofile is free too
+        user_profile.user = user
+        User.userprofile.related.set_cached_value(user, user_profile)
+        if self._session_cache_enabled and self._request.session.get(SESSION_KEY) != [user.pk, user_profile.user_type]:
+            self._request.session[SESSION_KEY] = [user.pk, user_profile.user_type]
+        return user_profile
+
+    @cached_property
+    def user_type(self):
+        user = self._user
+        if user is None:
+            return None
+        if self._session_cache_enabled:
+            cached = self._request.session.get(SESSION_KEY)
+            if cached and cached[0] == user.pk:
+                return cached[1]
+        return self.user_profile.user_type if self.user_profile else None
+
+    @cached_property
+    def employer_profile(self):
+        try:
+            return self.user_profile.employerprofile if self.user_profile else None
+        except EmployerProfile.DoesNotExist:
+            return None
+
+    @cached_property
+    def jobseeker_profile(self):
+        try:
+            return self.user_profile.jobseekerprofile if self.user_profile else None
+        except JobSeekerProfile.DoesNotExist:
+            return None
+
+    @property
+    def is_employer(self):
+        return self.user_type == 'employer'
+
+    @property
+    def is_job_seeker(self):
+        return self.user_type == 'job_seeker'
+
+    async def aload(self, *names):
+        """Load the user and the named attributes (e.g. ``'user_type'``) from async code.
+
+        Lazy queries are not allowed in async views, so they call this before
+        touching ``request.user`` or the profile. The user is fetched with
+        ``request.auser()`` and replaces the lazy ``request.user``, which
+        shares it with ``login_required`` and the templates.
+        """
+        self._request.user = await self._request.auser()
+        if names:
+            await sync_to_async(self._load)(names)
+        return self
+
+    def _load(self, names):
+        for name in names:
+            getattr(self, name)
+
+    @property
+    def _session_cache_enabled(self):
+        return getattr(settings, 'PROFILE_SESSION_CACHE', False) and hasattr(self._request, 'session')
+
+
+class ProfileMiddleware:
+    """Attach a lazily resolved ``request.profile`` to every request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.profile = RequestProfile(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.profile = RequestProfile(request)
+        return await self.get_response(request)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:22
+
+import accounts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobseekerprofile',
+            name='resume',
+            field=models.FileField(blank=True, db_index=True, storage=accounts.storage.ContentAddressedStorage(), upload_to='resumes/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_resume_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField(blank=True)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('extracted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobseekerprofile',
+            name='resume_text',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='accounts.resumetext'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        # External content: the text lives in accounts_resumetext only
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS accounts_resume_fts USING fts5('
+            "text, content = 'accounts_resumetext', content_rowid = 'id', "
+            'tokenize = "unicode61 remove_diacritics 2")'
+        )
+        cursor.execute("INSERT INTO accounts_resume_fts (accounts_resume_fts) VALUES ('rebuild')")
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS accounts_resume_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_resume_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .storage import ContentAddressedStorage
 
 class UserProfile(models.Model):
     USER_TYPES = (
@@ -26,9 +27,26 @@ class EmployerProfile(models.Model):
     def __str__(self):
         return self.company_name
 
+class ResumeText(models.Model):
+    """Plain text pulled out of a stored resume, kept once per distinct file
+    content and indexed for full-text search (see ``accounts.resumes``)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    text = models.TextField(blank=True)
+    # Why extraction failed; such rows are retried with --retry-failed
+    error = models.CharField(max_length=200, blank=True)
+    extracted_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.sha256
+
 class JobSeekerProfile(models.Model):
     user_profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE)
-    resume = models.FileField(upload_to='resumes/', blank=True)
+    # Stored under the hash of the content; identical files are kept once
+    resume = models.FileField(upload_to='resumes/', storage=ContentAddressedStorage(), blank=True, db_index=True)
+    # Unset until the extraction stage has read the current resume
+    resume_text = models.ForeignKey(
+        ResumeText, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='profiles'
+    )
     skills = models.TextField(blank=True, help_text="Comma-separated skills")
     experience_years = models.IntegerField(default=0)
     education = models.CharField(max_length=200, blank=True)
@@ -0,0 +1,199 @@
+import posixpath
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from jobs.search import build_match_expression, fts_enabled
+
+from .extraction import extract_text
+from .models import JobSeekerProfile, ResumeText
+from .storage import file_sha256, sha256_from_name
+
+# Files written or reused more recently than this are never deleted: the
+# profile pointing at them may not be committed yet.
+GRACE_PERIOD = timedelta(minutes=10)
+
+BATCH_SIZE = 500
+
+FTS_TABLE = 'accounts_resume_fts'
+
+# Profiles handled per round of extraction; each round hands its new files
+# to the process pool at once.
+EXTRACT_BATCH_SIZE = 50
+
+
+def _field():
+    return JobSeekerProfile._meta.get_field('resume')
+
+
+def _walk(storage, directory):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for subdirectory in directories:
+        yield from _walk(storage, posixpath.join(directory, subdirectory))
+
+
+def _delete_unreferenced(storage, names, cutoff, dry_run):
+    referenced = set(JobSeekerProfile.objects.filter(resume__in=names).values_list('resume', flat=True))
+    deleted = []
+    for name in names:
+        if name in referenced or not storage.exists(name) or storage.get_modified_time(name) > cutoff:
+            continue
+        if not dry_run:
+            storage.delete(name)
+        deleted.append(name)
+    return deleted
+
+
+def release(names, grace_period=GRACE_PERIOD):
+    """Delete resume files that no profile uses any more.
+
+    Called once a profile's resume has been replaced or cleared. Identical
+    uploads share one file, so a file is only deleted when no profile
+    references it. Returns the deleted names.
+    """
+    names = sorted(set(filter(None, names)))
+    if not names:
+        return []
+    return _delete_unreferenced(_field().storage, names, timezone.now() - grace_period, dry_run=False)
+
+
+def collect(dry_run=False, grace_period=GRACE_PERIOD):
+    """Delete every stored resume that no profile references; returns the names.
+
+    Catches what ``release`` could not: files of deleted profiles, files
+    replaced within the grace period and files left by failed requests.
+    """
+    field = _field()
+    storage = field.storage
+    directory = str(field.upload_to).rstrip('/')
+    if not storage.exists(directory):
+        return []
+
+    cutoff = timezone.now() - grace_period
+    deleted = []
+    batch = []
+    for name in _walk(storage, directory):
+        batch.append(name)
+        if len(batch) >= BATCH_SIZE:
+            deleted += _delete_unreferenced(storage, batch, cutoff, dry_run)
+            batch = []
+    if batch:
+        deleted += _delete_unreferenced(storage, batch, cutoff, dry_run)
+    return deleted
+
+
+def pending_profiles():
+    """Profiles with a resume whose text has not been extracted yet."""
+    return JobSeekerProfile.objects.exclude(resume='').filter(resume_text__isnull=True)
+
+
+def _content_sha256(storage, name):
+    digest = sha256_from_name(name)
+    if digest is None:
+        # Stored before resumes were content addressed
+        with storage.open(name) as f:
+            digest = file_sha256(f)
+    return digest
+
+
+def _index(resume_text):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)', [resume_text.pk, resume_text.text]
+        )
+
+
+def _unindex(resume_texts):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        # An external content index must be told the text it is forgetting
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, text) VALUES ('delete', %s, %s)",
+            [(resume_text.pk, resume_text.text) for resume_text in resume_texts],
+        )
+
+
+def _store(digest, text, error):
+    with transaction.atomic():
+        resume_text, created = ResumeText.objects.get_or_create(
+            sha256=digest, defaults={'text': text, 'error': error}
+        )
+        if created:
+            _index(resume_text)
+    return resume_text
+
+
+def extract_pending(workers=None, batch_size=EXTRACT_BATCH_SIZE):
+    """Extract and index the text of every resume that has none yet.
+
+    Text is extracted once per distinct file content, in a pool of
+    ``workers`` processes; a profile whose file was read before (by hash)
+    is just linked to the existing text. Returns ``(linked, extracted,
+    failed)`` counts.
+    """
+    storage = _field().storage
+    pending = list(pending_profiles().order_by('pk').values_list('pk', 'resume'))
+    linked = extracted = failed = 0
+    if not pending:
+        return linked, extracted, failed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(pending), batch_size):
+            by_digest = defaultdict(lambda: defaultdict(list))
+            for pk, name in pending[start:start + batch_size]:
+                try:
+                    digest = _content_sha256(storage, name)
+                except OSError:
+                    failed += 1
+                    continue
+                by_digest[digest][name].append(pk)
+
+            known = {text.sha256: text for text in ResumeText.objects.filter(sha256__in=list(by_digest))}
+            new = [digest for digest in by_digest if digest not in known]
+            paths = [storage.path(next(iter(by_digest[digest]))) for digest in new]
+            for digest, (text, error) in zip(new, pool.map(extract_text, paths)):
+                known[digest] = _store(digest, text, error)
+                extracted += 1
+                failed += bool(error)
+
+            for digest, names in by_digest.items():
+                for name, pks in names.items():
+                    # The resume may have been replaced since the snapshot
+                    linked += JobSeekerProfile.objects.filter(
+                        pk__in=pks, resume=name, resume_text__isnull=True
+                    ).update(resume_text=known[digest])
+    return linked, extracted, failed
+
+
+def forget_failed():
+    """Drop the texts whose extraction failed, so the next run retries them."""
+    with transaction.atomic():
+        failed = list(ResumeText.objects.exclude(error=''))
+        _unindex(failed)
+        ResumeText.objects.filter(pk__in=[text.pk for text in failed]).delete()
+    return len(failed)
+
+
+def resume_matches(query, lookup='resume_text'):
+    """A ``Q`` for rows whose resume, reached through ``lookup``, matches ``query``.
+
+    Empty when the query holds no words.
+    """
+    if not fts_enabled():
+        return Q(**{f'{lookup}__text__icontains': query})
+
+    match = build_match_expression(query)
+    if not match:
+        return Q()
+    matching_ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+    return Q(**{f'{lookup}__in': matching_ids})
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Longer "extensions" are dropped rather than let them push the name past
+# the FileField's max_length.
+MAX_EXTENSION_LENGTH = 10
+
+
+def file_sha256(file):
+    """Hex SHA-256 of ``file``'s content.
+
+    Uploads that went through ``HashingUploadHandler`` carry the digest
+    already; anything else is read once in chunks.
+    """
+    digest = getattr(file, 'sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    return digest
+
+
+def sha256_from_name(name):
+    """The digest a content-addressed name was stored under, or ``None``."""
+    stem = posixpath.splitext(posixpath.basename(name or ''))[0]
+    return stem if len(stem) == 64 else None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names every file after the SHA-256 of its content.
+
+    ``resumes/cv.pdf`` is stored as ``resumes/3f/3fa9...e1.pdf``. Saving the
+    same bytes again returns the existing name without writing anything, so
+    identical files are kept once however many rows point at them. Deleting
+    a file is therefore only safe once nothing references it any more (see
+    ``accounts.resumes``).
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = file_sha256(content)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        if len(extension) > MAX_EXTENSION_LENGTH:
+            extension = ''
+        name = posixpath.join(directory, digest[:2], digest + extension)
+        if self.exists(name):
+            # Mark it as just used, so a sweep that found it unreferenced a
+            # moment ago leaves it alone
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
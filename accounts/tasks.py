@@ -0,0 +1,8 @@
+from main.background import task
+from . import resumes
+
+
+@task(batch=True)
+def extract_resume_texts(payloads):
+    # Picks up every pending resume, not just the ones in this batch
+    resumes.extract_pending()
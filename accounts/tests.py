@@ -1,3 +1,117 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts import resumes
+from main.testing import PASSWORD, QueryBudgetMixin, create_job_board
+
+
+class AccountViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(jobs_per_employer=3, applications_per_seeker=5)
+
+    def test_anonymous_pages(self):
+        self.assertWithinQueryBudget(reverse('accounts:login'))
+        self.assertWithinQueryBudget(reverse('accounts:register'))
+
+    def test_profile_pages(self):
+        for profile in (self.employers[0], self.seekers[0]):
+            with self.subTest(user=profile.user_profile.user.username):
+                self.client.login(username=profile.user_profile.user.username, password=PASSWORD)
+                self.assertWithinQueryBudget(reverse('accounts:profile'))
+                self.assertWithinQueryBudget(reverse('accounts:edit_profile'))
+
+
+class ResumeUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(jobs_per_employer=2, applications_per_seeker=2)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, seeker, content, filename='cv.pdf'):
+        self.client.login(username=seeker.user_profile.user.username, password=PASSWORD)
+        # The query budgets are meant for page views, not form submissions
+        with self.settings(QUERY_BUDGETS={}):
+            response = self.client.post(reverse('accounts:edit_profile'), {
+                'first_name': 'Ann', 'last_name': 'Lee', 'email': 'ann@example.com',
+                'skills': 'python', 'experience_years': 3, 'education': 'BSc',
+                'resume': SimpleUploadedFile(filename, content, 'application/pdf'),
+            })
+        seeker.refresh_from_db()
+        return response
+
+    def test_identical_files_are_stored_once(self):
+        self.upload(self.seekers[0], b'%PDF same resume')
+        self.upload(self.seekers[1], b'%PDF same resume')
+        name = self.seekers[0].resume.name
+        self.assertEqual(name, self.seekers[1].resume.name)
+        self.assertRegex(name, r'^resumes/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$')
+
+    def test_replaced_resume_is_released_once_unreferenced(self):
+        self.upload(self.seekers[0], b'%PDF shared')
+        self.upload(self.seekers[1], b'%PDF shared')
+        shared = self.seekers[0].resume.name
+        storage = self.seekers[0].resume.storage
+
+        self.upload(self.seekers[0], b'%PDF new')
+        self.assertEqual(resumes.release([shared], grace_period=timedelta(0)), [])
+        self.assertTrue(storage.exists(shared))
+
+        self.upload(self.seekers[1], b'%PDF newer')
+        self.assertEqual(resumes.collect(grace_period=timedelta(0)), [shared])
+        self.assertFalse(storage.exists(shared))
+        self.assertTrue(storage.exists(self.seekers[1].resume.name))
+
+    @override_settings(RESUME_UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload_is_refused(self):
+        previous = self.seekers[0].resume.name
+        response = self.upload(self.seekers[0], b'x' * 1000)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['jobseeker_form'], 'resume', 'The file is too large; the limit is 100\xa0bytes.')
+        self.assertEqual(self.seekers[0].resume.name, previous)
+
+    def test_resume_text_is_extracted_once_and_searchable(self):
+        from jobs.models import JobApplication
+
+        docx = io.BytesIO()
+        with zipfile.ZipFile(docx, 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+                '<w:p><w:r><w:t>Certified Kuber</w:t></w:r><w:r><w:t>netes operator</w:t></w:r></w:p>'
+                '</w:body></w:document>'
+            ))
+        self.upload(self.seekers[0], docx.getvalue(), 'cv.docx')
+        self.upload(self.seekers[1], 'Café owner, Postgres tuning'.encode(), 'cv.txt')
+        self.upload(self.seekers[2], 'Café owner, Postgres tuning'.encode(), 'cv.txt')
+        self.assertEqual(resumes.extract_pending(workers=1), (3, 2, 0))
+        self.assertEqual(resumes.extract_pending(workers=1), (0, 0, 0))
+
+        # A new upload of known content is linked without extracting again
+        self.upload(self.seekers[3], docx.getvalue(), 'resume.docx')
+        self.assertEqual(resumes.extract_pending(workers=1), (1, 0, 0))
+        self.seekers[3].refresh_from_db()
+        self.assertEqual(self.seekers[3].resume_text.text, 'Certified Kubernetes operator')
+
+        application = JobApplication.objects.filter(applicant=self.seekers[0]).select_related('job__company').first()
+        JobApplication.objects.filter(job=application.job, applicant__in=self.seekers[2:]).delete()
+        JobApplication.objects.get_or_create(job=application.job, applicant=self.seekers[1])
+        self.client.login(username=application.job.company.user_profile.user.username, password=PASSWORD)
+        url = reverse('jobs:job_applications', args=[application.job.id])
+        with self.settings(QUERY_BUDGETS={}):
+            response = self.client.get(url, {'search': 'kubernetes'})
+            self.assertEqual([a.applicant for a in response.context['applications']], [self.seekers[0]])
+            response = self.client.get(url, {'search': 'cafe postgr'})
+            self.assertEqual([a.applicant for a in response.context['applications']], [self.seekers[1]])
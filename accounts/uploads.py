@@ -0,0 +1,102 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    """A streamed upload that also knows the SHA-256 of its content."""
+
+    sha256 = None
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Stream uploaded files to a temporary file chunk by chunk, hashing them on the way.
+
+    Files are capped at ``settings.RESUME_UPLOAD_MAX_SIZE``. The other form
+    fields can't exceed ``DATA_UPLOAD_MAX_MEMORY_SIZE``, so a body longer
+    than both together must hold an oversized file: it is refused before any
+    of it is read, at the cost of the browser seeing a reset connection. A
+    file that only turns out too large while streaming is dropped and the
+    rest of the form is still parsed. Refused fields are listed in
+    ``request.rejected_uploads``; see ``add_upload_errors``.
+    """
+
+    chunk_size = 64 * 2 ** 10
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = settings.RESUME_UPLOAD_MAX_SIZE if max_size is None else max_size
+        self.body_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        field_limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        self.body_too_large = field_limit is not None and content_length > self.max_size + field_limit
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.body_too_large:
+            self._reject()
+            raise StopUpload(connection_reset=True)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self._reject()
+            raise SkipFile()
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hasher.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        # The body ended before the file did; drop the partial temporary file
+        if hasattr(self, 'file'):
+            self.file.close()
+
+    def _reject(self):
+        if self.request is not None:
+            if not hasattr(self.request, 'rejected_uploads'):
+                self.request.rejected_uploads = []
+            self.request.rejected_uploads.append(self.field_name)
+
+
+def hashed_uploads(view_func):
+    """Run the view's file uploads through ``HashingUploadHandler``.
+
+    Upload handlers must be in place before anything reads ``request.POST``,
+    and the CSRF middleware does, so the view is exempted from the
+    middleware and runs its CSRF check itself once the handler is set.
+    """
+    protected_view = csrf_protect(view_func)
+
+    @csrf_exempt
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return wrapper
+
+
+def add_upload_errors(request, *forms):
+    """Add an error to each form field whose upload the handler refused."""
+    for field_name in getattr(request, 'rejected_uploads', ()):
+        for form in forms:
+            if field_name in form.fields:
+                form.add_error(field_name, ValidationError(
+                    'The file is too large; the limit is %(limit)s.',
+                    code='file_too_large',
+                    params={'limit': filesizeformat(settings.RESUME_UPLOAD_MAX_SIZE)},
+                ))
@@ -1,10 +1,12 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
+from django.shortcuts import render, redirect
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
 from .forms import CustomUserCreationForm, EmployerProfileForm, JobSeekerProfileForm, UserProfileUpdateForm, UserUpdateForm
-from .models import UserProfile, EmployerProfile, JobSeekerProfile
+from .models import UserProfile
+from .uploads import add_upload_errors, hashed_uploads
 
 def register(request):
     if request.method == 'POST':
@@ -26,18 +28,17 @@ def register(request):
 
 @login_required
 def complete_employer_profile(request):
-    user_profile = get_object_or_404(UserProfile, user=request.user)
+    user_profile = request.profile.user_profile
+    if user_profile is None:
+        raise Http404
     
     if user_profile.user_type != 'employer':
         messages.error(request, 'Access denied.')
         return redirect('main:home')
     
     # Check if profile already exists
-    try:
-        employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
+    if request.profile.employer_profile is not None:
         return redirect('accounts:profile')
-    except EmployerProfile.DoesNotExist:
-        pass
     
     if request.method == 'POST':
         form = EmployerProfileForm(request.POST)
@@ -53,26 +54,28 @@ def complete_employer_profile(request):
     return render(request, 'accounts/complete_employer_profile.html', {'form': form})
 
 @login_required
+@hashed_uploads
 def complete_jobseeker_profile(request):
-    user_profile = get_object_or_404(UserProfile, user=request.user)
+    user_profile = request.profile.user_profile
+    if user_profile is None:
+        raise Http404
     
     if user_profile.user_type != 'job_seeker':
         messages.error(request, 'Access denied.')
         return redirect('main:home')
     
     # Check if profile already exists
-    try:
-        jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
+    if request.profile.jobseeker_profile is not None:
         return redirect('accounts:profile')
-    except JobSeekerProfile.DoesNotExist:
-        pass
     
     if request.method == 'POST':
         form = JobSeekerProfileForm(request.POST, request.FILES)
+        add_upload_errors(request, form)
         if form.is_valid():
             jobseeker_profile = form.save(commit=False)
             jobseeker_profile.user_profile = user_profile
             jobseeker_profile.save()
+            form.save_m2m()
             messages.success(request, 'Profile completed successfully!')
             return redirect('accounts:profile')
     else:
@@ -82,84 +85,69 @@ def complete_jobseeker_profile(request):
 
 @login_required
 def profile(request):
-    user_profile = get_object_or_404(UserProfile, user=request.user)
+    user_profile = request.profile.user_profile
+    if user_profile is None:
+        raise Http404
     
     context = {'user_profile': user_profile}
     
     if user_profile.user_type == 'employer':
-        try:
-            employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-            context['employer_profile'] = employer_profile
-        except EmployerProfile.DoesNotExist:
+        if request.profile.employer_profile is None:
             return redirect('accounts:complete_employer_profile')
+        context['employer_profile'] = request.profile.employer_profile
     else:
-        try:
-            jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-            context['jobseeker_profile'] = jobseeker_profile
-        except JobSeekerProfile.DoesNotExist:
+        if request.profile.jobseeker_profile is None:
             return redirect('accounts:complete_jobseeker_profile')
+        context['jobseeker_profile'] = request.profile.jobseeker_profile
     
     return render(request, 'accounts/profile.html', context)
 
 @login_required
+@hashed_uploads
 def edit_profile(request):
-    user_profile = get_object_or_404(UserProfile, user=request.user)
+    user_profile = request.profile.user_profile
+    if user_profile is None:
+        raise Http404
+    
+    employer_profile = request.profile.employer_profile
+    jobseeker_profile = request.profile.jobseeker_profile
+    if user_profile.user_type == 'employer' and employer_profile is None:
+        return redirect('accounts:complete_employer_profile')
+    if user_profile.user_type != 'employer' and jobseeker_profile is None:
+        return redirect('accounts:complete_jobseeker_profile')
     
     if request.method == 'POST':
         user_form = UserUpdateForm(request.POST, instance=request.user)
         profile_form = UserProfileUpdateForm(request.POST, instance=user_profile)
         
         if user_profile.user_type == 'employer':
-            try:
-                employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-                employer_form = EmployerProfileForm(request.POST, instance=employer_profile)
-                
-                if user_form.is_valid() and profile_form.is_valid() and employer_form.is_valid():
-                    user_form.save()
-                    profile_form.save()
-                    employer_form.save()
-                    messages.success(request, 'Profile updated successfully!')
-                    return redirect('accounts:profile')
-            except EmployerProfile.DoesNotExist:
-                return redirect('accounts:complete_employer_profile')
+            role_form = EmployerProfileForm(request.POST, instance=employer_profile)
         else:
-            try:
-                jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-                jobseeker_form = JobSeekerProfileForm(request.POST, request.FILES, instance=jobseeker_profile)
-                
-                if user_form.is_valid() and profile_form.is_valid() and jobseeker_form.is_valid():
-                    user_form.save()
-                    profile_form.save()
-                    jobseeker_form.save()
-                    messages.success(request, 'Profile updated successfully!')
-                    return redirect('accounts:profile')
-            except JobSeekerProfile.DoesNotExist:
-                return redirect('accounts:complete_jobseeker_profile')
+            role_form = JobSeekerProfileForm(request.POST, request.FILES, instance=jobseeker_profile)
+            add_upload_errors(request, role_form)
+        
+        if user_form.is_valid() and profile_form.is_valid() and role_form.is_valid():
+            user_form.save()
+            profile_form.save()
+            role_form.save()
+            messages.success(request, 'Profile updated successfully!')
+            return redirect('accounts:profile')
     else:
         user_form = UserUpdateForm(instance=request.user)
         profile_form = UserProfileUpdateForm(instance=user_profile)
         
         if user_profile.user_type == 'employer':
-            try:
-                employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-                employer_form = EmployerProfileForm(instance=employer_profile)
-                return render(request, 'accounts/edit_profile.html', {
-                    'user_form': user_form,
-                    'profile_form': profile_form,
-                    'employer_form': employer_form,
-                    'user_profile': user_profile
-                })
-            except EmployerProfile.DoesNotExist:
-                return redirect('accounts:complete_employer_profile')
+            role_form = EmployerProfileForm(instance=employer_profile)
         else:
-            try:
-                jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-                jobseeker_form = JobSeekerProfileForm(instance=jobseeker_profile)
-                return render(request, 'accounts/edit_profile.html', {
-                    'user_form': user_form,
-                    'profile_form': profile_form,
-                    'jobseeker_form': jobseeker_form,
-                    'user_profile': user_profile
-                })
-            except JobSeekerProfile.DoesNotExist:
-                return redirect('accounts:complete_jobseeker_profile')
+            role_form = JobSeekerProfileForm(instance=jobseeker_profile)
+    
+    context = {
+        'user_form': user_form,
+        'profile_form': profile_form,
+        'user_profile': user_profile
+    }
+    if user_profile.user_type == 'employer':
+        context['employer_form'] = role_form
+    else:
+        context['jobseeker_form'] = role_form
+    return render(request, 'accounts/edit_profile.html', context)
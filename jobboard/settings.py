@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,11 +44,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'main.middleware.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.profile',
             ],
         },
     },
@@ -75,13 +80,100 @@ WSGI_APPLICATION = 'jobboard.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Pragmas run on every new connection by the "production" profile below.
+SQLITE_PRAGMAS = {
+    # Readers no longer wait for the writer, nor the writer for readers
+    'journal_mode': 'WAL',
+    # With WAL a power cut can lose the last commits but not corrupt the file
+    'synchronous': 'NORMAL',
+    # Wait up to 5s for the write lock instead of failing "database is locked"
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 2 ** 20,
+    'cache_size': -32 * 1024,  # in KiB
+    'temp_store': 'MEMORY',
+}
+
+# Connection profiles, picked with the JOBBOARD_DATABASE_PROFILE environment
+# variable. Compare them with "manage.py stress_database".
+DATABASE_PROFILES = {
+    'default': {},
+    'production': {
+        # Reuse connections across requests, so the pragmas run once per
+        # connection, not once per request
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name} = {value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock when a transaction starts. A deferred
+            # transaction that reads first and then writes fails at once
+            # with "database is locked" when another writer got in between,
+            # and busy_timeout can't help it
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+}
+
+DATABASE_PROFILE = os.environ.get('JOBBOARD_DATABASE_PROFILE', 'default')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **DATABASE_PROFILES[DATABASE_PROFILE],
     }
 }
 
+# Read replicas: SQLite copies of the primary that the read-only pages read
+# from, refreshed by "manage.py sync_replicas" (see main.replicas). List their
+# files, separated by commas, in the JOBBOARD_DATABASE_REPLICAS environment
+# variable.
+REPLICA_FILES = [name for name in os.environ.get('JOBBOARD_DATABASE_REPLICAS', '').split(',') if name]
+DATABASE_REPLICAS = [f'replica{i}' for i in range(1, len(REPLICA_FILES) + 1)]
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'OPTIONS': {'init_command': 'PRAGMA query_only = 1; PRAGMA busy_timeout = 5000'},
+        # Tests read the test database through the replica aliases
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias, name in zip(DATABASE_REPLICAS, REPLICA_FILES)
+})
+
+# Shards: SQLite files that job applications and saved jobs are spread over,
+# grouped by job (see jobs.shards). List their files, separated by commas,
+# in the JOBBOARD_SHARDS environment variable, run "manage.py migrate
+# --database shardN" for each, then move rows onto them with "manage.py
+# rebalance_shards".
+SHARD_FILES = [name for name in os.environ.get('JOBBOARD_SHARDS', '').split(',') if name]
+DATABASE_SHARDS = [f'shard{i}' for i in range(1, len(SHARD_FILES) + 1)]
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        **DATABASE_PROFILES[DATABASE_PROFILE],
+    }
+    for alias, name in zip(DATABASE_SHARDS, SHARD_FILES)
+})
+
+DATABASE_ROUTERS = ['jobs.shards.ShardRouter', 'main.replicas.ReplicaRouter']
+
+# Replicas synced longer ago than this many seconds are not read from
+REPLICA_MAX_LAG = 30
+# How often each process rereads the replicas' heartbeats, in seconds
+REPLICA_LAG_CHECK_INTERVAL = 1
+# How often each process rereads which shard holds which jobs, in seconds
+SHARD_MAP_CHECK_INTERVAL = 1
+# How long a write waits for rebalance_shards to finish moving its job, in seconds
+SHARD_LOCK_TIMEOUT = 30
+# Threads each process uses to query the shards in parallel
+SHARD_FAN_OUT_WORKERS = 8
+# Threads each process uses to run the async views' independent queries at
+# the same time (see main.parallel); 0 runs them one after another, as is
+# best on a single CPU, where the threads would only take turns
+PARALLEL_QUERY_WORKERS = 8 if (os.cpu_count() or 1) > 1 else 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,11 +219,73 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resume uploads are streamed to disk and refused beyond this size
+# (see accounts.uploads).
+RESUME_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+
 # Authentication settings
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Remember each user's type in their session so role checks skip the profile query
+PROFILE_SESSION_CACHE = True
+
+# List pages paginate by cursor and stop counting matches past this many rows,
+# showing e.g. "10000+" instead. Set to None to always count exactly.
+PAGINATION_COUNT_CAP = 10000
+
+# Maximum number of SQL queries each view may run, keyed by URL name, or a
+# dict of them keyed by HTTP method for views whose other methods have no
+# budget. Checked by main.middleware.QueryBudgetMiddleware and enforced by
+# the test suite.
+QUERY_BUDGETS = {
+    'main:home': 5,
+    'main:about': 3,
+    'main:contact': 3,
+    'jobs:job_list': 7,
+    'jobs:job_detail': 7,
+    'jobs:post_job': 5,
+    # An upload runs a few queries per batch of rows, however large the file
+    'jobs:import_jobs': {'GET': 5},
+    'jobs:edit_job': 7,
+    'jobs:my_jobs': 6,
+    'jobs:apply_job': 7,
+    'jobs:job_applications': 7,
+    'jobs:export_applications': 7,
+    'jobs:saved_jobs': 7,
+    'jobs:my_applications': 6,
+    'jobs:recommended_jobs': 5,
+    'accounts:profile': 4,
+    'accounts:edit_profile': 4,
+    'accounts:register': 3,
+    'accounts:login': 3,
+}
+
+# Send X-Query-Count/-Time/-Duplicates/-Budget headers outside production
+QUERY_COUNT_HEADERS = DEBUG
+
+# Shared by every process on the host (see main.cache). The page cache's
+# generation counters and render locks, and the card and facet caches keyed
+# on them, need every web worker and management command to see the same
+# values; main.checks warns about a per-process cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'main.cache.SQLiteCache',
+        'LOCATION': os.environ.get('JOBBOARD_CACHE_FILE', BASE_DIR / 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
+
+# Runs the tests with an empty cache file of their own
+TEST_RUNNER = 'main.testing.TestRunner'
+
+# Anonymous home, job list and job detail pages are cached until a job,
+# category or company they depend on changes (see main.page_cache). The
+# timeout only bounds how long unused entries occupy the cache.
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Email settings (for development - console backend)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -1,3 +1,19 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import JobApplication, SavedJob
+
+
+@admin.register(JobApplication)
+class JobApplicationAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'applied_at')
+    list_filter = ('status',)
+    show_full_result_count = False
+    # For __str__, which names the applicant and the job
+    list_select_related = ('applicant__user_profile__user', 'job')
+
+
+@admin.register(SavedJob)
+class SavedJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'saved_at')
+    show_full_result_count = False
+    list_select_related = ('job_seeker__user_profile__user', 'job')
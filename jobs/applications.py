@@ -0,0 +1,80 @@
+from collections import Counter
+from operator import attrgetter
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from accounts.models import JobSeekerProfile
+from accounts.resumes import resume_matches
+from . import counters, shards
+from .models import JobApplication, SeekerSkill
+from .tasks import queue_status_notifications
+
+
+def list_for_job(job, ordering, status=None, search=''):
+    """The applications for ``job`` with their applicants and skills, sorted by ``ordering``.
+
+    ``search`` matches the applicant's name or anything in their extracted
+    resume. Applications on a shard can't be joined to their applicants, so
+    the search runs on the primary and the sorting in Python.
+    """
+    skills = Prefetch('applicant__seeker_skills', queryset=SeekerSkill.objects.select_related('skill'))
+    applications = JobApplication.objects.filter(job=job)
+    if status:
+        applications = applications.filter(status=status)
+
+    alias = shards.for_job(job.pk)
+    if alias == DEFAULT_DB_ALIAS:
+        if search:
+            applications = applications.filter(
+                resume_matches(search, 'applicant__resume_text') |
+                Q(applicant__user_profile__user__first_name__icontains=search) |
+                Q(applicant__user_profile__user__last_name__icontains=search)
+            )
+        return applications.select_related('applicant__user_profile__user').prefetch_related(skills).order_by(*ordering)
+
+    if search:
+        applicants = JobSeekerProfile.objects.filter(
+            resume_matches(search) |
+            Q(user_profile__user__first_name__icontains=search) |
+            Q(user_profile__user__last_name__icontains=search)
+        )
+        applications = applications.filter(applicant__in=list(applicants.values_list('pk', flat=True)))
+    applications = list(applications.using(alias))
+    applicants = Prefetch('applicant', queryset=JobSeekerProfile.objects.select_related('user_profile__user'))
+    shards.load_related(applications, applicants, skills)
+    # Stable sorts, least significant field first
+    for name in reversed(ordering):
+        applications.sort(key=attrgetter(name.lstrip('-').replace('__', '.')), reverse=name.startswith('-'))
+    return applications
+
+
+def set_status(job, application_ids, status):
+    """Move the given applications of ``job`` to ``status`` in a single UPDATE.
+
+    Ids of other jobs' applications are ignored. ``update()`` sends no
+    signals, so the per-status counters are adjusted and the applicant
+    emails queued here. Returns the number of applications that changed.
+    """
+    alias = shards.for_job(job.pk, for_write=True)
+    applications = JobApplication.objects.using(alias)
+    with transaction.atomic(using=alias):
+        changing = list(
+            applications.select_for_update()
+            .filter(job=job, pk__in=application_ids)
+            .exclude(status=status)
+            .values_list('pk', 'status')
+        )
+        if not changing:
+            return 0
+        now = timezone.now()
+        applications.filter(pk__in=[pk for pk, _ in changing]).update(status=status, updated_at=now)
+
+        # On the primary, whichever database the applications are on
+        with transaction.atomic():
+            deltas = Counter({status: len(changing)})
+            deltas.subtract(previous for _, previous in changing)
+            counters.apply_deltas({job.pk: deltas})
+            queue_status_notifications((pk, status, now) for pk, _ in changing)
+    return len(changing)
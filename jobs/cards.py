@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from main import page_cache
+
+CARD_TEMPLATE = 'jobs/includes/job_card.html'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Company and category names are shown on the card but live on other rows,
+# so renaming either does not touch the job's updated_at.
+DEPENDS_ON = ('companies', 'categories')
+
+
+def card_key(job, generations):
+    return f'jobs:card:{generations}:{job.pk}:{job.updated_at.timestamp()}'
+
+
+def attach_cards(jobs):
+    """Set ``card_html`` on each job to its rendered card body.
+
+    Cards are cached per job and ``updated_at``, fetched with a single
+    ``get_many`` and only rendered for the jobs that missed. The card holds
+    nothing that depends on the visitor or on the current time; pages render
+    those parts (buttons, "posted ... ago") around it.
+    """
+    jobs = list(jobs)
+    generations = '.'.join(map(str, page_cache.get_generations(DEPENDS_ON)))
+    keys = [card_key(job, generations) for job in jobs]
+    cards = cache.get_many(keys)
+    rendered = {}
+    for key, job in zip(keys, jobs):
+        if key not in cards:
+            cards[key] = rendered[key] = render_to_string(CARD_TEMPLATE, {'job': job})
+        job.card_html = mark_safe(cards[key])
+    if rendered:
+        cache.set_many(rendered, CACHE_TIMEOUT)
+    return jobs
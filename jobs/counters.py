@@ -0,0 +1,102 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from . import shards
+from .models import JobApplication, JobApplicationCount
+
+# Counter columns, one per application status plus the total.
+STATUSES = tuple(status for status, _ in JobApplication.STATUS_CHOICES)
+COLUMNS = ('total',) + STATUSES
+
+
+def apply_deltas(deltas):
+    """Add ``{job_id: Counter({column: delta})}`` to the counters with atomic F() updates.
+
+    Counters never go below zero; drift is fixed by ``repair``.
+    """
+    for job_id, changes in deltas.items():
+        changes = {column: delta for column, delta in changes.items() if delta}
+        if not changes:
+            continue
+        updates = {column: Greatest(F(column) + delta, Value(0)) for column, delta in changes.items()}
+        with transaction.atomic():
+            if JobApplicationCount.objects.filter(job_id=job_id).update(**updates):
+                continue
+            # Nothing to count up; also keeps cascaded deletes of a job from
+            # recreating the row they just removed.
+            if not any(delta > 0 for delta in changes.values()):
+                continue
+            initial = {column: max(delta, 0) for column, delta in changes.items()}
+            try:
+                with transaction.atomic():
+                    JobApplicationCount.objects.create(job_id=job_id, **initial)
+            except IntegrityError:
+                JobApplicationCount.objects.filter(job_id=job_id).update(**updates)
+
+
+def application_changed(previous_status, application):
+    """Count ``application`` saved over ``previous_status`` (``None`` for a new one)."""
+    deltas = Counter()
+    if previous_status is None:
+        deltas['total'] += 1
+    if application.status != previous_status:
+        deltas[application.status] += 1
+        if previous_status is not None:
+            deltas[previous_status] -= 1
+    apply_deltas({application.job_id: deltas})
+
+
+def application_deleted(job_id, status):
+    apply_deltas({job_id: Counter({'total': -1, status: -1})})
+
+
+def compute(job_ids=None):
+    """Count applications from scratch: ``{job_id: {column: count}}``, one grouped query per database."""
+    applications = JobApplication.objects.order_by()
+    querysets = shards.split(applications) if job_ids is None else shards.by_job(applications, job_ids)
+    grouped = shards.fan_out(
+        lambda queryset: list(queryset.values_list('job_id', 'status').annotate(count=Count('id'))), querysets
+    )
+    counts = {}
+    for job_id, status, count in (row for rows in grouped for row in rows):
+        row = counts.setdefault(job_id, dict.fromkeys(COLUMNS, 0))
+        row[status] = count
+        row['total'] += count
+    return counts
+
+
+def repair(job_ids=None, dry_run=False):
+    """Compare the stored counters with freshly computed ones and fix any drift.
+
+    Returns ``[(job_id, stored, computed)]`` for every job that was wrong,
+    where ``stored`` is ``None`` for a missing row and ``computed`` for a
+    row that should not exist.
+    """
+    with transaction.atomic():
+        stored_rows = JobApplicationCount.objects.select_for_update()
+        if job_ids is not None:
+            stored_rows = stored_rows.filter(job_id__in=job_ids)
+        stored = {row['job_id']: row for row in stored_rows.values('job_id', *COLUMNS)}
+        computed = compute(job_ids)
+
+        drift = []
+        for job_id in sorted(stored.keys() | computed.keys()):
+            before = stored.get(job_id)
+            if before is not None:
+                before = {column: before[column] for column in COLUMNS}
+            after = computed.get(job_id)
+            if before != after and (before is None or after is not None or any(before.values())):
+                drift.append((job_id, before, after))
+
+        if not dry_run:
+            for job_id, before, after in drift:
+                if after is None:
+                    JobApplicationCount.objects.filter(job_id=job_id).delete()
+                elif before is None:
+                    JobApplicationCount.objects.create(job_id=job_id, **after)
+                else:
+                    JobApplicationCount.objects.filter(job_id=job_id).update(**after)
+    return drift
@@ -0,0 +1,63 @@
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from main import page_cache, stats
+from . import facets
+from .models import Job
+from .signals import TRACKED_JOB_FIELDS
+from .tasks import queue_recommendation_refresh
+
+# Around a tenth of a second of write lock per chunk on SQLite
+CHUNK_SIZE = 200
+
+
+def expired_jobs(today=None):
+    """Active jobs whose application deadline has passed."""
+    today = today or timezone.localdate()
+    return Job.objects.filter(is_active=True, application_deadline__lt=today)
+
+
+def _expire_chunk(today, chunk_size):
+    with transaction.atomic():
+        states = list(
+            expired_jobs(today).select_for_update().order_by('application_deadline', 'id')
+            .values('id', *TRACKED_JOB_FIELDS)[:chunk_size]
+        )
+        if not states:
+            return []
+        ids = [state['id'] for state in states]
+        now = timezone.now()
+        Job.objects.filter(pk__in=ids).update(is_active=False, updated_at=now)
+
+        # update() sends no signals; do what the Job receivers would
+        expired = Counter(facets.facet_key_from_state(state) for state in states)
+        facets.apply_deltas({key: -count for key, count in expired.items()})
+        stats.record_job_changes([(state, {**state, 'is_active': False}) for state in states])
+        queue_recommendation_refresh((pk, now) for pk in ids)
+    return ids
+
+
+def expire_jobs(today=None, chunk_size=CHUNK_SIZE, pause=0):
+    """Deactivate every active job past its deadline; returns how many.
+
+    Works in chunks of ``chunk_size`` jobs, each its own short transaction,
+    sleeping ``pause`` seconds in between so requests waiting to write
+    aren't held up behind one long sweep.
+    """
+    today = today or timezone.localdate()
+    expired = 0
+    while True:
+        ids = _expire_chunk(today, chunk_size)
+        if not ids:
+            break
+        expired += len(ids)
+        facets.invalidate()
+        page_cache.bump('jobs', *(f'job:{pk}' for pk in ids))
+        if len(ids) < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return expired
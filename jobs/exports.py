@@ -0,0 +1,115 @@
+import csv
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts.models import JobSeekerProfile
+from . import shards
+from .models import JobApplication
+
+# Content type of each export format.
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+# Rows fetched from the database cursor at a time, and rows per chunk of the response.
+FETCH_SIZE = 2000
+ROWS_PER_CHUNK = 500
+
+# Column name and the lookup it is read from.
+APPLICATION_COLUMNS = (
+    ('application_id', 'id'),
+    ('applied_at', 'applied_at'),
+    ('status', 'status'),
+    ('username', 'applicant__user_profile__user__username'),
+    ('first_name', 'applicant__user_profile__user__first_name'),
+    ('last_name', 'applicant__user_profile__user__last_name'),
+    ('email', 'applicant__user_profile__user__email'),
+    ('phone', 'applicant__user_profile__phone'),
+    ('location', 'applicant__user_profile__location'),
+    ('experience_years', 'applicant__experience_years'),
+    ('education', 'applicant__education'),
+    ('skills', 'applicant__skills'),
+    ('resume', 'applicant__resume'),
+    ('cover_letter', 'cover_letter'),
+)
+
+_RESUME = [name for name, _ in APPLICATION_COLUMNS].index('resume')
+
+# Spreadsheet apps run cells starting with these as formulas.
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def application_rows(job):
+    """Yield one tuple per application for ``job``, newest first.
+
+    The applicant, profile and user columns come from a single joined query
+    that is read through a server-side cursor in chunks, so memory use does
+    not grow with the number of applicants. On a shard, which has no
+    applicants to join, they are looked up on the primary for each chunk.
+    """
+    lookups = [lookup for _, lookup in APPLICATION_COLUMNS]
+    applications = JobApplication.objects.filter(job=job).order_by('-applied_at')
+    alias = shards.for_job(job.pk)
+    if alias == DEFAULT_DB_ALIAS:
+        rows = applications.values_list(*lookups).iterator(chunk_size=FETCH_SIZE)
+    else:
+        rows = _sharded_rows(applications.using(alias), lookups)
+    for row in rows:
+        if row[_RESUME]:
+            row = row[:_RESUME] + (default_storage.url(row[_RESUME]),) + row[_RESUME + 1:]
+        yield row
+
+
+def _sharded_rows(applications, lookups):
+    own = [lookup for lookup in lookups if not lookup.startswith('applicant__')]
+    theirs = [lookup.removeprefix('applicant__') for lookup in lookups if lookup.startswith('applicant__')]
+    rows = applications.values('applicant_id', *own).iterator(chunk_size=FETCH_SIZE)
+    while chunk := list(islice(rows, FETCH_SIZE)):
+        applicants = JobSeekerProfile.objects.filter(pk__in={row['applicant_id'] for row in chunk}).values('pk', *theirs)
+        applicants = {applicant['pk']: applicant for applicant in applicants}
+        for row in chunk:
+            applicant = applicants.get(row['applicant_id'], {})
+            yield tuple(
+                applicant.get(lookup.removeprefix('applicant__')) if lookup.startswith('applicant__') else row[lookup]
+                for lookup in lookups
+            )
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def jsonl_lines(header, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+def chunked(lines, size=ROWS_PER_CHUNK):
+    # Servers write every yielded item separately; one line each is too small
+    lines = iter(lines)
+    while chunk := ''.join(islice(lines, size)):
+        yield chunk
+
+
+def stream_applications(job, fmt):
+    header = [name for name, _ in APPLICATION_COLUMNS]
+    lines = csv_lines if fmt == 'csv' else jsonl_lines
+    return chunked(lines(header, application_rows(job)))
@@ -0,0 +1,144 @@
+import hashlib
+import json
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Job, JobFacetCount
+
+FACET_FIELDS = ('category', 'job_type', 'experience_level', 'remote_work')
+
+# Fields stored per grouped row, in the same order as FACET_FIELDS.
+FACET_COLUMNS = ('category_id', 'job_type', 'experience_level', 'remote_work')
+
+GENERATION_KEY = 'jobs:facets:generation'
+CACHE_TIMEOUT = 60 * 60
+
+
+def facet_key(job):
+    return (job.category_id, job.job_type, job.experience_level, job.remote_work)
+
+
+def facet_key_from_state(state):
+    return tuple(state[column] for column in FACET_COLUMNS)
+
+
+def grouped_rows(queryset):
+    """One grouped aggregation over the facet columns of ``queryset``."""
+    return [
+        tuple(row[column] for column in FACET_COLUMNS) + (row['count'],)
+        for row in queryset.order_by().values(*FACET_COLUMNS).annotate(count=Count('id'))
+    ]
+
+
+def precomputed_rows():
+    return list(
+        JobFacetCount.objects.filter(count__gt=0).values_list(*FACET_COLUMNS, 'count')
+    )
+
+
+def fold_rows(rows, selected):
+    """Turn grouped rows into per-facet counts.
+
+    Each facet is counted with every *other* selected facet applied but not
+    its own, so picking a job type still shows how many jobs the other job
+    types would return. ``selected`` maps facet names to the chosen value;
+    a missing or empty value means the facet is not filtered.
+    """
+    active = {name: value for name, value in selected.items() if value not in (None, '', False)}
+    counts = {name: Counter() for name in FACET_FIELDS}
+    for row in rows:
+        values = dict(zip(FACET_FIELDS, row[:-1]))
+        for name in FACET_FIELDS:
+            if all(values[other] == value for other, value in active.items() if other != name):
+                counts[name][values[name]] += row[-1]
+    return {name: dict(counter) for name, counter in counts.items()}
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, None)
+
+
+def get_facet_counts(queryset, filters, selected):
+    """Facet counts for ``queryset``, cached per normalized filter set.
+
+    ``queryset`` must already have every non-facet filter applied (keyword,
+    location, salary, ...) but none of the facet filters; ``filters`` are
+    those non-facet filter values and only serve as the cache key. With no
+    filters the counts come from the precomputed JobFacetCount table.
+    """
+    filters = {name: value for name, value in filters.items() if value not in (None, '', [], False)}
+    normalized = json.dumps(filters, sort_keys=True, default=str)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    key = f'jobs:facets:{_generation()}:{digest}'
+
+    rows = cache.get(key)
+    if rows is None:
+        rows = grouped_rows(queryset) if filters else precomputed_rows()
+        cache.set(key, rows, CACHE_TIMEOUT)
+    return fold_rows(rows, selected)
+
+
+def apply_deltas(deltas):
+    """Add ``{facet_key: delta}`` to the precomputed counts with atomic F() updates."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        lookup = dict(zip(FACET_COLUMNS, key))
+        if delta < 0:
+            # Never go below zero; a drifted table is fixed by rebuild_facet_counts.
+            JobFacetCount.objects.filter(count__gte=-delta, **lookup).update(count=F('count') + delta)
+            continue
+        with transaction.atomic():
+            if JobFacetCount.objects.filter(**lookup).update(count=F('count') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    JobFacetCount.objects.create(count=delta, **lookup)
+            except IntegrityError:
+                JobFacetCount.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def job_changed(previous, job):
+    """Update the counts for ``job`` saved over ``previous``.
+
+    ``previous`` is the job's stored state before the save (``None`` for a new
+    job) and ``job`` is ``None`` when it was deleted.
+    """
+    deltas = Counter()
+    if previous is not None and previous['is_active']:
+        deltas[facet_key_from_state(previous)] -= 1
+    if job is not None and job.is_active:
+        deltas[facet_key(job)] += 1
+    apply_deltas(deltas)
+
+
+def merge_category_into_uncategorized(category_id):
+    """Move a category's counts to the uncategorized rows before it is deleted."""
+    deltas = Counter()
+    for row in JobFacetCount.objects.filter(category_id=category_id, count__gt=0):
+        deltas[(None, row.job_type, row.experience_level, row.remote_work)] += row.count
+    apply_deltas(deltas)
+
+
+def rebuild():
+    with transaction.atomic():
+        JobFacetCount.objects.all().delete()
+        JobFacetCount.objects.bulk_create(
+            JobFacetCount(**dict(zip(FACET_COLUMNS, row[:-1])), count=row[-1])
+            for row in grouped_rows(Job.objects.filter(is_active=True))
+        )
+    invalidate()
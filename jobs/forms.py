@@ -1,5 +1,6 @@
 from django import forms
 from .models import Job, JobApplication, JobCategory
+from .skills import sync_job_skills
 
 class JobPostForm(forms.ModelForm):
     class Meta:
@@ -25,6 +26,54 @@ class JobPostForm(forms.ModelForm):
         for field in self.fields.values():
             field.widget.attrs.update({'class': 'form-control'})
 
+    def save(self, commit=True):
+        job = super().save(commit)
+        if commit:
+            sync_job_skills(job)
+        else:
+            save_m2m = self.save_m2m
+
+            def save_m2m_and_skills():
+                save_m2m()
+                sync_job_skills(job)
+            self.save_m2m = save_m2m_and_skills
+        return job
+
+class JobImportForm(JobPostForm):
+    """JobPostForm for one imported row, which names its category.
+
+    Names are resolved through ``categories`` (casefolded name -> id), loaded
+    once per import, instead of with a query per row.
+    """
+    category = forms.CharField(required=False)
+
+    class Meta(JobPostForm.Meta):
+        fields = [field for field in JobPostForm.Meta.fields if field != 'category']
+
+    def __init__(self, *args, categories, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.categories = categories
+
+    def clean_category(self):
+        name = self.cleaned_data['category'].strip()
+        if not name:
+            return None
+        try:
+            return self.categories[name.casefold()]
+        except KeyError:
+            raise forms.ValidationError(f'Unknown category "{name}".')
+
+class JobImportUploadForm(forms.Form):
+    file = forms.FileField(
+        help_text='A CSV file with a header row, or a JSON Lines file with one job object per line.',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.jsonl,.ndjson'})
+    )
+    format = forms.ChoiceField(
+        choices=[('', 'Detect from file name'), ('csv', 'CSV'), ('jsonl', 'JSON Lines')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
 class JobApplicationForm(forms.ModelForm):
     class Meta:
         model = JobApplication
@@ -37,6 +86,34 @@ class JobApplicationForm(forms.ModelForm):
             })
         }
 
+class IdListField(forms.Field):
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {
+        'invalid': 'Enter a list of whole numbers.',
+        'max_length': 'Select at most %(limit)s items.',
+    }
+
+    def __init__(self, *, max_length=None, **kwargs):
+        self.max_length = max_length
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        try:
+            ids = sorted({int(item) for item in value or ()})
+        except (TypeError, ValueError):
+            raise forms.ValidationError(self.error_messages['invalid'], code='invalid')
+        if self.max_length is not None and len(ids) > self.max_length:
+            raise forms.ValidationError(
+                self.error_messages['max_length'], code='max_length', params={'limit': self.max_length}
+            )
+        return ids
+
+class ApplicationStatusForm(forms.Form):
+    MAX_APPLICATIONS = 1000
+    
+    status = forms.ChoiceField(choices=JobApplication.STATUS_CHOICES)
+    application_ids = IdListField(max_length=MAX_APPLICATIONS)
+
 class JobSearchForm(forms.Form):
     query = forms.CharField(
         max_length=200, 
@@ -83,6 +160,34 @@ class JobSearchForm(forms.Form):
             'class': 'form-control'
         })
     )
+    skills = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'placeholder': 'Skills, e.g. Python, SQL',
+            'class': 'form-control'
+        })
+    )
+    skills_match = forms.ChoiceField(
+        choices=[('any', 'Any of these skills'), ('all', 'All of these skills')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    def set_facet_counts(self, counts):
+        """Show the number of matching jobs next to every filter option."""
+        category_counts = counts.get('category', {})
+        self.fields['category'].label_from_instance = (
+            lambda category: f"{category.name} ({category_counts.get(category.pk, 0)})"
+        )
+        for name in ('job_type', 'experience_level'):
+            field_counts = counts.get(name, {})
+            self.fields[name].choices = [
+                (value, f"{label} ({field_counts.get(value, 0)})" if value else label)
+                for value, label in self.fields[name].choices
+            ]
+        remote_count = counts.get('remote_work', {}).get(True, 0)
+        self.fields['remote_work'].label = self['remote_work'].label = f"Remote only ({remote_count})"
 
 class JobCategoryForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from collections import Counter
+
+from django.db import transaction
+
+from main import page_cache, stats
+from . import facets, search
+from .forms import JobImportForm
+from .models import Job, JobCategory
+from .signals import job_state
+from .skills import sync_job_skills
+from .tasks import queue_recommendation_refresh
+
+FORMATS = ('csv', 'jsonl')
+BATCH_SIZE = 1000
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension == 'ndjson':
+        return 'jsonl'
+    if extension not in FORMATS:
+        raise ValueError(f'Cannot tell the format of "{filename}"; use a .csv or .jsonl file.')
+    return extension
+
+
+def read_rows(stream, format):
+    """Yield ``(line_number, data, error)`` for each row of a binary CSV or JSONL stream.
+
+    Rows are read one at a time, so files of any size use constant memory.
+    ``error`` is set instead of ``data`` for lines that cannot be parsed.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if format == 'csv' else None)
+    try:
+        if format == 'csv':
+            reader = csv.DictReader(text)
+            # The line the row being read starts on
+            start = 1
+            try:
+                if reader.fieldnames is not None:
+                    start = reader.line_num + 1
+                for data in reader:
+                    yield reader.line_num, data, None
+                    start = reader.line_num + 1
+            except csv.Error as e:
+                # The rest of the file can't be split into rows reliably
+                yield start, None, f'Invalid CSV: {e}'
+            return
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f'Invalid JSON: {e}'
+                continue
+            if isinstance(data, dict):
+                yield line_number, data, None
+            else:
+                yield line_number, None, 'Each line must be a JSON object.'
+    except UnicodeDecodeError:
+        yield None, None, 'The file is not UTF-8 encoded.'
+    finally:
+        # Leave the underlying file open for its owner
+        text.detach()
+
+
+def normalize_row(data):
+    # CSV has no booleans, and a checkbox widget treats any other string as checked
+    remote_work = data.get('remote_work')
+    if isinstance(remote_work, str):
+        data = {**data, 'remote_work': remote_work.strip().lower() in _TRUE_VALUES}
+    return data
+
+
+def _insert(jobs):
+    with transaction.atomic():
+        Job.objects.bulk_create(jobs)
+        sync_job_skills(*jobs)
+        search.index_new_jobs(*jobs)
+        facets.apply_deltas(Counter(facets.facet_key(job) for job in jobs if job.is_active))
+        stats.record_job_changes([(None, job_state(job)) for job in jobs])
+        queue_recommendation_refresh((job.pk, job.updated_at) for job in jobs)
+    return len(jobs)
+
+
+def import_jobs(rows, company, batch_size=BATCH_SIZE, on_error=None):
+    """Validate ``(line_number, data, error)`` rows and create them as jobs of ``company``.
+
+    Valid rows are inserted with ``bulk_create`` in batches of ``batch_size``,
+    each in its own transaction, and the search index, skills, facet counts,
+    site statistics and page cache are updated per batch since bulk inserts
+    send no signals. Invalid rows are skipped and passed to
+    ``on_error(line_number, message)``. Returns ``(created, failed)``.
+    """
+    categories = {name.casefold(): pk for pk, name in JobCategory.objects.values_list('pk', 'name')}
+    created = failed = 0
+    batch = []
+    try:
+        for line_number, data, error in rows:
+            if error is None:
+                form = JobImportForm(normalize_row(data), categories=categories)
+                if form.is_valid():
+                    job = form.save(commit=False)
+                    job.company = company
+                    job.category_id = form.cleaned_data['category']
+                    batch.append(job)
+                    if len(batch) >= batch_size:
+                        created += _insert(batch)
+                        batch = []
+                    continue
+                error = '; '.join(
+                    f'{field}: {" ".join(messages)}' if field != '__all__' else ' '.join(messages)
+                    for field, messages in form.errors.items()
+                )
+            failed += 1
+            if on_error:
+                on_error(line_number, error)
+        if batch:
+            created += _insert(batch)
+    finally:
+        if created:
+            facets.invalidate()
+            page_cache.bump('jobs')
+    return created, failed
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from jobs import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Precompute the "recommended for you" feed of every job seeker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Rescore every seeker against every active job instead of only what changed.',
+        )
+        parser.add_argument('--top', type=int, default=recommendations.DEFAULT_TOP_N,
+                            help='Number of jobs kept per seeker.')
+        parser.add_argument('--seeker-batch-size', type=int,
+                            default=recommendations.DEFAULT_SEEKER_BATCH_SIZE)
+        parser.add_argument('--job-chunk-size', type=int,
+                            default=recommendations.DEFAULT_JOB_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        rescored, updated, changed_jobs = recommendations.refresh_recommendations(
+            full=options['full'],
+            top_n=options['top'],
+            seeker_batch_size=options['seeker_batch_size'],
+            job_chunk_size=options['job_chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rescored {rescored} seekers; merged {changed_jobs} changed jobs into {updated} feeds.'
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs import expiry, tasks
+
+
+class Command(BaseCommand):
+    help = 'Deactivate active jobs whose application deadline has passed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=expiry.CHUNK_SIZE,
+                            help='Jobs deactivated per transaction.')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to wait between chunks, letting other writers in.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired jobs.')
+        parser.add_argument('--enqueue', action='store_true',
+                            help="Queue today's sweep for the task worker instead of running it here.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{expiry.expired_jobs().count()} active jobs are past their deadline.')
+            return
+        if options['enqueue']:
+            tasks.expire_past_deadline.enqueue(
+                {'chunk_size': options['chunk_size'], 'pause': options['pause']},
+                key=f'expire-jobs:{timezone.localdate().isoformat()}',
+            )
+            self.stdout.write("Queued today's expiry sweep.")
+            return
+        expired = expiry.expire_jobs(chunk_size=options['chunk_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Deactivated {expired} expired jobs.'))
@@ -0,0 +1,58 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import EmployerProfile
+from jobs import importer
+
+
+class Command(BaseCommand):
+    help = 'Import jobs for an employer from a CSV or JSONL file, with one job per row or line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or "-" to read standard input.')
+        parser.add_argument('--employer', required=True, help='Username of the employer the jobs belong to.')
+        parser.add_argument('--format', choices=importer.FORMATS,
+                            help='File format (default: taken from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE,
+                            help='Jobs inserted per transaction.')
+
+    def handle(self, *args, **options):
+        company = (
+            EmployerProfile.objects.select_related('user_profile__user')
+            .filter(user_profile__user__username=options['employer']).first()
+        )
+        if company is None:
+            raise CommandError(f'"{options["employer"]}" is not an employer with a company profile.')
+
+        path = options['path']
+        try:
+            format = options['format'] or importer.detect_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        if path == '-':
+            created, failed = self.run(sys.stdin.buffer, format, company, options['batch_size'])
+        else:
+            try:
+                with open(path, 'rb') as stream:
+                    created, failed = self.run(stream, format, company, options['batch_size'])
+            except OSError as e:
+                raise CommandError(str(e))
+
+        summary = f'Imported {created} jobs for {company.company_name} in {time.perf_counter() - started:.1f}s'
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{summary}; {failed} rows had errors.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary}.'))
+
+    def run(self, stream, format, company, batch_size):
+        return importer.import_jobs(
+            importer.read_rows(stream, format), company, batch_size=batch_size, on_error=self.report_error,
+        )
+
+    def report_error(self, line_number, message):
+        location = f'line {line_number}' if line_number else 'file'
+        self.stderr.write(f'{location}: {message}')
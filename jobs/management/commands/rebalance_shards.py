@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import rebalance
+
+
+class Command(BaseCommand):
+    help = (
+        'Spread the job applications and saved jobs evenly over the shards listed in JOBBOARD_SHARDS, '
+        'moving them off the primary. Drain a shard before removing it from JOBBOARD_SHARDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drain', action='append', default=[], metavar='ALIAS',
+                            help='Move everything off this shard (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=rebalance.BATCH_SIZE,
+                            help='Jobs whose rows are copied per transaction.')
+        parser.add_argument('--settle', type=float, default=None,
+                            help='Seconds to wait for every process to see each step of a move; '
+                                 f'defaults to SHARD_MAP_CHECK_INTERVAL + 1 ({rebalance.default_settle()}s).')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the moves.')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_SHARDS:
+            raise CommandError('No shards are configured; set JOBBOARD_SHARDS.')
+        unknown = set(options['drain']) - set(settings.DATABASE_SHARDS)
+        if unknown:
+            raise CommandError(f'Not a shard: {", ".join(sorted(unknown))}')
+
+        if options['dry_run']:
+            moves = rebalance.plan(options['drain'])
+            for bucket, source, target in moves:
+                self.stdout.write(f'bucket {bucket}: {source} -> {target}')
+            self.stdout.write(f'{len(moves)} buckets would move.')
+            return
+
+        def report(bucket, source, target, rows):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'bucket {bucket}: moved {rows} rows from {source} to {target}')
+
+        moves = rebalance.rebalance(options['drain'], options['batch_size'], options['settle'], on_move=report)
+        if moves:
+            self.stdout.write(self.style.SUCCESS(f'Moved {len(moves)} buckets.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('The shards are balanced.'))
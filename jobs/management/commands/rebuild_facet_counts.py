@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from jobs import facets
+from jobs.models import JobFacetCount
+from main import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed search facet counts from the jobs table.'
+
+    def handle(self, *args, **options):
+        facets.rebuild()
+        page_cache.bump('jobs')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {JobFacetCount.objects.count()} facet count rows.'
+        ))
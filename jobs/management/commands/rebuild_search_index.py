@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from jobs import search
+from main import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index used by the job list.'
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError('The full-text index is only available on SQLite.')
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            search.rebuild_index(cursor)
+            cursor.execute(f'SELECT count(*) FROM {search.FTS_TABLE}')
+            indexed = cursor.fetchone()[0]
+        page_cache.bump('jobs')
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} jobs.'))
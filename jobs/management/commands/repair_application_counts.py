@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from jobs import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-job application counters and fix any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not fix it.')
+        parser.add_argument('--job', type=int, action='append', dest='job_ids',
+                            help='Only check this job (repeatable).')
+
+    def handle(self, *args, **options):
+        drift = counters.repair(options['job_ids'], dry_run=options['dry_run'])
+        for job_id, stored, computed in drift:
+            changes = ', '.join(
+                f'{column} {(stored or {}).get(column, 0)} -> {(computed or {}).get(column, 0)}'
+                for column in counters.COLUMNS
+                if (stored or {}).get(column, 0) != (computed or {}).get(column, 0)
+            )
+            self.stdout.write(self.style.WARNING(f'job {job_id}: {changes or "missing counter row"}'))
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All application counters are correct.'))
+        elif options['dry_run']:
+            self.stdout.write(f'{len(drift)} jobs have drifted counters; run without --dry-run to fix them.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed the counters of {len(drift)} jobs.'))
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS jobs_job_fts USING fts5('
+            'title, description, company_name, skills_required, '
+            'tokenize = "unicode61 remove_diacritics 2")'
+        )
+        cursor.execute(
+            'INSERT INTO jobs_job_fts (rowid, title, description, company_name, skills_required) '
+            'SELECT j.id, j.title, j.description, e.company_name, j.skills_required '
+            'FROM jobs_job j INNER JOIN accounts_employerprofile e ON e.id = j.company_id'
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS jobs_job_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0002_job_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeekerSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_seeker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seeker_skills', to='accounts.jobseekerprofile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seeker_links', to='jobs.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'job_seeker'], name='seekerskill_skill_seeker_idx')],
+                'unique_together': {('job_seeker', 'skill')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_skills', to='jobs.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_links', to='jobs.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'job'], name='jobskill_skill_job_idx')],
+                'unique_together': {('job', 'skill')},
+            },
+        ),
+    ]
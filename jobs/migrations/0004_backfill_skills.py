@@ -0,0 +1,57 @@
+import re
+
+from django.db import migrations
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def parse_skills(text):
+    skills = []
+    for part in (text or '').split(','):
+        name = WHITESPACE_RE.sub(' ', part).strip().lower()[:100]
+        if name and name not in skills:
+            skills.append(name)
+    return skills
+
+
+def backfill_skills(apps, schema_editor):
+    Skill = apps.get_model('jobs', 'Skill')
+    JobSkill = apps.get_model('jobs', 'JobSkill')
+    SeekerSkill = apps.get_model('jobs', 'SeekerSkill')
+    Job = apps.get_model('jobs', 'Job')
+    JobSeekerProfile = apps.get_model('accounts', 'JobSeekerProfile')
+
+    job_skills = {
+        job_id: parse_skills(text)
+        for job_id, text in Job.objects.values_list('id', 'skills_required').iterator()
+    }
+    seeker_skills = {
+        seeker_id: parse_skills(text)
+        for seeker_id, text in JobSeekerProfile.objects.values_list('id', 'skills').iterator()
+    }
+
+    names = {name for mapping in (job_skills, seeker_skills) for names in mapping.values() for name in names}
+    Skill.objects.bulk_create([Skill(name=name) for name in sorted(names)], ignore_conflicts=True)
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+
+    JobSkill.objects.bulk_create(
+        [JobSkill(job_id=job_id, skill_id=skill_ids[name])
+         for job_id, names in job_skills.items() for name in names],
+        batch_size=500, ignore_conflicts=True,
+    )
+    SeekerSkill.objects.bulk_create(
+        [SeekerSkill(job_seeker_id=seeker_id, skill_id=skill_ids[name])
+         for seeker_id, names in seeker_skills.items() for name in names],
+        batch_size=500, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_skills'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0004_backfill_skills'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationState',
+            fields=[
+                ('job_seeker', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation_state', serialize=False, to='accounts.jobseekerprofile')),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='jobs.job')),
+                ('job_seeker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='accounts.jobseekerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job_seeker', '-score'], name='jobrec_seeker_score_idx')],
+                'unique_together': {('job_seeker', 'job')},
+            },
+        ),
+    ]
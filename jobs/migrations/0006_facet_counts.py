@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_facet_counts(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobFacetCount = apps.get_model('jobs', 'JobFacetCount')
+    rows = (
+        Job.objects.filter(is_active=True).order_by()
+        .values('category_id', 'job_type', 'experience_level', 'remote_work')
+        .annotate(count=Count('id'))
+    )
+    JobFacetCount.objects.bulk_create([JobFacetCount(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('full_time', 'Full Time'), ('part_time', 'Part Time'), ('contract', 'Contract'), ('internship', 'Internship'), ('freelance', 'Freelance')], max_length=20)),
+                ('experience_level', models.CharField(choices=[('entry', 'Entry Level'), ('mid', 'Mid Level'), ('senior', 'Senior Level'), ('executive', 'Executive')], max_length=20)),
+                ('remote_work', models.BooleanField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='jobs.jobcategory')),
+            ],
+            options={
+                'unique_together': {('category', 'job_type', 'experience_level', 'remote_work')},
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
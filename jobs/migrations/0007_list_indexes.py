@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0006_facet_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='job_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at', '-id'], name='job_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['company', '-created_at'], name='job_company_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at'], name='job_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['applicant', '-applied_at', '-id'], name='application_applicant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', '-applied_at'], name='application_job_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedjob',
+            index=models.Index(fields=['job_seeker', '-saved_at', '-id'], name='savedjob_seeker_recent_idx'),
+        ),
+    ]
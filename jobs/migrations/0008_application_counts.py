@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_application_counts(apps, schema_editor):
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    JobApplicationCount = apps.get_model('jobs', 'JobApplicationCount')
+    counts = {}
+    for job_id, status, count in (
+        JobApplication.objects.order_by().values_list('job_id', 'status').annotate(count=Count('id'))
+    ):
+        row = counts.setdefault(job_id, JobApplicationCount(job_id=job_id))
+        setattr(row, status, count)
+        row.total += count
+    JobApplicationCount.objects.bulk_create(counts.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_list_indexes'),
+    ]
+
+    operations = [
+        # My Jobs pages through an employer's jobs by (-created_at, -id)
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_company_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['company', '-created_at', '-id'], name='job_company_recent_idx'),
+        ),
+        migrations.CreateModel(
+            name='JobApplicationCount',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='application_count', serialize=False, to='jobs.job')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('reviewed', models.PositiveIntegerField(default=0)),
+                ('interview', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_application_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_resume_fts'),
+        ('jobs', '0008_application_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['application_deadline'], name='job_active_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:02
+
+import django.db.models.deletion
+import jobs.shards
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_resume_fts'),
+        ('jobs', '0009_deadline_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardBucket',
+            fields=[
+                ('bucket', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('alias', models.CharField(max_length=100)),
+                ('stray', models.CharField(blank=True, max_length=100)),
+                ('locked', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShardSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='applicant',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='accounts.jobseekerprofile'),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='id',
+            field=models.BigAutoField(default=jobs.shards.next_id, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='jobs.job'),
+        ),
+        migrations.AlterField(
+            model_name='savedjob',
+            name='id',
+            field=models.BigAutoField(default=jobs.shards.next_id, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='savedjob',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='jobs.job'),
+        ),
+        migrations.AlterField(
+            model_name='savedjob',
+            name='job_seeker',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='saved_jobs', to='accounts.jobseekerprofile'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:41
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_uncategorized_duplicates(apps, schema_editor):
+    JobFacetCount = apps.get_model('jobs', 'JobFacetCount')
+    uncategorized = JobFacetCount.objects.filter(category__isnull=True)
+    duplicates = (
+        uncategorized.order_by().values('job_type', 'experience_level', 'remote_work')
+        .annotate(rows=Count('id'), total=Sum('count')).filter(rows__gt=1)
+    )
+    for row in duplicates:
+        rows = uncategorized.filter(
+            job_type=row['job_type'], experience_level=row['experience_level'], remote_work=row['remote_work']
+        ).order_by('id')
+        keep = rows.values_list('id', flat=True).first()
+        rows.exclude(id=keep).delete()
+        JobFacetCount.objects.filter(id=keep).update(count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorized_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='jobfacetcount',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('job_type', 'experience_level', 'remote_work'), name='facetcount_uncategorized_uniq'),
+        ),
+    ]
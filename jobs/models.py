@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from accounts.models import EmployerProfile, JobSeekerProfile
+from . import shards
 
 class JobCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -47,6 +49,17 @@ class Job(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Job list and home page: newest active jobs, optionally by category
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True), name='job_active_recent_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=Q(is_active=True), name='job_active_category_idx'),
+            # An employer's own jobs
+            models.Index(fields=['company', '-created_at', '-id'], name='job_company_recent_idx'),
+            # Jobs changed since the last recommendations run
+            models.Index(fields=['updated_at'], name='job_updated_idx'),
+            # Active jobs past their deadline, for expire_jobs
+            models.Index(fields=['application_deadline'], condition=Q(is_active=True), name='job_active_deadline_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.company.company_name}"
@@ -70,8 +83,11 @@ class JobApplication(models.Model):
         ('rejected', 'Rejected'),
     )
     
-    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
-    applicant = models.ForeignKey(JobSeekerProfile, on_delete=models.CASCADE, related_name='applications')
+    # Rows may live on a shard (see jobs.shards), where the jobs and profiles
+    # they point at aren't, so neither the keys nor the ids can come from the database
+    id = models.BigAutoField(primary_key=True, default=shards.next_id)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications', db_constraint=False)
+    applicant = models.ForeignKey(JobSeekerProfile, on_delete=models.CASCADE, related_name='applications', db_constraint=False)
     cover_letter = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
@@ -80,17 +96,138 @@ class JobApplication(models.Model):
     class Meta:
         unique_together = ('job', 'applicant')
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['applicant', '-applied_at', '-id'], name='application_applicant_idx'),
+            models.Index(fields=['job', '-applied_at'], name='application_job_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.applicant.user_profile.user.get_full_name()} applied for {self.job.title}"
 
+class JobApplicationCount(models.Model):
+    """Applications for a job, in total and per status. Kept up to date by
+    jobs.counters; a job without a row has no applications."""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='application_count')
+    total = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    reviewed = models.PositiveIntegerField(default=0)
+    interview = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.job_id}: {self.total} applications"
+
 class SavedJob(models.Model):
-    job = models.ForeignKey(Job, on_delete=models.CASCADE)
-    job_seeker = models.ForeignKey(JobSeekerProfile, on_delete=models.CASCADE, related_name='saved_jobs')
+    # Sharded like JobApplication
+    id = models.BigAutoField(primary_key=True, default=shards.next_id)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, db_constraint=False)
+    job_seeker = models.ForeignKey(JobSeekerProfile, on_delete=models.CASCADE, related_name='saved_jobs', db_constraint=False)
     saved_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ('job', 'job_seeker')
+        indexes = [
+            models.Index(fields=['job_seeker', '-saved_at', '-id'], name='savedjob_seeker_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.job_seeker.user_profile.user.username} saved {self.job.title}"
+
+class Skill(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    
+    def __str__(self):
+        return self.name
+
+class JobSkill(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='job_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='job_links')
+    
+    class Meta:
+        unique_together = ('job', 'skill')
+        indexes = [
+            models.Index(fields=['skill', 'job'], name='jobskill_skill_job_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_id}: {self.skill_id}"
+
+class SeekerSkill(models.Model):
+    job_seeker = models.ForeignKey(JobSeekerProfile, on_delete=models.CASCADE, related_name='seeker_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='seeker_links')
+    
+    class Meta:
+        unique_together = ('job_seeker', 'skill')
+        indexes = [
+            models.Index(fields=['skill', 'job_seeker'], name='seekerskill_skill_seeker_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_seeker_id}: {self.skill_id}"
+
+class JobRecommendation(models.Model):
+    job_seeker = models.ForeignKey(JobSeekerProfile, on_delete=models.CASCADE, related_name='recommendations')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('job_seeker', 'job')
+        indexes = [
+            models.Index(fields=['job_seeker', '-score'], name='jobrec_seeker_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_id} for {self.job_seeker_id} ({self.score:.3f})"
+
+class RecommendationState(models.Model):
+    job_seeker = models.OneToOneField(JobSeekerProfile, on_delete=models.CASCADE, primary_key=True, related_name='recommendation_state')
+    fingerprint = models.CharField(max_length=64)
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.job_seeker_id} @ {self.computed_at}"
+
+class JobFacetCount(models.Model):
+    category = models.ForeignKey(JobCategory, on_delete=models.CASCADE, null=True, blank=True)
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPES)
+    experience_level = models.CharField(max_length=20, choices=Job.EXPERIENCE_LEVELS)
+    remote_work = models.BooleanField()
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('category', 'job_type', 'experience_level', 'remote_work')
+        constraints = [
+            # Unique constraints treat NULLs as distinct, so uncategorized
+            # rows need their own
+            models.UniqueConstraint(
+                fields=['job_type', 'experience_level', 'remote_work'],
+                condition=Q(category__isnull=True),
+                name='facetcount_uncategorized_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.category_id}/{self.job_type}/{self.experience_level}/{self.remote_work}: {self.count}"
+
+class ShardBucket(models.Model):
+    """The database holding the applications and saved jobs of one bucket of
+    jobs; see jobs.shards. Buckets without a row are on the primary."""
+    bucket = models.PositiveSmallIntegerField(primary_key=True)
+    alias = models.CharField(max_length=100)
+    # While rebalance_shards moves the bucket: the other database holding
+    # copies of its rows, which reads there must skip
+    stray = models.CharField(max_length=100, blank=True)
+    # Writes to the bucket wait while its rows are being copied
+    locked = models.BooleanField(default=False)
+    
+    def __str__(self):
+        return f"Bucket {self.bucket} on {self.alias}"
+
+class ShardSequence(models.Model):
+    """The next primary key that jobs.shards.next_id hands out in blocks."""
+    next_id = models.BigIntegerField()
+    
+    def __str__(self):
+        return f"Next sharded id {self.next_id}"
@@ -0,0 +1,200 @@
+import base64
+import binascii
+import heapq
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from . import shards
+
+
+def _json_default(value):
+    # Keep full microsecond precision; DjangoJSONEncoder would round
+    # datetimes to milliseconds and break the keyset comparison.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values, backwards=False):
+    payload = json.dumps({'v': values, 'b': backwards}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(values, backwards)`` for a cursor token, or ``None`` if it is malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload['v']), bool(payload['b'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+
+def capped_count(queryset, cap=None):
+    """Count ``queryset`` but stop at ``cap`` rows; returns ``(count, is_capped)``."""
+    if cap is None:
+        cap = getattr(settings, 'PAGINATION_COUNT_CAP', None)
+    if not cap:
+        return queryset.count(), False
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count > cap
+
+
+def merged_capped_count(querysets, cap=None):
+    """``capped_count`` over the union of ``querysets``, counted in parallel."""
+    counts = shards.fan_out(lambda queryset: capped_count(queryset, cap), querysets)
+    total = sum(count for count, _ in counts)
+    if cap is None:
+        cap = getattr(settings, 'PAGINATION_COUNT_CAP', None)
+    if cap and (total > cap or any(is_capped for _, is_capped in counts)):
+        return min(total, cap), True
+    return total, False
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class CursorPaginator:
+    """Keyset pagination over a unique ordering such as ``('-created_at', '-id')``.
+
+    Unlike ``Paginator`` this never issues ``COUNT(*)`` or ``OFFSET``: every
+    page is a range scan that starts right after the last row of the previous
+    one, so deep pages cost the same as the first.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _after(self, values, backwards):
+        # (a, b) > (x, y) expanded to a > x OR (a = x AND b > y), flipping the
+        # comparison for descending fields and when walking backwards.
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field, _ in self._fields()]
+
+    def _sample_queryset(self):
+        return self.queryset
+
+    def _output_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        opts = queryset.model._meta
+        for part in name.split('__'):
+            field = opts.pk if part == 'pk' else opts.get_field(part)
+            if field.is_relation:
+                opts = field.related_model._meta
+        return field
+
+    def _parse(self, values):
+        """The cursor's ``values`` as Python values of the ordering fields, or ``None`` if any is invalid."""
+        if len(values) != len(self.ordering):
+            return None
+        queryset = self._sample_queryset()
+        parsed = []
+        try:
+            for (field, _), value in zip(self._fields(), values):
+                value = self._output_field(queryset, field).to_python(value)
+                if value is None:
+                    return None
+                parsed.append(value)
+        except (ValidationError, TypeError, ValueError):
+            return None
+        return parsed
+
+    def _rows(self, queryset, values, backwards, ordering):
+        # One row more than a page, to tell whether there is another page
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backwards))
+        return list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+    def get_page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        values, backwards = decoded if decoded else (None, False)
+        # A tampered cursor starts over from the first page
+        if values is not None:
+            values = self._parse(values)
+            if values is None:
+                backwards = False
+
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+
+        rows = self._rows(self.queryset, values, backwards, ordering)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor(self._key(rows[-1]))
+            if values is not None and (has_more or not backwards):
+                previous_cursor = encode_cursor(self._key(rows[0]), backwards=True)
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """``CursorPaginator`` over the union of several querysets, such as a
+    query ``jobs.shards.split`` over the shards.
+
+    Each queryset is asked for a page in parallel and the pages are merged,
+    so the fields of ``ordering`` must all sort the same way.
+    """
+
+    def __init__(self, querysets, per_page, ordering=('-created_at', '-id')):
+        super().__init__(None, per_page, ordering)
+        self.querysets = list(querysets)
+        if len({descending for _, descending in self._fields()}) > 1:
+            raise ValueError('The ordering fields must all be ascending or all descending')
+
+    def _sample_queryset(self):
+        return self.querysets[0]
+
+    def _rows(self, queryset, values, backwards, ordering):
+        rows = super()._rows
+        pages = shards.fan_out(lambda queryset: rows(queryset, values, backwards, ordering), self.querysets)
+        descending = ordering[0].startswith('-')
+        return list(heapq.merge(*pages, key=self._key, reverse=descending))[:self.per_page + 1]
@@ -0,0 +1,127 @@
+"""Moving buckets of job applications and saved jobs between databases; see jobs.shards.
+
+A bucket moves while the site runs. It is locked first, so writes to its
+jobs wait, and marked as a stray on the target, so reads skip the rows
+copied there so far. Once copied, the bucket is flipped to the target and
+marked as a stray on the source, whose copies are then deleted. Every
+process rereads the bucket map at least every ``SHARD_MAP_CHECK_INTERVAL``
+seconds, so each step waits ``settle`` seconds, longer than that and than
+the writes in flight, before the next one relies on it.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+
+from . import shards
+from .models import Job, JobApplication, SavedJob, ShardBucket
+
+# Jobs whose rows are copied per transaction.
+BATCH_SIZE = 200
+
+
+def default_settle():
+    return settings.SHARD_MAP_CHECK_INTERVAL + 1
+
+
+def plan(drain=()):
+    """The moves that spread the buckets evenly over the shards: ``[(bucket, source, target)]``.
+
+    Buckets stay where they are when they can. Shards in ``drain`` are
+    emptied; with every shard drained, everything goes back to the primary.
+    """
+    buckets = shards.bucket_map(refresh=True)
+    targets = [alias for alias in settings.DATABASE_SHARDS if alias not in drain] or [DEFAULT_DB_ALIAS]
+    quota = math.ceil(shards.BUCKETS / len(targets))
+    load = dict.fromkeys(targets, 0)
+    moving = []
+    for bucket in range(shards.BUCKETS):
+        owner = buckets.owner(bucket)
+        if owner in load and load[owner] < quota:
+            load[owner] += 1
+        else:
+            moving.append((bucket, owner))
+    moves = []
+    for bucket, source in moving:
+        target = min(targets, key=load.__getitem__)
+        load[target] += 1
+        moves.append((bucket, source, target))
+    return moves
+
+
+def _set(bucket, **fields):
+    ShardBucket.objects.using(DEFAULT_DB_ALIAS).update_or_create(bucket=bucket, defaults=fields)
+    shards.bucket_map(refresh=True)
+
+
+def _job_ids(bucket, batch_size):
+    jobs = Job.objects.using(DEFAULT_DB_ALIAS).alias(shard_bucket=F('id') % shards.BUCKETS).filter(shard_bucket=bucket)
+    job_ids = list(jobs.order_by('id').values_list('id', flat=True))
+    return [job_ids[start:start + batch_size] for start in range(0, len(job_ids), batch_size)]
+
+
+def _copy_rows(model, source, target, job_ids):
+    """Copy the rows of ``job_ids`` as they are; ``bulk_create`` would reset their timestamps."""
+    connection = connections[target]
+    fields = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table), ', '.join(quote(field.column) for field in fields), ', '.join(['%s'] * len(fields))
+    )
+    rows = model.objects.using(source).filter(job_id__in=job_ids).values_list(*(field.attname for field in fields))
+    params = [[field.get_db_prep_save(value, connection) for field, value in zip(fields, row)] for row in rows]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+    return len(params)
+
+
+def _delete_rows(alias, chunks):
+    for job_ids in chunks:
+        with transaction.atomic(using=alias):
+            for model in (JobApplication, SavedJob):
+                model.objects.using(alias).filter(job_id__in=job_ids)._raw_delete(alias)
+
+
+def move_bucket(bucket, source, target, batch_size=BATCH_SIZE, settle=None):
+    """Move the rows of ``bucket`` from ``source`` to ``target``; returns the number of rows moved."""
+    settle = default_settle() if settle is None else settle
+    _set(bucket, alias=source, stray=target, locked=True)
+    time.sleep(settle)
+
+    chunks = _job_ids(bucket, batch_size)
+    moved = 0
+    for job_ids in chunks:
+        with transaction.atomic(using=target):
+            for model in (JobApplication, SavedJob):
+                # Left over from an interrupted move
+                model.objects.using(target).filter(job_id__in=job_ids)._raw_delete(target)
+                moved += _copy_rows(model, source, target, job_ids)
+
+    _set(bucket, alias=target, stray=source, locked=False)
+    time.sleep(settle)
+    _delete_rows(source, chunks)
+    _set(bucket, alias=target, stray='', locked=False)
+    return moved
+
+
+def finish_interrupted(batch_size=BATCH_SIZE):
+    """Delete the copies left by moves that were interrupted, and unlock their buckets."""
+    buckets = shards.bucket_map(refresh=True)
+    for alias, strays in buckets.strays.items():
+        for bucket in sorted(strays):
+            _delete_rows(alias, _job_ids(bucket, batch_size))
+            _set(bucket, alias=buckets.owner(bucket), stray='', locked=False)
+
+
+def rebalance(drain=(), batch_size=BATCH_SIZE, settle=None, on_move=None):
+    """Carry out ``plan(drain)``, calling ``on_move(bucket, source, target, rows)`` after each move."""
+    finish_interrupted(batch_size)
+    moves = plan(drain)
+    for bucket, source, target in moves:
+        moved = move_bucket(bucket, source, target, batch_size, settle)
+        if on_move is not None:
+            on_move(bucket, source, target, moved)
+    return moves
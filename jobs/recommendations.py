@@ -0,0 +1,302 @@
+import hashlib
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from accounts.models import JobSeekerProfile
+from .models import Job, JobRecommendation, JobSkill, RecommendationState, SeekerSkill
+
+# Years of experience each level expects, as an inclusive (low, high) range.
+EXPERIENCE_RANGES = {
+    'entry': (0, 2),
+    'mid': (2, 5),
+    'senior': (5, 10),
+    'executive': (10, 50),
+}
+
+SKILL_WEIGHT = 0.6
+EXPERIENCE_WEIGHT = 0.25
+LOCATION_WEIGHT = 0.15
+
+DEFAULT_TOP_N = 50
+DEFAULT_SEEKER_BATCH_SIZE = 64
+DEFAULT_JOB_CHUNK_SIZE = 20000
+
+
+def _normalize_location(value):
+    return ' '.join((value or '').lower().split())
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LocationCodes(dict):
+    """Maps normalized location strings to small integers shared by jobs and seekers."""
+
+    def code(self, value):
+        value = _normalize_location(value)
+        if not value:
+            return -1
+        return self.setdefault(value, len(self))
+
+
+class JobMatrix:
+    """Column-oriented snapshot of active jobs, ready for batch scoring."""
+
+    def __init__(self, locations, job_ids=None):
+        jobs = Job.objects.filter(is_active=True)
+        if job_ids is not None:
+            jobs = jobs.filter(id__in=job_ids)
+        rows = list(
+            jobs.order_by('id')
+            .values_list('id', 'experience_level', 'location', 'remote_work')
+            .iterator(chunk_size=5000)
+        )
+
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        ranges = np.array(
+            [EXPERIENCE_RANGES.get(row[1], (0, 50)) for row in rows], dtype=np.float32
+        ).reshape(-1, 2)
+        self.exp_low = ranges[:, 0]
+        self.exp_high = ranges[:, 1]
+        self.location = np.array([locations.code(row[2]) for row in rows], dtype=np.int32)
+        self.remote = np.array([row[3] for row in rows], dtype=bool)
+
+        pairs = np.array(
+            list(
+                JobSkill.objects.filter(job_id__in=jobs.values('id'))
+                .values_list('job_id', 'skill_id')
+                .iterator(chunk_size=20000)
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        job_index = np.searchsorted(self.ids, pairs[:, 0])
+        order = np.argsort(job_index, kind='stable')
+        self.pair_job = job_index[order]
+        self.pair_skill = pairs[order, 1]
+        self.skill_count = np.bincount(self.pair_job, minlength=len(self.ids)).astype(np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SeekerBatch:
+    def __init__(self, seeker_ids, seekers):
+        self.ids = np.array(seeker_ids, dtype=np.int64)
+        self.years = np.array([seekers[i]['years'] for i in seeker_ids], dtype=np.float32)
+        self.location = np.array([seekers[i]['location'] for i in seeker_ids], dtype=np.int32)
+
+        self.skills = np.unique(np.array(
+            [skill for i in seeker_ids for skill in seekers[i]['skills']], dtype=np.int64
+        ))
+        self.skill_matrix = np.zeros((len(seeker_ids), len(self.skills)), dtype=np.float32)
+        for row, seeker_id in enumerate(seeker_ids):
+            columns = np.searchsorted(self.skills, seekers[seeker_id]['skills'])
+            self.skill_matrix[row, columns] = 1.0
+
+
+def score_batch(batch, matrix, top_n, job_chunk_size=DEFAULT_JOB_CHUNK_SIZE):
+    """Return the ``top_n`` (job index, score) pairs of every seeker in ``batch``."""
+    size = len(batch.ids)
+    best_scores = np.full((size, top_n), -np.inf, dtype=np.float32)
+    best_jobs = np.full((size, top_n), -1, dtype=np.int64)
+    if not len(matrix) or not len(batch.skills):
+        return best_jobs, best_scores
+
+    years = batch.years[:, None]
+    for start in range(0, len(matrix), job_chunk_size):
+        end = min(start + job_chunk_size, len(matrix))
+
+        # Skill overlap as a dense 0/1 product restricted to this batch's
+        # skill columns: (seekers x skills) @ (skills x jobs).
+        lo, hi = np.searchsorted(matrix.pair_job, [start, end])
+        pair_job = matrix.pair_job[lo:hi]
+        pair_skill = matrix.pair_skill[lo:hi]
+        keep = np.isin(pair_skill, batch.skills)
+        job_skills = np.zeros((end - start, len(batch.skills)), dtype=np.float32)
+        job_skills[pair_job[keep] - start, np.searchsorted(batch.skills, pair_skill[keep])] = 1.0
+        overlap = batch.skill_matrix @ job_skills.T
+        skill_score = overlap / np.maximum(matrix.skill_count[start:end], 1.0)
+
+        low = matrix.exp_low[start:end]
+        high = matrix.exp_high[start:end]
+        experience_score = np.where(
+            years < low,
+            np.clip(1.0 - (low - years) / 3.0, 0.0, 1.0),
+            np.where(years > high, np.clip(1.0 - (years - high) / 10.0, 0.5, 1.0), 1.0),
+        )
+
+        location_score = (
+            (batch.location[:, None] == matrix.location[start:end])
+            & (batch.location[:, None] >= 0)
+        ) | matrix.remote[start:end]
+
+        scores = (
+            SKILL_WEIGHT * skill_score
+            + EXPERIENCE_WEIGHT * experience_score
+            + LOCATION_WEIGHT * location_score
+        ).astype(np.float32)
+        scores[overlap == 0] = -np.inf
+
+        candidates = np.concatenate([best_scores, scores], axis=1)
+        candidate_jobs = np.concatenate(
+            [best_jobs, np.broadcast_to(np.arange(start, end), (size, end - start))], axis=1
+        )
+        top = np.argpartition(-candidates, top_n - 1, axis=1)[:, :top_n]
+        best_scores = np.take_along_axis(candidates, top, axis=1)
+        best_jobs = np.take_along_axis(candidate_jobs, top, axis=1)
+
+    return best_jobs, best_scores
+
+
+def load_seekers(locations):
+    seekers = {}
+    for seeker_id, years, location in JobSeekerProfile.objects.values_list(
+        'id', 'experience_years', 'user_profile__location'
+    ).iterator(chunk_size=5000):
+        seekers[seeker_id] = {
+            'years': max(years or 0, 0),
+            'location': locations.code(location),
+            'raw_location': _normalize_location(location),
+            'skills': [],
+        }
+    for seeker_id, skill_id in SeekerSkill.objects.values_list(
+        'job_seeker_id', 'skill_id'
+    ).iterator(chunk_size=20000):
+        if seeker_id in seekers:
+            seekers[seeker_id]['skills'].append(skill_id)
+    for seeker in seekers.values():
+        seeker['skills'].sort()
+        seeker['fingerprint'] = hashlib.sha1(
+            f"{seeker['years']}|{seeker['raw_location']}|{seeker['skills']}".encode()
+        ).hexdigest()
+    return seekers
+
+
+def _rows(batch, matrix, best_jobs, best_scores):
+    for row, seeker_id in enumerate(batch.ids.tolist()):
+        for job_index, score in zip(best_jobs[row].tolist(), best_scores[row].tolist()):
+            if job_index >= 0 and score > 0:
+                yield JobRecommendation(
+                    job_seeker_id=seeker_id, job_id=int(matrix.ids[job_index]), score=score
+                )
+
+
+def _prune(seeker_ids, top_n):
+    """Cut the feeds of ``seeker_ids`` back to their ``top_n`` best jobs."""
+    ranked = JobRecommendation.objects.filter(job_seeker_id__in=seeker_ids).annotate(
+        rank=Window(RowNumber(), partition_by=F('job_seeker_id'), order_by=[F('score').desc(), F('job_id')])
+    )
+    extra = list(ranked.filter(rank__gt=top_n).values_list('id', flat=True))
+    for ids in _chunks(extra, 500):
+        JobRecommendation.objects.filter(id__in=ids).delete()
+
+
+def _full_feeds(seeker_ids, top_n):
+    """The ``seeker_ids`` holding ``top_n`` recommendations, some of which may have been pruned."""
+    return set(
+        JobRecommendation.objects.filter(job_seeker_id__in=seeker_ids)
+        .values('job_seeker_id').annotate(size=Count('id')).filter(size__gte=top_n)
+        .values_list('job_seeker_id', flat=True)
+    )
+
+
+def refresh_recommendations(full=False, job_ids=None, top_n=DEFAULT_TOP_N,
+                            seeker_batch_size=DEFAULT_SEEKER_BATCH_SIZE,
+                            job_chunk_size=DEFAULT_JOB_CHUNK_SIZE):
+    """Precompute recommendations, rescoring only what changed unless ``full``.
+
+    Seekers whose skills, experience or location changed since their last run
+    are rescored against every active job. Everyone else only has the jobs
+    created or updated since then rescored and merged into their feed, which
+    is then cut back to its ``top_n`` best jobs. A full feed that loses jobs
+    this way, say because its best job closed, is rescored too, since the
+    jobs pruned from it before are not in the feed to take their place.
+
+    With ``job_ids`` only those jobs are merged, and seekers whose profile
+    changed are left to the next run without them, as are the other changed
+    jobs. Returns a ``(rescored_seekers, updated_seekers, changed_jobs)``
+    tuple.
+    """
+    started = timezone.now()
+    locations = LocationCodes()
+    seekers = load_seekers(locations)
+    states = {
+        seeker_id: (fingerprint, computed_at)
+        for seeker_id, fingerprint, computed_at in RecommendationState.objects.values_list(
+            'job_seeker_id', 'fingerprint', 'computed_at'
+        )
+    }
+
+    stale, fresh = [], []
+    for seeker_id, seeker in seekers.items():
+        state = states.get(seeker_id)
+        if full or state is None or state[0] != seeker['fingerprint']:
+            stale.append(seeker_id)
+        else:
+            fresh.append(seeker_id)
+    if job_ids is not None and not full:
+        stale = []
+
+    changed_jobs = []
+    shrunk = set()
+    if fresh:
+        if job_ids is not None:
+            changed_jobs = list(job_ids)
+        else:
+            since = min(states[seeker_id][1] for seeker_id in fresh)
+            changed_jobs = list(Job.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+
+        if changed_jobs:
+            matrix = JobMatrix(locations, job_ids=changed_jobs)
+            for seeker_ids in _chunks(fresh, seeker_batch_size):
+                batch = SeekerBatch(seeker_ids, seekers)
+                best_jobs, best_scores = score_batch(batch, matrix, top_n, job_chunk_size)
+                with transaction.atomic():
+                    full_feeds = _full_feeds(seeker_ids, top_n)
+                    for job_ids in _chunks(changed_jobs, 500):
+                        JobRecommendation.objects.filter(job_seeker_id__in=seeker_ids, job_id__in=job_ids).delete()
+                    JobRecommendation.objects.bulk_create(
+                        _rows(batch, matrix, best_jobs, best_scores),
+                        batch_size=1000,
+                        update_conflicts=True,
+                        unique_fields=['job_seeker', 'job'],
+                        update_fields=['score', 'computed_at'],
+                    )
+                    _prune(seeker_ids, top_n)
+                    shrunk |= full_feeds - _full_feeds(seeker_ids, top_n)
+        # Only a run over every changed job brings the feeds up to date
+        if job_ids is None:
+            RecommendationState.objects.filter(job_seeker_id__in=fresh).update(computed_at=started)
+        stale += [seeker_id for seeker_id in fresh if seeker_id in shrunk]
+
+    if stale:
+        matrix = JobMatrix(locations)
+        for seeker_ids in _chunks(stale, seeker_batch_size):
+            batch = SeekerBatch(seeker_ids, seekers)
+            best_jobs, best_scores = score_batch(batch, matrix, top_n, job_chunk_size)
+            with transaction.atomic():
+                JobRecommendation.objects.filter(job_seeker_id__in=seeker_ids).delete()
+                JobRecommendation.objects.bulk_create(
+                    _rows(batch, matrix, best_jobs, best_scores), batch_size=1000
+                )
+                RecommendationState.objects.bulk_create(
+                    [
+                        RecommendationState(
+                            job_seeker_id=seeker_id,
+                            fingerprint=seekers[seeker_id]['fingerprint'],
+                            computed_at=started,
+                        )
+                        for seeker_id in seeker_ids
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['job_seeker'],
+                    update_fields=['fingerprint', 'computed_at'],
+                )
+
+    return len(stale), len(fresh) - len(shrunk), len(changed_jobs)
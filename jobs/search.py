@@ -0,0 +1,122 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'jobs_job_fts'
+
+# Columns of the full-text index, in the order they are declared in the
+# virtual table. ``company_name`` is flattened in from EmployerProfile so a
+# search never has to join to the accounts tables.
+FTS_COLUMNS = ('title', 'description', 'company_name', 'skills_required')
+
+# Relative weights passed to bm25(), one per column above.
+FTS_WEIGHTS = (10.0, 1.0, 5.0, 3.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled(using=None):
+    conn = connection if using is None else using
+    return conn.vendor == 'sqlite'
+
+
+def build_match_expression(query):
+    # Quote every token so user input can never be parsed as FTS5 syntax,
+    # and make the last one a prefix match so partial words still hit.
+    tokens = _TOKEN_RE.findall(query or '')
+    if not tokens:
+        return ''
+    terms = ['"%s"' % token for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_jobs(queryset, query):
+    """Filter ``queryset`` by ``query`` and order the matches by BM25 rank."""
+    if not fts_enabled():
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(company__company_name__icontains=query) |
+            Q(skills_required__icontains=query)
+        )
+
+    match = build_match_expression(query)
+    if not match:
+        return queryset
+
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    table = queryset.model._meta.db_table
+    rank = RawSQL(
+        f'SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "{table}"."id"',
+        (match,),
+        output_field=FloatField(),
+    )
+    matching_ids = RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,),
+    )
+    return (
+        queryset.filter(id__in=matching_ids)
+        .annotate(search_rank=rank)
+        .order_by('search_rank', '-created_at', '-id')
+    )
+
+
+def index_job(job):
+    if not fts_enabled():
+        return
+    company_name = job.company.company_name if job.company_id else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [job.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            [job.pk, job.title, job.description, company_name, job.skills_required],
+        )
+
+
+def index_new_jobs(*jobs):
+    """Index jobs created with ``bulk_create``, which sends no post_save signals."""
+    if not fts_enabled() or not jobs:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            [
+                (job.pk, job.title, job.description, job.company.company_name, job.skills_required)
+                for job in jobs
+            ],
+        )
+
+
+def unindex_job(job_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [job_id])
+
+
+def reindex_company(employer_profile):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {FTS_TABLE} SET company_name = %s '
+            f'WHERE rowid IN (SELECT id FROM jobs_job WHERE company_id = %s)',
+            [employer_profile.company_name, employer_profile.pk],
+        )
+
+
+def rebuild_index(cursor):
+    cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    cursor.execute(
+        f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) '
+        f'SELECT j.id, j.title, j.description, e.company_name, j.skills_required '
+        f'FROM jobs_job j INNER JOIN accounts_employerprofile e ON e.id = j.company_id'
+    )
+    cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
@@ -0,0 +1,286 @@
+"""Horizontal sharding of job applications and saved jobs.
+
+With ``settings.DATABASE_SHARDS`` configured, ``JobApplication`` and
+``SavedJob`` rows are spread over several SQLite files, grouped by job: a
+job's id picks one of ``BUCKETS`` buckets, and the ``ShardBucket`` table on
+the primary says which database holds each bucket. Buckets without a row
+are on the primary, which is where everything is with no shards configured,
+and ``manage.py rebalance_shards`` moves buckets between databases.
+
+Queries about one job go to its database through ``for_job`` and
+``using_job``, or through ``ShardRouter`` when they start from a job or an
+application. Queries about a job seeker, who applied for jobs on every
+shard, are ``split`` into one query per database and run in parallel with
+``fan_out``. Rows on different databases can't be joined, so jobs and
+profiles are loaded separately with ``load_related``, and ``next_id`` gives
+rows ids that are unique across the shards and survive a move.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, close_old_connections, transaction
+from django.db.models import F, Max, prefetch_related_objects
+
+BUCKETS = 256
+
+# Ids reserved on the primary at a time by each process.
+ID_BLOCK_SIZE = 1000
+
+SHARDED_MODELS = {'jobs.jobapplication', 'jobs.savedjob'}
+
+_lock = threading.Lock()
+
+# (monotonic time of the check, BucketMap)
+_bucket_map = None
+
+# The current process's block of ids: [next, last]
+_id_block = [1, 0]
+
+_executor = None
+
+
+class ShardLocked(Exception):
+    """A bucket stayed locked by ``rebalance_shards`` for longer than ``SHARD_LOCK_TIMEOUT``."""
+
+
+class BucketMap:
+    def __init__(self, rows=()):
+        self.owners = {}
+        self.strays = defaultdict(set)
+        self.locked = set()
+        for bucket, alias, stray, locked in rows:
+            self.owners[bucket] = alias
+            if stray:
+                self.strays[stray].add(bucket)
+            if locked:
+                self.locked.add(bucket)
+
+    def owner(self, bucket):
+        return self.owners.get(bucket, DEFAULT_DB_ALIAS)
+
+    def aliases(self):
+        """The databases that own buckets: the primary first, then the shards in settings order."""
+        owning = set(self.owners.values())
+        if len(self.owners) < BUCKETS:
+            owning.add(DEFAULT_DB_ALIAS)
+        return [alias for alias in (DEFAULT_DB_ALIAS, *settings.DATABASE_SHARDS) if alias in owning]
+
+
+def bucket_map(refresh=False):
+    """The bucket assignments, reread at most every ``SHARD_MAP_CHECK_INTERVAL`` seconds."""
+    global _bucket_map
+    if not settings.DATABASE_SHARDS:
+        return BucketMap()
+    now = time.monotonic()
+    if refresh or _bucket_map is None or now - _bucket_map[0] >= settings.SHARD_MAP_CHECK_INTERVAL:
+        from .models import ShardBucket  # The models import this module
+
+        rows = ShardBucket.objects.using(DEFAULT_DB_ALIAS).values_list('bucket', 'alias', 'stray', 'locked')
+        _bucket_map = (now, BucketMap(rows))
+    return _bucket_map[1]
+
+
+def bucket_for(job_id):
+    return job_id % BUCKETS
+
+
+def aliases():
+    return bucket_map().aliases()
+
+
+def for_job(job_id, for_write=False):
+    """The database holding the applications and saved jobs of ``job_id``.
+
+    Writers wait while ``rebalance_shards`` copies the job's bucket.
+    """
+    bucket = bucket_for(job_id)
+    buckets = bucket_map()
+    if for_write and bucket in buckets.locked:
+        deadline = time.monotonic() + settings.SHARD_LOCK_TIMEOUT
+        while bucket in buckets.locked:
+            if time.monotonic() > deadline:
+                raise ShardLocked(f'Bucket {bucket} is still being moved')
+            time.sleep(settings.SHARD_MAP_CHECK_INTERVAL or 0.05)
+            buckets = bucket_map(refresh=True)
+    return buckets.owner(bucket)
+
+
+def _on(queryset, alias):
+    # The primary is left to the routers, which may pick a read replica
+    if alias == DEFAULT_DB_ALIAS:
+        return queryset
+    queryset = queryset.using(alias)
+    return queryset.select_related(None) if queryset.query.select_related else queryset
+
+
+def using_job(queryset, job_id, for_write=False):
+    """``queryset`` of a sharded model, run on the database holding ``job_id``'s rows."""
+    return _on(queryset, for_job(job_id, for_write))
+
+
+def split(queryset):
+    """``queryset`` once per database holding rows of its model.
+
+    ``select_related`` is dropped on the shards, whose rows have no jobs or
+    profiles to join; see ``load_related``.
+    """
+    buckets = bucket_map()
+    querysets = []
+    for alias in buckets.aliases():
+        part = _on(queryset, alias)
+        if buckets.strays[alias]:
+            part = part.alias(shard_bucket=F('job_id') % BUCKETS).exclude(shard_bucket__in=sorted(buckets.strays[alias]))
+        querysets.append(part)
+    return querysets
+
+
+def by_job(queryset, job_ids):
+    """``queryset`` restricted to ``job_ids``, once per database holding some of them."""
+    groups = defaultdict(list)
+    for job_id in job_ids:
+        groups[for_job(job_id)].append(job_id)
+    return [_on(queryset, alias).filter(job_id__in=ids) for alias, ids in groups.items()]
+
+
+def _in_pool(context, func, item):
+    # Pool threads live long; treat each call like a request
+    close_old_connections()
+    try:
+        return context.run(func, item)
+    finally:
+        close_old_connections()
+
+
+def fan_out(func, items):
+    """``[func(item) for item in items]``, run in parallel when there are several items.
+
+    Each call runs in a pool thread with its own connections, so it doesn't
+    see the caller's uncommitted writes.
+    """
+    global _executor
+    items = list(items)
+    if len(items) < 2:
+        return [func(item) for item in items]
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.SHARD_FAN_OUT_WORKERS, thread_name_prefix='shards')
+    futures = [_executor.submit(_in_pool, contextvars.copy_context(), func, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def fetch(queryset):
+    """All rows of ``queryset`` from every database, in no particular order."""
+    return [row for rows in fan_out(list, split(queryset)) for row in rows]
+
+
+def load_related(objects, *lookups):
+    """Prefetch ``lookups`` for the objects whose first hop wasn't loaded by ``select_related``."""
+    objects = list(objects)
+    if not objects:
+        return
+    missing = []
+    for lookup in lookups:
+        # A lookup or a Prefetch
+        path = getattr(lookup, 'prefetch_through', lookup)
+        field = objects[0]._meta.get_field(path.split('__')[0])
+        missing.append((lookup, [obj for obj in objects if not field.is_cached(obj)]))
+    for lookup, objs in missing:
+        if objs:
+            prefetch_related_objects(objs, lookup)
+
+
+def bulk_create(model, objs, **kwargs):
+    """``bulk_create`` that puts each object on its job's database."""
+    groups = defaultdict(list)
+    for obj in objs:
+        groups[for_job(obj.job_id, for_write=True)].append(obj)
+    created = []
+    for alias, group in groups.items():
+        created += model.objects.using(alias).bulk_create(group, **kwargs)
+    return created
+
+
+def _highest_id():
+    from .models import JobApplication, SavedJob
+
+    highest = 0
+    for alias in (DEFAULT_DB_ALIAS, *settings.DATABASE_SHARDS):
+        for model in (JobApplication, SavedJob):
+            highest = max(highest, model.objects.using(alias).aggregate(highest=Max('id'))['highest'] or 0)
+    return highest
+
+
+def _reserve_ids(size):
+    from .models import ShardSequence
+
+    sequence = ShardSequence.objects.using(DEFAULT_DB_ALIAS).filter(pk=1)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if not sequence.update(next_id=F('next_id') + size):
+            try:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    ShardSequence.objects.using(DEFAULT_DB_ALIAS).create(pk=1, next_id=_highest_id() + 1 + size)
+            except IntegrityError:
+                sequence.update(next_id=F('next_id') + size)
+        end = sequence.values_list('next_id', flat=True).get()
+    return end - size, end - 1
+
+
+def next_id():
+    """A primary key for a new sharded row, or ``None`` to let the database pick one.
+
+    With shards the ids come from blocks reserved on the primary, so they
+    are unique across all databases.
+    """
+    if not settings.DATABASE_SHARDS:
+        return None
+    with _lock:
+        if _id_block[0] > _id_block[1]:
+            _id_block[:] = _reserve_ids(ID_BLOCK_SIZE)
+        _id_block[0] += 1
+        return _id_block[0] - 1
+
+
+class ShardRouter:
+    """Send the rows of a job's applications and saved jobs to the job's database.
+
+    Only queries that start from a job or a sharded row carry the job; the
+    rest of the code picks the database with ``using_job`` or ``split``.
+    Everything else, and sharded rows on the primary, is left to the next
+    router.
+    """
+
+    def _db_for(self, model, hints, for_write):
+        instance = hints.get('instance')
+        if model._meta.label_lower not in SHARDED_MODELS or instance is None:
+            return None
+        if instance._meta.label_lower in SHARDED_MODELS:
+            job_id = instance.job_id
+        elif instance._meta.label_lower == 'jobs.job':
+            job_id = instance.pk
+        else:
+            return None
+        if job_id is None:
+            return None
+        alias = for_job(job_id, for_write)
+        return None if alias == DEFAULT_DB_ALIAS else alias
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints, for_write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints, for_write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A sharded row points at the primary's jobs and profiles
+        if {obj1._state.db, obj2._state.db} & set(settings.DATABASE_SHARDS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_SHARDS:
+            return f'{app_label}.{model_name}' in SHARDED_MODELS
+        return None
@@ -0,0 +1,120 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import EmployerProfile, JobSeekerProfile
+from . import counters, facets, search, shards, tasks
+from .models import Job, JobApplication, JobCategory, SavedJob
+
+# Columns whose previous value the receivers below need to compute deltas.
+TRACKED_JOB_FIELDS = ('is_active', 'company_id', 'category_id', 'job_type', 'experience_level', 'remote_work')
+
+
+def job_state(job):
+    return {field: getattr(job, field) for field in TRACKED_JOB_FIELDS}
+
+
+@receiver(pre_save, sender=Job)
+def remember_previous_job_state(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_state = Job.objects.filter(pk=instance.pk).values(*TRACKED_JOB_FIELDS).first()
+
+
+@receiver(post_save, sender=Job)
+def index_saved_job(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_job(instance)
+
+
+@receiver(post_save, sender=Job)
+def count_saved_job(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    facets.job_changed(getattr(instance, '_previous_state', None), instance)
+    facets.invalidate()
+
+
+@receiver(post_save, sender=Job)
+def queue_job_followups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tasks.queue_recommendation_refresh([(instance.pk, instance.updated_at)])
+
+
+@receiver(post_delete, sender=Job)
+def unindex_deleted_job(sender, instance, **kwargs):
+    search.unindex_job(instance.pk)
+
+
+@receiver(post_delete, sender=Job)
+def count_deleted_job(sender, instance, **kwargs):
+    facets.job_changed(job_state(instance), None)
+    facets.invalidate()
+
+
+@receiver(post_delete, sender=Job)
+def delete_sharded_rows_of_job(sender, instance, **kwargs):
+    # Deleting the job cascaded on the primary only; its counters are gone
+    # with it, so the rows on a shard need no signals
+    alias = shards.for_job(instance.pk, for_write=True)
+    if alias != DEFAULT_DB_ALIAS:
+        for model in (JobApplication, SavedJob):
+            model.objects.using(alias).filter(job_id=instance.pk)._raw_delete(alias)
+
+
+@receiver(pre_delete, sender=JobCategory)
+def uncategorize_facet_counts(sender, instance, **kwargs):
+    facets.merge_category_into_uncategorized(instance.pk)
+    facets.invalidate()
+
+
+@receiver(post_save, sender=EmployerProfile)
+def reindex_company_jobs(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    search.reindex_company(instance)
+
+
+@receiver(pre_save, sender=JobApplication)
+def remember_previous_application_status(sender, instance, raw=False, using=None, **kwargs):
+    instance._previous_status = None
+    if raw or instance.pk is None:
+        return
+    previous = JobApplication.objects.using(using).filter(pk=instance.pk)
+    instance._previous_status = previous.values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=JobApplication)
+def count_saved_application(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    counters.application_changed(getattr(instance, '_previous_status', None), instance)
+
+
+@receiver(post_save, sender=JobApplication)
+def queue_application_notifications(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        tasks.notify_employers_of_applications.enqueue(
+            {'application_id': instance.pk}, key=f'application-received:{instance.pk}'
+        )
+    elif getattr(instance, '_previous_status', None) not in (None, instance.status):
+        tasks.queue_status_notifications([(instance.pk, instance.status, instance.updated_at)])
+
+
+@receiver(post_delete, sender=JobApplication)
+def count_deleted_application(sender, instance, **kwargs):
+    counters.application_deleted(instance.job_id, instance.status)
+
+
+@receiver(post_delete, sender=JobSeekerProfile)
+def delete_sharded_rows_of_job_seeker(sender, instance, **kwargs):
+    # Deleting the profile cascaded on the primary only
+    for alias in shards.aliases():
+        if alias != DEFAULT_DB_ALIAS:
+            JobApplication.objects.using(alias).filter(applicant_id=instance.pk).delete()
+            SavedJob.objects.using(alias).filter(job_seeker_id=instance.pk).delete()
@@ -0,0 +1,73 @@
+import re
+
+from django.db.models import Count
+
+from .models import JobSkill, SeekerSkill, Skill
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_skill(name):
+    return _WHITESPACE_RE.sub(' ', name).strip().lower()
+
+
+def parse_skills(text):
+    """Split a comma-separated skills string into unique normalized names."""
+    skills = []
+    for part in (text or '').split(','):
+        name = normalize_skill(part)[:100]
+        if name and name not in skills:
+            skills.append(name)
+    return skills
+
+
+def get_skill_ids(names, create=False):
+    if not names:
+        return {}
+    if create:
+        Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True)
+    return dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def _sync_links(link_model, owner_field, owner_ids_to_text):
+    """Replace the skill links of every owner with those parsed from its text."""
+    wanted = {owner_id: parse_skills(text) for owner_id, text in owner_ids_to_text.items()}
+    skill_ids = get_skill_ids(sorted({name for names in wanted.values() for name in names}), create=True)
+
+    existing = {}
+    for owner_id, skill_id in link_model.objects.filter(
+        **{f'{owner_field}__in': wanted}
+    ).values_list(owner_field, 'skill_id'):
+        existing.setdefault(owner_id, set()).add(skill_id)
+
+    to_create = []
+    for owner_id, names in wanted.items():
+        wanted_ids = {skill_ids[name] for name in names}
+        current_ids = existing.get(owner_id, set())
+        stale = current_ids - wanted_ids
+        if stale:
+            link_model.objects.filter(**{owner_field: owner_id, 'skill_id__in': stale}).delete()
+        to_create.extend(
+            link_model(**{owner_field: owner_id, 'skill_id': skill_id})
+            for skill_id in wanted_ids - current_ids
+        )
+    link_model.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+
+
+def sync_job_skills(*jobs):
+    _sync_links(JobSkill, 'job_id', {job.pk: job.skills_required for job in jobs})
+
+
+def sync_seeker_skills(*profiles):
+    _sync_links(SeekerSkill, 'job_seeker_id', {profile.pk: profile.skills for profile in profiles})
+
+
+def filter_by_skills(queryset, names, match_all=False):
+    """Restrict a Job queryset to jobs linked to any (or all) of ``names``."""
+    names = parse_skills(','.join(names))
+    if not names:
+        return queryset
+    links = JobSkill.objects.filter(skill__name__in=names)
+    if match_all:
+        links = links.values('job_id').annotate(matched=Count('skill_id')).filter(matched=len(names))
+    return queryset.filter(id__in=links.values('job_id'))
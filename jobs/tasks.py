@@ -0,0 +1,83 @@
+from django.core.mail import EmailMessage, get_connection
+
+from main.background import task
+from . import shards
+from .models import JobApplication
+from .recommendations import refresh_recommendations
+
+
+def _send(messages):
+    if messages:
+        with get_connection() as connection:
+            connection.send_messages(messages)
+
+
+@task(batch=True)
+def notify_employers_of_applications(payloads):
+    related = ('job__company__user_profile__user', 'applicant__user_profile__user')
+    applications = shards.fetch(
+        JobApplication.objects.filter(pk__in=[payload['application_id'] for payload in payloads]).select_related(*related)
+    )
+    shards.load_related(applications, *related)
+    messages = []
+    for application in applications:
+        employer = application.job.company.user_profile.user
+        if not employer.email:
+            continue
+        applicant = application.applicant.user_profile.user
+        messages.append(EmailMessage(
+            f'New application for {application.job.title}',
+            f'{applicant.get_full_name() or applicant.username} applied for {application.job.title}.',
+            to=[employer.email],
+        ))
+    _send(messages)
+
+
+@task(batch=True)
+def notify_applicants_of_status(payloads):
+    statuses = {payload['application_id']: payload['status'] for payload in payloads}
+    related = ('job__company', 'applicant__user_profile__user')
+    applications = shards.fetch(JobApplication.objects.filter(pk__in=statuses).select_related(*related))
+    shards.load_related(applications, *related)
+    messages = []
+    for application in applications:
+        applicant = application.applicant.user_profile.user
+        # Moved on again since; the task queued for that change reports it
+        if application.status != statuses[application.pk] or not applicant.email:
+            continue
+        messages.append(EmailMessage(
+            f'Your application for {application.job.title}',
+            f'Your application for {application.job.title} at {application.job.company.company_name} '
+            f'is now: {application.get_status_display()}.',
+            to=[applicant.email],
+        ))
+    _send(messages)
+
+
+def queue_status_notifications(changes):
+    """Queue an email per ``(application id, new status, updated_at)``."""
+    notify_applicants_of_status.enqueue_many(
+        ({'application_id': pk, 'status': status}, f'application-status:{pk}:{status}:{updated_at.isoformat()}')
+        for pk, status, updated_at in changes
+    )
+
+
+@task(batch=True)
+def refresh_job_recommendations(payloads):
+    job_ids = {payload.get('job_id') for payload in payloads}
+    # Tasks queued without a job ask for an incremental run over every change
+    refresh_recommendations(job_ids=None if None in job_ids else sorted(job_ids))
+
+
+def queue_recommendation_refresh(changes):
+    """Queue a rescoring of each ``(job id, updated_at)`` for every seeker."""
+    refresh_job_recommendations.enqueue_many(
+        ({'job_id': pk}, f'recommendations:{pk}:{updated_at.isoformat()}') for pk, updated_at in changes
+    )
+
+
+@task
+def expire_past_deadline(chunk_size=None, pause=0):
+    from .expiry import CHUNK_SIZE, expire_jobs  # expiry queues tasks from this module
+
+    expire_jobs(chunk_size=chunk_size or CHUNK_SIZE, pause=pause)
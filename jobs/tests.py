@@ -1,3 +1,857 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from itertools import count
+from operator import attrgetter
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.forms.models import model_to_dict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.forms import JobSeekerProfileForm
+from jobs import counters, expiry, exports, facets, rebalance, search, shards
+from jobs.cards import attach_cards
+from jobs.forms import JobPostForm
+from jobs.models import Job, JobApplication, JobApplicationCount, JobFacetCount, JobRecommendation, JobSkill, SavedJob, SeekerSkill, ShardBucket
+from jobs.pagination import CursorPaginator, MergedCursorPaginator, encode_cursor
+from jobs.recommendations import refresh_recommendations
+from jobs.skills import filter_by_skills, sync_job_skills, sync_seeker_skills
+from main import background, stats
+from main.models import Task
+from main.testing import PASSWORD, QueryBudgetMixin, create_job_board
+
+
+class JobViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board()
+        cls.job = cls.jobs[0]
+        cls.unapplied_job = cls.jobs[-1]
+
+    def login(self, profile):
+        self.client.login(username=profile.user_profile.user.username, password=PASSWORD)
+
+    def assertLaterPagesWithinQueryBudget(self, url):
+        page = self.assertWithinQueryBudget(url).context['page_obj']
+        self.assertTrue(page.has_next)
+        self.assertWithinQueryBudget(f'{url}?cursor={page.next_cursor}')
+
+    def assertNotModifiedWithinQueryBudget(self, url):
+        etag = self.assertWithinQueryBudget(url)['ETag']
+        response = self.assertWithinQueryBudget(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_anonymous_pages(self):
+        self.assertWithinQueryBudget(reverse('jobs:job_list'))
+        self.assertWithinQueryBudget(reverse('jobs:job_list') + '?query=python&job_type=full_time&remote_work=on')
+        self.assertWithinQueryBudget(reverse('jobs:job_detail', args=[self.job.id]))
+        self.assertLaterPagesWithinQueryBudget(reverse('jobs:job_list'))
+        self.assertNotModifiedWithinQueryBudget(reverse('jobs:job_list'))
+        self.assertNotModifiedWithinQueryBudget(reverse('jobs:job_detail', args=[self.job.id]))
+
+    def test_job_seeker_pages(self):
+        self.login(self.seekers[0])
+        self.assertWithinQueryBudget(reverse('jobs:job_list'))
+        self.assertWithinQueryBudget(reverse('jobs:job_list') + '?skills=python,sql&skills_match=all')
+        self.assertWithinQueryBudget(reverse('jobs:job_detail', args=[self.job.id]))
+        self.assertWithinQueryBudget(reverse('jobs:apply_job', args=[self.unapplied_job.id]))
+        self.assertWithinQueryBudget(reverse('jobs:saved_jobs'))
+        self.assertWithinQueryBudget(reverse('jobs:my_applications'))
+        self.assertWithinQueryBudget(reverse('jobs:recommended_jobs'))
+        for name in ('jobs:job_list', 'jobs:saved_jobs', 'jobs:my_applications'):
+            self.assertLaterPagesWithinQueryBudget(reverse(name))
+        self.assertNotModifiedWithinQueryBudget(reverse('jobs:job_list'))
+        self.assertNotModifiedWithinQueryBudget(reverse('jobs:job_detail', args=[self.job.id]))
+
+    def test_employer_pages(self):
+        self.login(self.employers[0])
+        self.assertWithinQueryBudget(reverse('jobs:job_list'))
+        self.assertWithinQueryBudget(reverse('jobs:post_job'))
+        self.assertWithinQueryBudget(reverse('jobs:import_jobs'))
+        self.assertWithinQueryBudget(reverse('jobs:my_jobs'))
+        self.assertWithinQueryBudget(reverse('jobs:edit_job', args=[self.job.id]))
+        self.assertWithinQueryBudget(reverse('jobs:job_applications', args=[self.job.id]))
+        self.assertWithinQueryBudget(reverse('jobs:export_applications', args=[self.job.id]))
+        self.assertLaterPagesWithinQueryBudget(reverse('jobs:my_jobs'))
+
+    def test_job_applications_query_count_does_not_grow_with_applicants(self):
+        self.login(self.employers[0])
+        url = reverse('jobs:job_applications', args=[self.job.id])
+        response = self.assertWithinQueryBudget(url)
+        self.assertEqual(response.wsgi_request.query_stats.duplicates, {})
+        self.assertContains(response, 'Seeker 3')
+
+    def test_admin_lists_name_applicants_and_jobs(self):
+        User.objects.create_superuser('admin', 'admin@example.com', PASSWORD)
+        self.client.login(username='admin', password=PASSWORD)
+        for model, text in ((JobApplication, f'Seeker 0 applied for {self.job.title}'), (SavedJob, f'seeker0 saved {self.job.title}')):
+            response = self.client.get(reverse(f'admin:jobs_{model._meta.model_name}_changelist'))
+            self.assertContains(response, text)
+            self.assertEqual(response.wsgi_request.query_stats.duplicates, {})
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, _, _ = create_job_board(employers=2, jobs_per_employer=10, seekers=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_grouped_query(self):
+        jobs = Job.objects.filter(is_active=True, location='Nairobi')
+        with CaptureQueriesContext(connection) as queries:
+            counts = facets.get_facet_counts(jobs, {'location': 'Nairobi'}, {})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('GROUP BY', queries[0]['sql'])
+        for name in facets.FACET_FIELDS:
+            self.assertEqual(sum(counts[name].values()), jobs.count())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.get_facet_counts(jobs, {'location': 'Nairobi'}, {}), counts)
+
+    def test_counts_skip_their_own_facet(self):
+        rows = [
+            (1, 'full_time', 'entry', True, 3),
+            (1, 'part_time', 'mid', False, 2),
+            (2, 'full_time', 'mid', False, 4),
+        ]
+        self.assertEqual(facets.fold_rows(rows, {}), {
+            'category': {1: 5, 2: 4},
+            'job_type': {'full_time': 7, 'part_time': 2},
+            'experience_level': {'entry': 3, 'mid': 6},
+            'remote_work': {True: 3, False: 6},
+        })
+        # Unticking remote work doesn't filter
+        self.assertEqual(facets.fold_rows(rows, {'category': 1, 'job_type': 'full_time', 'remote_work': False}), {
+            'category': {1: 3, 2: 4},
+            'job_type': {'full_time': 3, 'part_time': 2},
+            'experience_level': {'entry': 3},
+            'remote_work': {True: 3},
+        })
+
+    def test_changed_jobs_invalidate_cached_counts(self):
+        active = Job.objects.filter(is_active=True)
+        counts = facets.get_facet_counts(active, {}, {})
+        self.assertEqual(counts['job_type'], dict(Counter(active.values_list('job_type', flat=True))))
+
+        job = make_job(self.employers[0], job_type='internship')
+        counts = facets.get_facet_counts(active, {}, {})
+        self.assertEqual(counts['job_type']['internship'], active.filter(job_type='internship').count())
+
+        job.is_active = False
+        job.save()
+        self.assertEqual(facets.get_facet_counts(active, {}, {})['job_type'], dict(Counter(active.values_list('job_type', flat=True))))
+
+        with self.assertNumQueries(0):
+            facets.get_facet_counts(active, {}, {})
+
+    def test_concurrent_uncategorized_deltas_share_a_row(self):
+        key = (None, 'freelance', 'executive', True)
+        lookup = dict(zip(facets.FACET_COLUMNS, key))
+        JobFacetCount.objects.filter(category__isnull=True).delete()
+        facet_filter = JobFacetCount.objects.filter
+        raced = []
+
+        def lose_the_race(*args, **kwargs):
+            # Another worker inserts the row after this one found none to update
+            if kwargs == lookup and not raced:
+                raced.append(JobFacetCount.objects.create(count=1, **lookup))
+                return JobFacetCount.objects.none()
+            return facet_filter(*args, **kwargs)
+
+        with mock.patch.object(JobFacetCount.objects, 'filter', side_effect=lose_the_race):
+            facets.apply_deltas({key: 2})
+        self.assertEqual(list(JobFacetCount.objects.filter(**lookup).values_list('count', flat=True)), [3])
+
+
+# Past the page cache, to the ETag check of the views themselves
+@override_settings(PAGE_CACHE_ENABLED=False, QUERY_BUDGETS={})
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(employers=1, jobs_per_employer=3, seekers=1, applications_per_seeker=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, etag=None):
+        return self.client.get(url) if etag is None else self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_job_list_answers_304_until_a_job_changes(self):
+        url = reverse('jobs:job_list')
+        etag = self.get(url)['ETag']
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.get(url + '?job_type=contract', etag).status_code, 200)
+
+        make_job(self.employers[0])
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_job_detail_etag_follows_the_viewer(self):
+        job = self.jobs[0]
+        url = reverse('jobs:job_detail', args=[job.id])
+        anonymous = self.get(url)['ETag']
+        self.client.login(username='seeker0', password=PASSWORD)
+        etag = self.get(url)['ETag']
+        self.assertNotEqual(etag, anonymous)
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        for action in ('jobs:apply_job', 'jobs:save_job'):
+            with self.subTest(action=action):
+                # Following the redirect shows the flash message, which is never skipped by a 304
+                self.client.post(reverse(action, args=[job.id]), {'cover_letter': 'Hello'}, follow=True)
+                response = self.get(url, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                etag = response['ETag']
+                self.assertEqual(self.get(url, etag).status_code, 304)
+
+
+class JobCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, _, jobs = create_job_board(employers=1, jobs_per_employer=2, seekers=0)
+        cls.job_id = jobs[0].pk
+
+    def setUp(self):
+        cache.clear()
+
+    def card(self):
+        job = Job.objects.select_related('company', 'category').get(pk=self.job_id)
+        return job, attach_cards([job])[0].card_html
+
+    def test_edits_invalidate_the_card(self):
+        job, card = self.card()
+        self.assertIn(job.description, card)
+        self.assertIn('Company 0', card)
+
+        # Unsaved, so the cached card is still current
+        job.description = 'Write compilers.'
+        self.assertNotIn('Write compilers.', attach_cards([job])[0].card_html)
+        job.save()
+        self.assertIn('Write compilers.', self.card()[1])
+
+        job.company.company_name = 'Renamed Company'
+        job.company.save()
+        self.assertIn('Renamed Company', self.card()[1])
+
+        job.category.name = 'Platform'
+        job.category.save()
+        self.assertIn('Platform', self.card()[1])
+
+
+class ApplicationCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(seekers=2, applications_per_seeker=3)
+        cls.job = cls.jobs[-1]
+
+    def counts(self, job=None):
+        row = JobApplicationCount.objects.filter(job=job or self.job).first()
+        return {column: getattr(row, column) for column in counters.COLUMNS} if row else None
+
+    def test_counts_follow_applications(self):
+        self.assertIsNone(self.counts())
+        application = JobApplication.objects.create(job=self.job, applicant=self.seekers[0])
+        JobApplication.objects.create(job=self.job, applicant=self.seekers[1])
+        self.assertEqual(self.counts()['total'], 2)
+        self.assertEqual(self.counts()['pending'], 2)
+
+        application.status = 'interview'
+        application.save()
+        self.assertEqual(self.counts()['pending'], 1)
+        self.assertEqual(self.counts()['interview'], 1)
+
+        application.delete()
+        self.assertEqual(self.counts(), {**dict.fromkeys(counters.COLUMNS, 0), 'total': 1, 'pending': 1})
+
+    def test_deleting_an_applicant_updates_the_counts(self):
+        self.assertEqual(self.counts(self.jobs[0])['total'], 2)
+        self.seekers[0].user_profile.user.delete()
+        self.assertEqual(self.counts(self.jobs[0])['total'], 1)
+
+    def test_deleting_a_job_removes_its_counts(self):
+        job_id = self.jobs[0].id
+        self.assertIsNotNone(self.counts(self.jobs[0]))
+        self.jobs[0].delete()
+        self.assertFalse(JobApplicationCount.objects.filter(job_id=job_id).exists())
+
+    def test_repair_fixes_drift(self):
+        JobApplicationCount.objects.filter(job=self.jobs[0]).update(total=40, pending=0)
+        JobApplicationCount.objects.filter(job=self.jobs[1]).delete()
+        drift = counters.repair()
+        self.assertEqual({job_id for job_id, _, _ in drift}, {self.jobs[0].id, self.jobs[1].id})
+        self.assertEqual(self.counts(self.jobs[0])['total'], 2)
+        self.assertEqual(self.counts(self.jobs[1])['pending'], 2)
+        self.assertEqual(counters.repair(), [])
+
+    def test_bulk_status_update(self):
+        job = self.jobs[0]
+        applications = list(job.applications.all())
+        other = JobApplication.objects.exclude(job=job).first()
+        url = reverse('jobs:update_application_status', args=[job.id])
+        data = {'status': 'rejected', 'application_ids': [a.pk for a in applications] + [other.pk]}
+
+        self.client.login(username=self.employers[1].user_profile.user.username, password=PASSWORD)
+        self.client.post(url, data)
+        self.assertFalse(JobApplication.objects.filter(status='rejected').exists())
+
+        self.client.login(username=job.company.user_profile.user.username, password=PASSWORD)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('jobs:job_applications', args=[job.id]), fetch_redirect_response=False)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "jobs_jobapplication"')]
+        self.assertEqual(len(updates), 1)
+
+        for application in applications:
+            previous = application.updated_at
+            application.refresh_from_db()
+            self.assertEqual(application.status, 'rejected')
+            self.assertGreater(application.updated_at, previous)
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'pending')
+        self.assertEqual(self.counts(job), {**dict.fromkeys(counters.COLUMNS, 0), 'total': 2, 'rejected': 2})
+        self.assertEqual(Task.objects.filter(name='jobs.tasks.notify_applicants_of_status').count(), 2)
+
+
+class JobExpiryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(jobs_per_employer=3, applications_per_seeker=0)
+
+    def test_expired_jobs_are_deactivated_in_chunks(self):
+        today = timezone.localdate()
+        expired = self.jobs[:5]
+        Job.objects.filter(pk__in=[job.pk for job in expired]).update(application_deadline=today - timedelta(days=1))
+        Job.objects.filter(pk=self.jobs[5].pk).update(application_deadline=today)
+        stats.get_statistics()
+
+        self.assertEqual(expiry.expire_jobs(chunk_size=2), 5)
+        self.assertEqual(
+            set(Job.objects.filter(is_active=False).values_list('pk', flat=True)), {job.pk for job in expired}
+        )
+        for job in expired:
+            previous = job.updated_at
+            job.refresh_from_db()
+            self.assertGreater(job.updated_at, previous)
+        # Each expired job is rescored, not everything changed since the last run
+        keys = set(Task.objects.filter(name='jobs.tasks.refresh_job_recommendations').values_list('idempotency_key', flat=True))
+        self.assertLessEqual({f'recommendations:{job.pk}:{job.updated_at.isoformat()}' for job in expired}, keys)
+
+        active = Job.objects.filter(is_active=True)
+        self.assertEqual(sorted(facets.precomputed_rows()), sorted(facets.grouped_rows(active)))
+        stored, computed = stats.reconcile()
+        self.assertEqual(
+            (stored.active_jobs, stored.active_companies, stored.categories),
+            (computed.active_jobs, computed.active_companies, computed.categories),
+        )
+        self.assertEqual(expiry.expire_jobs(), 0)
+
+
+JOB_FIELDS = {
+    'title': 'Developer',
+    'description': 'Build and maintain our products.',
+    'requirements': 'None',
+    'job_type': 'full_time',
+    'experience_level': 'entry',
+    'location': 'Nairobi',
+}
+
+
+def make_job(company, **fields):
+    return Job.objects.create(company=company, **{**JOB_FIELDS, **fields})
+
+
+class JobSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, _, _ = create_job_board(employers=1, jobs_per_employer=0, seekers=0)
+        cls.company = cls.employers[0]
+
+    def search(self, query):
+        return list(search.search_jobs(Job.objects.all(), query))
+
+    def indexed_ids(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {search.FTS_TABLE}')
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_title_matches_rank_above_description_matches(self):
+        in_description = make_job(self.company, title='Developer', description='We use Kotlin every day.')
+        in_title = make_job(self.company, title='Kotlin Developer')
+        self.assertEqual(self.search('kotlin'), [in_title, in_description])
+
+        response = self.client.get(reverse('jobs:job_list'), {'query': 'kotlin'})
+        self.assertEqual(list(response.context['page_obj']), [in_title, in_description])
+
+    def test_index_follows_job_changes(self):
+        job = make_job(self.company, title='Elixir Engineer')
+        self.assertEqual(self.search('elixir'), [job])
+
+        job.title = 'Haskell Engineer'
+        job.save()
+        self.assertEqual(self.search('elixir'), [])
+        self.assertEqual(self.search('haskell'), [job])
+
+        self.company.company_name = 'Zebra Labs'
+        self.company.save()
+        self.assertEqual(self.search('zebra'), [job])
+
+        job_id = job.pk
+        job.delete()
+        self.assertEqual(self.search('haskell'), [])
+        self.assertNotIn(job_id, self.indexed_ids())
+
+    def test_fts_syntax_in_queries_is_searched_as_text(self):
+        job = make_job(self.company, title='C++ Developer')
+        for query in ('c++', '"unclosed', 'title:developer', 'NEAR(a b', 'a AND OR NOT', '*', '-(', "'; DROP"):
+            self.search(query)
+            response = self.client.get(reverse('jobs:job_list'), {'query': query})
+            self.assertEqual(response.status_code, 200, query)
+        self.assertEqual(self.search('c++ developer'), [job])
+
+
+class SkillTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, _ = create_job_board(employers=1, jobs_per_employer=0, seekers=1, applications_per_seeker=0)
+        cls.company = cls.employers[0]
+
+    def post_job(self, skills, instance=None):
+        # As the post_job and edit_job views do
+        data = {**model_to_dict(instance or Job(**JOB_FIELDS), fields=JobPostForm.Meta.fields), 'skills_required': skills}
+        form = JobPostForm({name: value for name, value in data.items() if value is not None}, instance=instance)
+        self.assertTrue(form.is_valid(), form.errors)
+        job = form.save(commit=False)
+        job.company = self.company
+        job.save()
+        form.save_m2m()
+        return job
+
+    def job_skills(self, job):
+        return set(JobSkill.objects.filter(job=job).values_list('skill__name', flat=True))
+
+    def test_skills_match_whole_names(self):
+        java = self.post_job('Java, Spring')
+        javascript = self.post_job('JavaScript,  React ')
+        jobs = Job.objects.filter(pk__in=[java.pk, javascript.pk])
+        self.assertEqual(list(filter_by_skills(jobs, ['java'])), [java])
+        self.assertEqual(list(filter_by_skills(jobs, [' JAVASCRIPT'])), [javascript])
+        self.assertEqual(set(filter_by_skills(jobs, ['java', 'react'])), {java, javascript})
+        self.assertEqual(list(filter_by_skills(jobs, ['java', 'react'], match_all=True)), [])
+
+    def test_skill_links_follow_the_text_fields(self):
+        job = self.post_job('Python, Django')
+        self.assertEqual(self.job_skills(job), {'python', 'django'})
+        self.post_job('python, SQL', instance=job)
+        self.assertEqual(self.job_skills(job), {'python', 'sql'})
+
+        seeker = self.seekers[0]
+        form = JobSeekerProfileForm({'skills': 'Go, Rust, go', 'experience_years': 2, 'education': ''}, instance=seeker)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(set(SeekerSkill.objects.filter(job_seeker=seeker).values_list('skill__name', flat=True)), {'go', 'rust'})
+
+
+class RecommendationTests(TestCase):
+    TOP_N = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, jobs = create_job_board(employers=2, jobs_per_employer=8, seekers=3, applications_per_seeker=0)
+        sync_job_skills(*jobs)
+        sync_seeker_skills(*cls.seekers)
+
+    def feeds(self):
+        feeds = {seeker.pk: [] for seeker in self.seekers}
+        for seeker_id, score in JobRecommendation.objects.order_by('-score').values_list('job_seeker_id', 'score'):
+            feeds[seeker_id].append(round(score, 5))
+        return feeds
+
+    def test_incremental_refresh_matches_a_full_one(self):
+        refresh_recommendations(full=True, top_n=self.TOP_N)
+        # Better matches than most of the feeds, for every seeker
+        new_jobs = [make_job(self.employers[0], remote_work=True, skills_required=skill) for skill in ('python', 'sql', 'javascript', 'react', 'aws')]
+        sync_job_skills(*new_jobs)
+
+        self.assertEqual(refresh_recommendations(top_n=self.TOP_N), (0, 3, 5))
+        incremental = self.feeds()
+        for feed in incremental.values():
+            self.assertEqual(len(feed), self.TOP_N)
+        self.assertEqual(refresh_recommendations(full=True, top_n=self.TOP_N), (3, 0, 0))
+        self.assertEqual(incremental, self.feeds())
+
+    def test_feeds_stay_within_top_n(self):
+        refresh_recommendations(full=True, top_n=self.TOP_N)
+        for _ in range(3):
+            sync_job_skills(*[make_job(self.employers[1], skills_required=skill) for skill in ('django', 'docker', 'excel')])
+            refresh_recommendations(top_n=self.TOP_N)
+            for feed in self.feeds().values():
+                self.assertLessEqual(len(feed), self.TOP_N)
+
+    def test_refresh_of_some_jobs(self):
+        refresh_recommendations(full=True, top_n=self.TOP_N)
+        new_jobs = [make_job(self.employers[0], remote_work=True, skills_required=skill) for skill in ('python', 'sql', 'javascript', 'react', 'aws')]
+        sync_job_skills(*new_jobs)
+
+        self.assertEqual(refresh_recommendations(job_ids=[new_jobs[0].pk], top_n=self.TOP_N), (0, 3, 1))
+        self.assertEqual(refresh_recommendations(job_ids=[job.pk for job in new_jobs[1:]], top_n=self.TOP_N), (0, 3, 4))
+        incremental = self.feeds()
+        # Runs for some jobs don't stop the next incremental run from seeing the rest
+        self.assertEqual(refresh_recommendations(top_n=self.TOP_N), (0, 3, 5))
+        self.assertEqual(refresh_recommendations(full=True, top_n=self.TOP_N), (3, 0, 0))
+        self.assertEqual(incremental, self.feeds())
+
+    def test_saved_job_is_rescored_alone(self):
+        background.run_pending()
+        job = make_job(self.employers[0])
+        with mock.patch('jobs.tasks.refresh_recommendations') as refresh:
+            self.assertEqual(background.run_pending(), (1, 0))
+        refresh.assert_called_once_with(job_ids=[job.pk])
+
+    def test_feeds_losing_jobs_are_refilled(self):
+        refresh_recommendations(full=True, top_n=self.TOP_N)
+        for feed in self.feeds().values():
+            self.assertEqual(len(feed), self.TOP_N)
+        best = JobRecommendation.objects.order_by('-score', 'job_id').first().job
+        best.is_active = False
+        best.save()
+
+        rescored, _, changed = refresh_recommendations(top_n=self.TOP_N)
+        self.assertGreater(rescored, 0)
+        self.assertEqual(changed, 1)
+        incremental = self.feeds()
+        self.assertFalse(JobRecommendation.objects.filter(job=best).exists())
+        refresh_recommendations(full=True, top_n=self.TOP_N)
+        self.assertEqual(incremental, self.feeds())
+
+
+class CursorPaginationTests(TestCase):
+    TAMPERED = ['garbage', encode_cursor([{'a': 1}, 3]), encode_cursor(['yesterday', 'x']), encode_cursor([None, None]), encode_cursor([1])]
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.seekers, _ = create_job_board(employers=1, jobs_per_employer=25, seekers=1, applications_per_seeker=25)
+        cls.jobs = list(Job.objects.order_by('-created_at', '-id'))
+
+    def walk(self, paginator):
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return pages
+
+    def test_forward_and_backward(self):
+        pages = self.walk(CursorPaginator(Job.objects.all(), 10))
+        self.assertEqual([list(page) for page in pages], [self.jobs[:10], self.jobs[10:20], self.jobs[20:]])
+        self.assertFalse(pages[0].has_previous)
+        self.assertIsNone(pages[-1].next_cursor)
+
+        paginator = CursorPaginator(Job.objects.all(), 10)
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual(list(previous), self.jobs[10:20])
+        self.assertTrue(previous.has_next)
+        first = paginator.get_page(previous.previous_cursor)
+        self.assertEqual(list(first), self.jobs[:10])
+        self.assertFalse(first.has_previous)
+
+    def test_merged_pages(self):
+        saved = SavedJob.objects.filter(job_seeker=self.seekers[0])
+        expected = list(saved.order_by('-saved_at', '-id'))
+        pages = self.walk(MergedCursorPaginator(shards.split(saved), 10, ('-saved_at', '-id')))
+        self.assertEqual([obj for page in pages for obj in page], expected)
+        self.assertEqual(len(pages[-1]), 5)
+
+    def test_tampered_cursors_start_over(self):
+        paginator = CursorPaginator(Job.objects.all(), 10)
+        for cursor in self.TAMPERED:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(list(page), self.jobs[:10])
+                self.assertFalse(page.has_previous)
+
+        self.client.login(username='seeker0', password=PASSWORD)
+        for url in (reverse('jobs:job_list'), reverse('jobs:saved_jobs')):
+            for cursor in self.TAMPERED:
+                with self.subTest(url=url, cursor=cursor):
+                    self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 200)
+
+
+class JobImportTests(TestCase):
+    HEADER = 'title,category,description,requirements,job_type,experience_level,location,remote_work,skills_required\r\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, _, _ = create_job_board(employers=1, jobs_per_employer=0, seekers=0)
+
+    def setUp(self):
+        self.client.login(username='employer0', password=PASSWORD)
+
+    def upload(self, content, name='jobs.csv'):
+        if isinstance(content, str):
+            content = content.encode()
+        return self.client.post(reverse('jobs:import_jobs'), {'file': SimpleUploadedFile(name, content)})
+
+    def test_valid_file(self):
+        response = self.upload(
+            self.HEADER
+            + 'Backend Developer,engineering,Build APIs.,Python,full_time,mid,Nairobi,yes,"Python, Django"\r\n'
+            + 'Designer,,Design things.,Figma,contract,entry,Mombasa,no,\r\n'
+        )
+        self.assertRedirects(response, reverse('jobs:my_jobs'), fetch_redirect_response=False)
+        backend = Job.objects.get(title='Backend Developer')
+        self.assertEqual((backend.company, backend.category.name, backend.remote_work), (self.employers[0], 'Engineering', True))
+        self.assertEqual(set(JobSkill.objects.filter(job=backend).values_list('skill__name', flat=True)), {'python', 'django'})
+        self.assertEqual(list(search.search_jobs(Job.objects.all(), 'backend')), [backend])
+        self.assertIsNone(Job.objects.get(title='Designer').category)
+        self.assertEqual(stats.get_statistics().active_jobs, 2)
+
+    def test_bad_rows_are_reported(self):
+        response = self.upload(
+            '{"title": "Backend Developer", "description": "Build APIs.", "requirements": "Python", "job_type": "full_time", "experience_level": "mid", "location": "Nairobi"}\n'
+            '{"title": "Designer", "category": "Art", "description": "Design things.", "requirements": "Figma", "job_type": "contract", "experience_level": "entry", "location": "Mombasa"}\n'
+            '{"title": "Tester"\n'
+            '["Designer"]\n',
+            name='jobs.jsonl',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['failed'], 3)
+        self.assertEqual([line for line, _ in response.context['row_errors']], [2, 3, 4])
+        self.assertContains(response, 'Unknown category &quot;Art&quot;.')
+        self.assertContains(response, 'Invalid JSON')
+        self.assertEqual(list(Job.objects.values_list('title', flat=True)), ['Backend Developer'])
+
+    def test_wrong_encoding(self):
+        response = self.upload((self.HEADER + 'Caf\xe9 Manager,,Run the caf\xe9.,None,full_time,mid,Nairobi,no,\r\n').encode('latin-1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['row_errors'], [(None, 'The file is not UTF-8 encoded.')])
+        self.assertFalse(Job.objects.exists())
+
+    def test_malformed_csv(self):
+        # A field over the csv module's size limit
+        response = self.upload(
+            self.HEADER
+            + 'Designer,,Design things.,Figma,contract,entry,Mombasa,no,\r\n'
+            + 'Writer,,"' + 'x' * 200000 + '",None,contract,entry,Mombasa,no,\r\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        [(line_number, message)] = response.context['row_errors']
+        self.assertEqual(line_number, 3)
+        self.assertTrue(message.startswith('Invalid CSV: field larger than field limit'), message)
+        self.assertEqual(list(Job.objects.values_list('title', flat=True)), ['Designer'])
+
+
+class ApplicationExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.seekers, jobs = create_job_board(employers=1, jobs_per_employer=2, seekers=3, applications_per_seeker=1)
+        cls.job = jobs[0]
+        user = cls.seekers[1].user_profile.user
+        user.first_name = '=HYPERLINK("http://example.com")'
+        user.save()
+
+    def setUp(self):
+        self.client.login(username='employer0', password=PASSWORD)
+
+    def export(self, fmt):
+        response = self.client.get(reverse('jobs:export_applications', args=[self.job.id]), {'format': fmt})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], exports.FORMATS[fmt])
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        header, *rows = csv.reader(io.StringIO(self.export('csv')))
+        self.assertEqual(header, [name for name, _ in exports.APPLICATION_COLUMNS])
+        applications = JobApplication.objects.filter(job=self.job).order_by('-applied_at')
+        self.assertEqual([row[0] for row in rows], [str(application.pk) for application in applications])
+        rows = {row[3]: dict(zip(header, row)) for row in rows}
+        self.assertEqual(set(rows), {'seeker0', 'seeker1', 'seeker2'})
+        self.assertEqual((rows['seeker0']['email'], rows['seeker0']['cover_letter'], rows['seeker0']['status']), ('seeker0@example.com', 'Hello', 'pending'))
+        # Not run as a formula by spreadsheet apps
+        self.assertEqual(rows['seeker1']['first_name'], '\'=HYPERLINK("http://example.com")')
+
+    def test_jsonl(self):
+        rows = [json.loads(line) for line in self.export('jsonl').splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(list(rows[0]), [name for name, _ in exports.APPLICATION_COLUMNS])
+        self.assertEqual({row['username']: row['first_name'] for row in rows}['seeker1'], '=HYPERLINK("http://example.com")')
+
+    def test_rows_are_streamed(self):
+        # Nothing is read until the response is sent
+        with self.assertNumQueries(0):
+            stream = exports.stream_applications(self.job, 'csv')
+        with self.assertNumQueries(1):
+            self.assertEqual(next(stream).count('\r\n'), 4)
+
+        # Chunks are taken from the rows as they come, so a chunk is ready
+        # before the last row is read
+        lines = exports.chunked(f'{i}\n' for i in count())
+        self.assertEqual(next(lines), ''.join(f'{i}\n' for i in range(exports.ROWS_PER_CHUNK)))
+
+
+SHARDS = ['shard_a', 'shard_b', 'shard_c']
+
+
+@override_settings(DATABASE_SHARDS=SHARDS, SHARD_MAP_CHECK_INTERVAL=0, PAGE_CACHE_ENABLED=False, QUERY_BUDGETS={})
+class ShardTests(TransactionTestCase):
+    """Applications and saved jobs spread over three shards, each a local SQLite file."""
+
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # Registered before the test case picks its databases, and for every
+        # thread, since jobs.shards queries the shards from a thread pool
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        for alias in SHARDS:
+            connections.settings[alias] = {
+                **connections['default'].settings_dict,
+                'NAME': os.path.join(directory.name, f'{alias}.sqlite3'),
+            }
+        super().setUpClass()
+        for alias in SHARDS:
+            call_command('migrate', database=alias, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+    def setUp(self):
+        self.employers, self.seekers, self.jobs = create_job_board(
+            employers=2, jobs_per_employer=8, seekers=2, applications_per_seeker=12
+        )
+        self.seeker = self.seekers[0]
+        rebalance.rebalance(settle=0)
+
+    def job_ids_on(self, alias, model=JobApplication):
+        return list(model.objects.using(alias).values_list('job_id', flat=True))
+
+    def test_rebalance_puts_each_jobs_rows_on_its_shard(self):
+        self.assertEqual(self.job_ids_on('default') + self.job_ids_on('default', SavedJob), [])
+        for alias in SHARDS:
+            job_ids = self.job_ids_on(alias) + self.job_ids_on(alias, SavedJob)
+            self.assertTrue(job_ids)
+            self.assertEqual({shards.for_job(job_id) for job_id in job_ids}, {alias})
+        self.assertEqual(sum(len(self.job_ids_on(alias)) for alias in SHARDS), 24)
+        self.assertEqual(rebalance.plan(), [])
+        self.assertEqual(counters.repair(), [])
+
+    def test_job_seeker_pages_merge_the_shards(self):
+        applications = sorted(
+            shards.fetch(JobApplication.objects.filter(applicant=self.seeker)),
+            key=attrgetter('applied_at', 'id'), reverse=True,
+        )
+        self.client.login(username=self.seeker.user_profile.user.username, password=PASSWORD)
+        url = reverse('jobs:my_applications')
+        seen, cursor = [], ''
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            page = response.context['page_obj']
+            seen += [application.pk for application in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [application.pk for application in applications])
+        self.assertEqual(response.context['total_applications'], 12)
+        self.assertContains(response, applications[-1].job.company.company_name)
+        previous = self.client.get(url, {'cursor': page.previous_cursor}).context['page_obj']
+        self.assertEqual([application.pk for application in previous], seen[:10])
+
+        saved = sorted(
+            shards.fetch(SavedJob.objects.filter(job_seeker=self.seeker)),
+            key=attrgetter('saved_at', 'id'), reverse=True,
+        )
+        response = self.client.get(reverse('jobs:saved_jobs'))
+        self.assertEqual([saved_job.pk for saved_job in response.context['page_obj']], [s.pk for s in saved[:10]])
+        self.assertEqual(response.context['total_saved'], 12)
+        self.assertEqual(response.context['applied_job_ids'], {saved_job.job_id for saved_job in saved[:10]})
+        self.assertContains(response, saved[0].job.title)
+
+    def test_writes_go_to_the_jobs_shard(self):
+        seeker, job = self.seekers[1], self.jobs[-1]
+        alias = shards.for_job(job.pk)
+        self.assertIn(alias, SHARDS)
+
+        self.client.login(username=seeker.user_profile.user.username, password=PASSWORD)
+        self.client.post(reverse('jobs:apply_job', args=[job.id]), {'cover_letter': 'Hello'})
+        self.client.post(reverse('jobs:save_job', args=[job.id]))
+        application = JobApplication.objects.using(alias).get(job=job, applicant=seeker)
+        self.assertTrue(SavedJob.objects.using(alias).filter(job=job, job_seeker=seeker).exists())
+        response = self.client.get(reverse('jobs:job_detail', args=[job.id]))
+        self.assertTrue(response.context['has_applied'])
+        self.assertTrue(response.context['is_saved'])
+        self.client.post(reverse('jobs:unsave_job', args=[job.id]))
+        self.assertFalse(SavedJob.objects.using(alias).filter(job=job, job_seeker=seeker).exists())
+
+        self.client.login(username=job.company.user_profile.user.username, password=PASSWORD)
+        response = self.client.get(reverse('jobs:job_applications', args=[job.id]), {'search': seeker.user_profile.user.last_name})
+        self.assertEqual(list(response.context['applications']), [application])
+        self.client.post(
+            reverse('jobs:update_application_status', args=[job.id]),
+            {'status': 'interview', 'application_ids': [application.pk]},
+        )
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'interview')
+        rows = list(exports.application_rows(job))
+        self.assertEqual([row[:4] for row in rows], [(application.pk, application.applied_at, 'interview', seeker.user_profile.user.username)])
+        self.assertEqual(JobApplicationCount.objects.get(job=job).interview, 1)
+        self.assertEqual(counters.repair(), [])
+
+    def test_deleting_jobs_and_job_seekers_deletes_their_rows_on_the_shards(self):
+        job = self.jobs[0]
+        job_id, alias = job.pk, shards.for_job(job.pk)
+        job.delete()
+        self.assertNotIn(job_id, self.job_ids_on(alias) + self.job_ids_on(alias, SavedJob))
+
+        seeker_id = self.seekers[1].pk
+        self.seekers[1].user_profile.user.delete()
+        for alias in SHARDS:
+            self.assertFalse(JobApplication.objects.using(alias).filter(applicant_id=seeker_id).exists())
+            self.assertFalse(SavedJob.objects.using(alias).filter(job_seeker_id=seeker_id).exists())
+        self.assertEqual(counters.repair(), [])
+
+    def test_moves_in_progress_hide_copies_and_hold_writes(self):
+        job = self.jobs[0]
+        source = shards.for_job(job.pk)
+        target = next(alias for alias in SHARDS if alias != source)
+        ShardBucket.objects.filter(bucket=shards.bucket_for(job.pk)).update(stray=target, locked=True)
+        rebalance._copy_rows(JobApplication, source, target, [job.pk])
+
+        self.assertIn(job.pk, self.job_ids_on(target))
+        self.assertEqual(len(shards.fetch(JobApplication.objects.filter(job=job))), 2)
+        with override_settings(SHARD_LOCK_TIMEOUT=0), self.assertRaises(shards.ShardLocked):
+            shards.for_job(job.pk, for_write=True)
+
+        rebalance.finish_interrupted()
+        self.assertNotIn(job.pk, self.job_ids_on(target))
+        self.assertEqual(shards.for_job(job.pk, for_write=True), source)
+
+    def test_draining_a_shard(self):
+        application_ids = sorted(shards.fetch(JobApplication.objects.values_list('pk', flat=True)))
+        self.assertTrue(rebalance.rebalance(drain=['shard_c'], settle=0))
+        self.assertEqual(self.job_ids_on('shard_c') + self.job_ids_on('shard_c', SavedJob), [])
+        self.assertEqual(shards.aliases(), ['shard_a', 'shard_b'])
+        self.assertEqual(sorted(shards.fetch(JobApplication.objects.values_list('pk', flat=True))), application_ids)
+
+        self.client.login(username=self.seeker.user_profile.user.username, password=PASSWORD)
+        self.assertEqual(self.client.get(reverse('jobs:my_applications')).context['total_applications'], 12)
@@ -10,11 +10,14 @@ urlpatterns = [
     
     # Job management (Employer)
     path('post/', views.post_job, name='post_job'),
+    path('import/', views.import_jobs, name='import_jobs'),
     path('<int:job_id>/edit/', views.edit_job, name='edit_job'),
     path('<int:job_id>/delete/', views.delete_job, name='delete_job'),
     path('<int:job_id>/toggle-status/', views.toggle_job_status, name='toggle_job_status'),
     path('my-jobs/', views.my_jobs, name='my_jobs'),
     path('<int:job_id>/applications/', views.job_applications, name='job_applications'),
+    path('<int:job_id>/applications/status/', views.update_application_status, name='update_application_status'),
+    path('<int:job_id>/applications/export/', views.export_applications, name='export_applications'),
     
     # Job seeker actions
     path('<int:job_id>/apply/', views.apply_job, name='apply_job'),
@@ -22,4 +25,5 @@ urlpatterns = [
     path('<int:job_id>/unsave/', views.unsave_job, name='unsave_job'),
     path('saved/', views.saved_jobs, name='saved_jobs'),
     path('my-applications/', views.my_applications, name='my_applications'),
+    path('recommended/', views.recommended_jobs, name='recommended_jobs'),
 ]
\ No newline at end of file
@@ -1,15 +1,88 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, aget_object_or_404, get_object_or_404
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import condition, require_POST
+from django.http import StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
-from accounts.models import UserProfile, EmployerProfile, JobSeekerProfile
-from .models import Job, JobApplication, JobCategory, SavedJob
-from .forms import JobPostForm, JobApplicationForm, JobSearchForm
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Sum
+from main.page_cache import cache_anonymous_page, conditional_page, get_generations, normalized_url, page_etag
+from main.parallel import run_in_parallel
+from main.replicas import read_from_replica
+from . import exports, importer, shards
+from .applications import list_for_job, set_status
+from .cards import attach_cards
+from .models import Job, JobApplication, JobApplicationCount, JobCategory, JobRecommendation, SavedJob
+from .facets import get_facet_counts
+from .forms import ApplicationStatusForm, JobPostForm, JobApplicationForm, JobImportUploadForm, JobSearchForm
+from .pagination import CursorPaginator, MergedCursorPaginator, capped_count, merged_capped_count
+from .search import search_jobs
+from .skills import filter_by_skills
+
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+APPLICATION_ORDERINGS = {
+    '-applied_at': ('-applied_at',),
+    'applied_at': ('applied_at',),
+    'applicant__first_name': ('applicant__user_profile__user__first_name', '-applied_at'),
+    '-applicant__first_name': ('-applicant__user_profile__user__first_name', '-applied_at'),
+}
 
-def job_list(request):
-    jobs = Job.objects.filter(is_active=True)
-    form = JobSearchForm(request.GET)
+def job_list_etag(request):
+    return page_etag(request, normalized_url(request), *get_generations(('jobs', 'companies', 'categories')))
+
+def job_detail_state(request, job_id):
+    """The job's updated_at and, for job seekers, whether they applied for or saved it.
+
+    Loaded with one query, or three when the job's applications are on a
+    shard, and kept on the request, so the ETag check and the view share it.
+    ``None`` if there is no such active job.
+    """
+    if not hasattr(request, '_job_detail_state'):
+        jobs = Job.objects.filter(id=job_id, is_active=True)
+        jobseeker_profile = request.profile.jobseeker_profile if request.profile.is_job_seeker else None
+        if jobseeker_profile and shards.for_job(job_id) != DEFAULT_DB_ALIAS:
+            state = jobs.values('updated_at').first()
+            if state is not None:
+                state['has_applied'] = shards.using_job(
+                    JobApplication.objects.filter(job_id=job_id, applicant=jobseeker_profile), job_id
+                ).exists()
+                state['is_saved'] = shards.using_job(
+                    SavedJob.objects.filter(job_id=job_id, job_seeker=jobseeker_profile), job_id
+                ).exists()
+            request._job_detail_state = state
+            return state
+        if jobseeker_profile:
+            jobs = jobs.annotate(
+                has_applied=Exists(JobApplication.objects.filter(job=OuterRef('pk'), applicant=jobseeker_profile)),
+                is_saved=Exists(SavedJob.objects.filter(job=OuterRef('pk'), job_seeker=jobseeker_profile)),
+            ).values('updated_at', 'has_applied', 'is_saved')
+        else:
+            jobs = jobs.values('updated_at')
+        request._job_detail_state = jobs.first()
+    return request._job_detail_state
+
+def job_detail_etag(request, job_id):
+    state = job_detail_state(request, job_id)
+    if state is None:
+        return None
+    return page_etag(request, *state.values(), *get_generations(('companies', 'categories')))
+
+def filter_jobs(params):
+    """Apply the search form in ``params`` to the active jobs.
+
+    Returns the bound form, the jobs with every filter applied, the jobs
+    without the facet filters (what facet counts are taken from), the page
+    ordering and the search filter and selected facet values.
+    """
+    jobs = Job.objects.filter(is_active=True).select_related('company', 'category')
+    ordering = ('-created_at', '-id')
+    form = JobSearchForm(params)
+    search_filters = {}
+    selected_facets = {}
     
     if form.is_valid():
         query = form.cleaned_data.get('query')
@@ -19,82 +92,107 @@ def job_list(request):
         location = form.cleaned_data.get('location')
         remote_work = form.cleaned_data.get('remote_work')
         salary_min = form.cleaned_data.get('salary_min')
+        skills = form.cleaned_data.get('skills')
+        skills_match = form.cleaned_data.get('skills_match')
         
         if query:
-            jobs = jobs.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(company__company_name__icontains=query) |
-                Q(skills_required__icontains=query)
-            )
-        
-        if category:
-            jobs = jobs.filter(category=category)
-        
-        if job_type:
-            jobs = jobs.filter(job_type=job_type)
-        
-        if experience_level:
-            jobs = jobs.filter(experience_level=experience_level)
+            jobs = search_jobs(jobs, query)
+            if 'search_rank' in jobs.query.annotations:
+                ordering = ('search_rank',) + ordering
         
         if location:
             jobs = jobs.filter(location__icontains=location)
         
-        if remote_work:
-            jobs = jobs.filter(remote_work=True)
-        
         if salary_min:
             jobs = jobs.filter(salary_min__gte=salary_min)
+        
+        if skills:
+            jobs = filter_by_skills(jobs, skills.split(','), match_all=skills_match == 'all')
+        
+        search_filters = {
+            'query': query,
+            'location': location,
+            'salary_min': salary_min,
+            'skills': skills,
+            'skills_match': skills_match if skills else None,
+        }
+        selected_facets = {
+            'category': category.pk if category else None,
+            'job_type': job_type,
+            'experience_level': experience_level,
+            'remote_work': remote_work,
+        }
     
-    # Pagination
-    paginator = Paginator(jobs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Facet counts are taken before the facet filters themselves are applied
+    unfaceted_jobs = jobs
+    
+    if selected_facets.get('category'):
+        jobs = jobs.filter(category_id=selected_facets['category'])
+    
+    if selected_facets.get('job_type'):
+        jobs = jobs.filter(job_type=selected_facets['job_type'])
+    
+    if selected_facets.get('experience_level'):
+        jobs = jobs.filter(experience_level=selected_facets['experience_level'])
+    
+    if selected_facets.get('remote_work'):
+        jobs = jobs.filter(remote_work=True)
+    
+    return form, jobs, unfaceted_jobs, ordering, search_filters, selected_facets
+
+def job_card_page(jobs, ordering, cursor):
+    page_obj = CursorPaginator(jobs, 10, ordering).get_page(cursor)
+    attach_cards(page_obj)
+    return page_obj
+
+@read_from_replica
+@conditional_page(job_list_etag)
+@cache_anonymous_page('jobs', 'companies', 'categories')
+async def job_list(request):
+    # Validating the form looks the category up
+    form, jobs, unfaceted_jobs, ordering, search_filters, selected_facets = await sync_to_async(filter_jobs)(request.GET)
+    
+    # The facet counts, the page and the total are independent queries
+    facet_counts, page_obj, (total_jobs, total_jobs_capped) = await run_in_parallel(
+        partial(get_facet_counts, unfaceted_jobs, search_filters, selected_facets),
+        partial(job_card_page, jobs, ordering, request.GET.get('cursor')),
+        partial(capped_count, jobs),
+    )
+    form.set_facet_counts(facet_counts)
     
     context = {
         'page_obj': page_obj,
         'form': form,
-        'total_jobs': jobs.count()
+        'total_jobs': total_jobs,
+        'total_jobs_capped': total_jobs_capped,
     }
-    return render(request, 'jobs/job_list.html', context)
+    return await sync_to_async(render)(request, 'jobs/job_list.html', context)
 
-def job_detail(request, job_id):
-    job = get_object_or_404(Job, id=job_id, is_active=True)
+@read_from_replica
+@conditional_page(job_detail_etag)
+@cache_anonymous_page('job:{job_id}', 'companies', 'categories')
+async def job_detail(request, job_id):
+    job = await aget_object_or_404(Job.objects.select_related('company', 'category'), id=job_id, is_active=True)
     
-    # Check if user has applied
-    has_applied = False
-    is_saved = False
-    can_apply = False
-    
-    if request.user.is_authenticated:
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-            if user_profile.user_type == 'job_seeker':
-                jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-                has_applied = JobApplication.objects.filter(job=job, applicant=jobseeker_profile).exists()
-                is_saved = SavedJob.objects.filter(job=job, job_seeker=jobseeker_profile).exists()
-                can_apply = True
-        except (UserProfile.DoesNotExist, JobSeekerProfile.DoesNotExist):
-            pass
+    # Whether the user has applied for or saved it, loaded by the ETag check
+    state = await sync_to_async(job_detail_state)(request, job_id) or {}
     
     context = {
         'job': job,
-        'has_applied': has_applied,
-        'is_saved': is_saved,
-        'can_apply': can_apply
+        'has_applied': state.get('has_applied', False),
+        'is_saved': state.get('is_saved', False),
+        'can_apply': 'has_applied' in state
     }
-    return render(request, 'jobs/job_detail.html', context)
+    return await sync_to_async(render)(request, 'jobs/job_detail.html', context)
 
 @login_required
 def post_job(request):
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.user_type != 'employer':
-            messages.error(request, 'Only employers can post jobs.')
-            return redirect('jobs:job_list')
-        
-        employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-    except (UserProfile.DoesNotExist, EmployerProfile.DoesNotExist):
+    if request.profile.user_type and not request.profile.is_employer:
+        messages.error(request, 'Only employers can post jobs.')
+        return redirect('jobs:job_list')
+    
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
         messages.error(request, 'Please complete your employer profile first.')
         return redirect('accounts:profile')
     
@@ -104,6 +202,7 @@ def post_job(request):
             job = form.save(commit=False)
             job.company = employer_profile
             job.save()
+            form.save_m2m()
             messages.success(request, 'Job posted successfully!')
             return redirect('jobs:job_detail', job_id=job.id)
     else:
@@ -111,23 +210,65 @@ def post_job(request):
     
     return render(request, 'jobs/post_job.html', {'form': form})
 
+@login_required
+def import_jobs(request):
+    if request.profile.user_type and not request.profile.is_employer:
+        messages.error(request, 'Only employers can import jobs.')
+        return redirect('jobs:job_list')
+    
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
+        messages.error(request, 'Please complete your employer profile first.')
+        return redirect('accounts:profile')
+    
+    row_errors = []
+    failed = 0
+    if request.method == 'POST':
+        form = JobImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                format = form.cleaned_data['format'] or importer.detect_format(upload.name)
+            except ValueError as e:
+                form.add_error('file', str(e))
+            else:
+                # Only the first errors are shown; the file itself can be any size
+                def report(line_number, message):
+                    if len(row_errors) < MAX_REPORTED_IMPORT_ERRORS:
+                        row_errors.append((line_number, message))
+                
+                created, failed = importer.import_jobs(
+                    importer.read_rows(upload.file, format), employer_profile, on_error=report
+                )
+                if created:
+                    messages.success(request, f'Imported {created} jobs.')
+                if not failed:
+                    return redirect('jobs:my_jobs')
+                messages.warning(request, f'{failed} rows could not be imported.')
+    else:
+        form = JobImportUploadForm()
+    
+    return render(request, 'jobs/import_jobs.html', {
+        'form': form,
+        'row_errors': row_errors,
+        'failed': failed,
+    })
+
 @login_required
 def apply_job(request, job_id):
-    job = get_object_or_404(Job, id=job_id, is_active=True)
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id, is_active=True)
     
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.user_type != 'job_seeker':
-            messages.error(request, 'Only job seekers can apply for jobs.')
-            return redirect('jobs:job_detail', job_id=job_id)
-        
-        jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-    except (UserProfile.DoesNotExist, JobSeekerProfile.DoesNotExist):
+    if request.profile.user_type and not request.profile.is_job_seeker:
+        messages.error(request, 'Only job seekers can apply for jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    jobseeker_profile = request.profile.jobseeker_profile
+    if jobseeker_profile is None:
         messages.error(request, 'Please complete your job seeker profile first.')
         return redirect('accounts:profile')
     
     # Check if already applied
-    if JobApplication.objects.filter(job=job, applicant=jobseeker_profile).exists():
+    if shards.using_job(JobApplication.objects.filter(job=job, applicant=jobseeker_profile), job.pk).exists():
         messages.warning(request, 'You have already applied for this job.')
         return redirect('jobs:job_detail', job_id=job_id)
     
@@ -147,43 +288,61 @@ def apply_job(request, job_id):
 
 @login_required
 def my_jobs(request):
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        
-        if user_profile.user_type == 'employer':
-            employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-            jobs = Job.objects.filter(company=employer_profile).order_by('-created_at')
-            return render(request, 'jobs/my_jobs_employer.html', {'jobs': jobs})
-        
-        elif user_profile.user_type == 'job_seeker':
-            jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-            applications = JobApplication.objects.filter(applicant=jobseeker_profile).order_by('-applied_at')
-            saved_jobs = SavedJob.objects.filter(job_seeker=jobseeker_profile).order_by('-saved_at')
-            return render(request, 'jobs/my_jobs_jobseeker.html', {
-                'applications': applications,
-                'saved_jobs': saved_jobs
-            })
-    
-    except (UserProfile.DoesNotExist, EmployerProfile.DoesNotExist, JobSeekerProfile.DoesNotExist):
+    if request.profile.is_job_seeker:
+        return redirect('jobs:my_applications')
+    
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
         messages.error(request, 'Please complete your profile first.')
         return redirect('accounts:profile')
+    
+    company_jobs = Job.objects.filter(company=employer_profile)
+    jobs = company_jobs.select_related('category', 'application_count')
+    
+    search = request.GET.get('search')
+    if search:
+        jobs = jobs.filter(title__icontains=search)
+    
+    status = request.GET.get('status')
+    if status in ('active', 'inactive'):
+        jobs = jobs.filter(is_active=status == 'active')
+    
+    category = request.GET.get('category')
+    if category and category.isdigit():
+        jobs = jobs.filter(category_id=category)
+    
+    # Pagination
+    page_obj = CursorPaginator(jobs, 10, ('-created_at', '-id')).get_page(request.GET.get('cursor'))
+    
+    # Application totals come from the per-job counters, not from the applications table
+    totals = company_jobs.aggregate(
+        total_jobs=Count('id'),
+        active_jobs=Count('id', filter=Q(is_active=True)),
+        total_applications=Sum('application_count__total', default=0),
+    )
+    
+    return render(request, 'jobs/my_jobs.html', {
+        'page_obj': page_obj,
+        'categories': JobCategory.objects.order_by('name'),
+        'inactive_jobs': totals['total_jobs'] - totals['active_jobs'],
+        **totals,
+    })
 
 @login_required
 def save_job(request, job_id):
     job = get_object_or_404(Job, id=job_id, is_active=True)
     
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.user_type != 'job_seeker':
-            messages.error(request, 'Only job seekers can save jobs.')
-            return redirect('jobs:job_detail', job_id=job_id)
-        
-        jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-    except (UserProfile.DoesNotExist, JobSeekerProfile.DoesNotExist):
+    if request.profile.user_type and not request.profile.is_job_seeker:
+        messages.error(request, 'Only job seekers can save jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    jobseeker_profile = request.profile.jobseeker_profile
+    if jobseeker_profile is None:
         messages.error(request, 'Please complete your job seeker profile first.')
         return redirect('accounts:profile')
     
-    saved_job, created = SavedJob.objects.get_or_create(job=job, job_seeker=jobseeker_profile)
+    saved_jobs = shards.using_job(SavedJob.objects.all(), job.pk, for_write=True)
+    saved_job, created = saved_jobs.get_or_create(job=job, job_seeker=jobseeker_profile)
     
     if created:
         messages.success(request, 'Job saved successfully!')
@@ -197,167 +356,255 @@ def unsave_job(request, job_id):
     job = get_object_or_404(Job, id=job_id)
     
     try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-        
-        saved_job = SavedJob.objects.get(job=job, job_seeker=jobseeker_profile)
+        saved_jobs = shards.using_job(SavedJob.objects.all(), job.pk, for_write=True)
+        saved_job = saved_jobs.get(job=job, job_seeker=request.profile.jobseeker_profile)
         saved_job.delete()
         messages.success(request, 'Job removed from saved list.')
-    except (UserProfile.DoesNotExist, JobSeekerProfile.DoesNotExist, SavedJob.DoesNotExist):
+    except SavedJob.DoesNotExist:
         messages.error(request, 'Job not found in your saved list.')
     
     return redirect('jobs:job_detail', job_id=job_id)
 
 @login_required
 def job_applications(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id)
     
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-        
-        # Check if the employer owns this job
-        if job.company != employer_profile:
-            messages.error(request, 'You can only view applications for your own jobs.')
-            return redirect('jobs:job_detail', job_id=job_id)
-        
-        applications = JobApplication.objects.filter(job=job).order_by('-applied_at')
-        
-        return render(request, 'jobs/job_applications.html', {
-            'job': job,
-            'applications': applications
-        })
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
+        messages.error(request, 'Access denied.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    # Check if the employer owns this job
+    if job.company != employer_profile:
+        messages.error(request, 'You can only view applications for your own jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    ordering = APPLICATION_ORDERINGS.get(request.GET.get('sort'), APPLICATION_ORDERINGS['-applied_at'])
+    status = request.GET.get('status')
+    if status not in dict(JobApplication.STATUS_CHOICES):
+        status = None
+    applications = list_for_job(job, ordering, status, request.GET.get('search', '').strip())
+    
+    counts = JobApplicationCount.objects.filter(job=job).first() or JobApplicationCount(job=job)
+    
+    return render(request, 'jobs/job_applications.html', {
+        'job': job,
+        'applications': applications,
+        'new_applications': counts.pending,
+        'shortlisted_applications': counts.reviewed,
+        'interviewed_applications': counts.interview,
+        'status_choices': JobApplication.STATUS_CHOICES,
+    })
+
+@login_required
+@require_POST
+def update_application_status(request, job_id):
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id)
+    
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None or job.company != employer_profile:
+        messages.error(request, 'You can only update applications for your own jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
     
-    except (UserProfile.DoesNotExist, EmployerProfile.DoesNotExist):
+    form = ApplicationStatusForm(request.POST)
+    if form.is_valid():
+        status = form.cleaned_data['status']
+        updated = set_status(job, form.cleaned_data['application_ids'], status)
+        label = dict(JobApplication.STATUS_CHOICES)[status]
+        messages.success(request, f'Moved {updated} application(s) to {label}.')
+    else:
+        messages.error(request, ' '.join(error for errors in form.errors.values() for error in errors))
+    
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        return redirect(next_url)
+    return redirect('jobs:job_applications', job_id=job_id)
+
+@login_required
+def export_applications(request, job_id):
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id)
+    
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
         messages.error(request, 'Access denied.')
         return redirect('jobs:job_detail', job_id=job_id)
+    
+    # Check if the employer owns this job
+    if job.company != employer_profile:
+        messages.error(request, 'You can only export applications for your own jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        messages.error(request, 'Unknown export format.')
+        return redirect('jobs:job_applications', job_id=job_id)
+    
+    response = StreamingHttpResponse(exports.stream_applications(job, fmt), content_type=exports.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="job-{job.id}-applications.{fmt}"'
+    return response
 
 @login_required
 def edit_job(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id)
     
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-        
-        # Check if the employer owns this job
-        if job.company != employer_profile:
-            messages.error(request, 'You can only edit your own jobs.')
-            return redirect('jobs:job_detail', job_id=job_id)
-        
-        if request.method == 'POST':
-            form = JobPostForm(request.POST, instance=job)
-            if form.is_valid():
-                form.save()
-                messages.success(request, 'Job updated successfully!')
-                return redirect('jobs:job_detail', job_id=job.id)
-        else:
-            form = JobPostForm(instance=job)
-        
-        return render(request, 'jobs/edit_job.html', {
-            'form': form,
-            'job': job
-        })
-    
-    except (UserProfile.DoesNotExist, EmployerProfile.DoesNotExist):
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
         messages.error(request, 'Access denied.')
         return redirect('jobs:job_detail', job_id=job_id)
+    
+    # Check if the employer owns this job
+    if job.company != employer_profile:
+        messages.error(request, 'You can only edit your own jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    if request.method == 'POST':
+        form = JobPostForm(request.POST, instance=job)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Job updated successfully!')
+            return redirect('jobs:job_detail', job_id=job.id)
+    else:
+        form = JobPostForm(instance=job)
+    
+    return render(request, 'jobs/edit_job.html', {
+        'form': form,
+        'job': job
+    })
 
 @login_required
 def delete_job(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
-    
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-        
-        # Check if the employer owns this job
-        if job.company != employer_profile:
-            messages.error(request, 'You can only delete your own jobs.')
-            return redirect('jobs:job_detail', job_id=job_id)
-        
-        if request.method == 'POST':
-            job.delete()
-            messages.success(request, 'Job deleted successfully!')
-            return redirect('jobs:my_jobs')
-        
-        return render(request, 'jobs/delete_job_confirm.html', {'job': job})
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id)
     
-    except (UserProfile.DoesNotExist, EmployerProfile.DoesNotExist):
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
         messages.error(request, 'Access denied.')
         return redirect('jobs:job_detail', job_id=job_id)
+    
+    # Check if the employer owns this job
+    if job.company != employer_profile:
+        messages.error(request, 'You can only delete your own jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    if request.method == 'POST':
+        job.delete()
+        messages.success(request, 'Job deleted successfully!')
+        return redirect('jobs:my_jobs')
+    
+    return render(request, 'jobs/delete_job_confirm.html', {'job': job})
 
 @login_required
 def toggle_job_status(request, job_id):
     job = get_object_or_404(Job, id=job_id)
     
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        employer_profile = EmployerProfile.objects.get(user_profile=user_profile)
-        
-        # Check if the employer owns this job
-        if job.company != employer_profile:
-            messages.error(request, 'You can only modify your own jobs.')
-            return redirect('jobs:job_detail', job_id=job_id)
-        
-        if request.method == 'POST':
-            job.is_active = not job.is_active
-            job.save()
-            status = 'activated' if job.is_active else 'deactivated'
-            messages.success(request, f'Job {status} successfully!')
-        
-        return redirect('jobs:my_jobs')
-    
-    except (UserProfile.DoesNotExist, EmployerProfile.DoesNotExist):
+    employer_profile = request.profile.employer_profile
+    if employer_profile is None:
         messages.error(request, 'Access denied.')
         return redirect('jobs:job_detail', job_id=job_id)
+    
+    # Check if the employer owns this job
+    if job.company != employer_profile:
+        messages.error(request, 'You can only modify your own jobs.')
+        return redirect('jobs:job_detail', job_id=job_id)
+    
+    if request.method == 'POST':
+        job.is_active = not job.is_active
+        job.save()
+        status = 'activated' if job.is_active else 'deactivated'
+        messages.success(request, f'Job {status} successfully!')
+    
+    return redirect('jobs:my_jobs')
+
+def get_applied_job_ids(jobseeker_profile, job_ids):
+    applications = JobApplication.objects.filter(applicant=jobseeker_profile)
+    querysets = [queryset.values_list('job_id', flat=True) for queryset in shards.by_job(applications, job_ids)]
+    return {job_id for found in shards.fan_out(list, querysets) for job_id in found}
+
+def saved_job_page_rows(saved_jobs_list, cursor):
+    page_obj = MergedCursorPaginator(shards.split(saved_jobs_list), 10, ('-saved_at', '-id')).get_page(cursor)
+    shards.load_related(page_obj, Prefetch('job', queryset=Job.objects.select_related('company', 'category')))
+    return page_obj
 
+def saved_job_count(saved_jobs_list):
+    return merged_capped_count(shards.split(saved_jobs_list))
+
+@read_from_replica
 @login_required
-def saved_jobs(request):
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.user_type != 'job_seeker':
-            messages.error(request, 'Only job seekers can view saved jobs.')
-            return redirect('jobs:job_list')
-        
-        jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-        saved_jobs_list = SavedJob.objects.filter(job_seeker=jobseeker_profile).order_by('-saved_at')
-        
-        # Pagination
-        paginator = Paginator(saved_jobs_list, 10)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-        
-        return render(request, 'jobs/saved_jobs.html', {
-            'page_obj': page_obj,
-            'total_saved': saved_jobs_list.count()
-        })
+async def saved_jobs(request):
+    profile = await request.profile.aload('user_type')
+    if profile.user_type and not profile.is_job_seeker:
+        messages.error(request, 'Only job seekers can view saved jobs.')
+        return redirect('jobs:job_list')
     
-    except (UserProfile.DoesNotExist, JobSeekerProfile.DoesNotExist):
+    jobseeker_profile = (await profile.aload('jobseeker_profile')).jobseeker_profile
+    if jobseeker_profile is None:
         messages.error(request, 'Please complete your job seeker profile first.')
         return redirect('accounts:profile')
+    
+    saved_jobs_list = SavedJob.objects.filter(job_seeker=jobseeker_profile).select_related('job__company', 'job__category')
+    
+    # Pagination
+    page_obj, (total_saved, total_saved_capped) = await run_in_parallel(
+        partial(saved_job_page_rows, saved_jobs_list, request.GET.get('cursor')),
+        partial(saved_job_count, saved_jobs_list),
+    )
+    
+    # The cards and the applied flags both only need the page
+    _, applied_job_ids = await run_in_parallel(
+        partial(attach_cards, [saved_job.job for saved_job in page_obj]),
+        partial(get_applied_job_ids, jobseeker_profile, [saved_job.job_id for saved_job in page_obj]),
+    )
+    
+    return await sync_to_async(render)(request, 'jobs/saved_jobs.html', {
+        'page_obj': page_obj,
+        'total_saved': total_saved,
+        'total_saved_capped': total_saved_capped,
+        'applied_job_ids': applied_job_ids,
+    })
 
 @login_required
 def my_applications(request):
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        if user_profile.user_type != 'job_seeker':
-            messages.error(request, 'Only job seekers can view applications.')
-            return redirect('jobs:job_list')
-        
-        jobseeker_profile = JobSeekerProfile.objects.get(user_profile=user_profile)
-        applications = JobApplication.objects.filter(applicant=jobseeker_profile).order_by('-applied_at')
-        
-        # Pagination
-        paginator = Paginator(applications, 10)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-        
-        return render(request, 'jobs/my_applications.html', {
-            'page_obj': page_obj,
-            'total_applications': applications.count()
-        })
+    if request.profile.user_type and not request.profile.is_job_seeker:
+        messages.error(request, 'Only job seekers can view applications.')
+        return redirect('jobs:job_list')
+    
+    jobseeker_profile = request.profile.jobseeker_profile
+    if jobseeker_profile is None:
+        messages.error(request, 'Please complete your job seeker profile first.')
+        return redirect('accounts:profile')
+    
+    # A job seeker's applications are on every shard; page through them all at once
+    applications = shards.split(JobApplication.objects.filter(applicant=jobseeker_profile).select_related('job__company'))
+    
+    # Pagination
+    paginator = MergedCursorPaginator(applications, 10, ('-applied_at', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    shards.load_related(page_obj, Prefetch('job', queryset=Job.objects.select_related('company')))
+    total_applications, total_applications_capped = merged_capped_count(applications)
+    
+    return render(request, 'jobs/my_applications.html', {
+        'page_obj': page_obj,
+        'total_applications': total_applications,
+        'total_applications_capped': total_applications_capped,
+    })
+
+@login_required
+def recommended_jobs(request):
+    if request.profile.user_type and not request.profile.is_job_seeker:
+        messages.error(request, 'Only job seekers can view recommendations.')
+        return redirect('jobs:job_list')
     
-    except (UserProfile.DoesNotExist, JobSeekerProfile.DoesNotExist):
+    jobseeker_profile = request.profile.jobseeker_profile
+    if jobseeker_profile is None:
         messages.error(request, 'Please complete your job seeker profile first.')
         return redirect('accounts:profile')
+    
+    recommendations = (
+        JobRecommendation.objects
+        .filter(job_seeker=jobseeker_profile, job__is_active=True)
+        .select_related('job__company', 'job__category')
+        .order_by('-score')[:20]
+    )
+    
+    return render(request, 'jobs/recommended_jobs.html', {
+        'recommendations': recommendations
+    })
@@ -0,0 +1,269 @@
+"""A small database-backed task queue for work that doesn't need to finish
+before the response.
+
+Tasks are plain functions in an app's ``tasks`` module, registered with
+``@task``. Request code calls ``some_task.enqueue(payload, key=...)``, which
+inserts a ``main.models.Task`` row in the request's own transaction, and
+the ``run_tasks`` worker runs them. A task runs at least once: it is retried
+with exponential backoff when it raises and taken over by another worker
+when its lease runs out, up to ``max_attempts`` runs in all, so tasks must be
+safe to run twice.
+
+Tasks registered with ``batch=True`` are called with a list of payloads,
+so a worker can send a whole batch of emails over one connection; plain
+tasks are called with one payload as keyword arguments.
+"""
+import logging
+import multiprocessing
+import random
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger('main.background')
+
+DEFAULT_BATCH_SIZE = 100
+
+# How long a worker may hold a claimed batch before others take it over.
+DEFAULT_LEASE = timedelta(minutes=5)
+
+BACKOFF_BASE = timedelta(seconds=10)
+BACKOFF_MAX = timedelta(hours=1)
+
+ENQUEUE_BATCH_SIZE = 500
+
+EXECUTORS = ('thread', 'process', 'inline')
+
+registry = {}
+
+
+class TaskFunction:
+    def __init__(self, func, name, batch, max_attempts):
+        self.func = func
+        self.name = name
+        self.batch = batch
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<task {self.name}>'
+
+    def enqueue(self, payload=None, key=None, delay=None):
+        self.enqueue_many([(payload, key)], delay=delay)
+
+    def enqueue_many(self, items, delay=None):
+        """Queue one task per ``(payload, idempotency key)`` pair.
+
+        Pairs whose key is already queued or done are skipped.
+        """
+        run_after = timezone.now() + (delay or timedelta(0))
+        tasks = [
+            Task(name=self.name, payload=payload or {}, idempotency_key=key,
+                 max_attempts=self.max_attempts, run_after=run_after)
+            for payload, key in items
+        ]
+        Task.objects.bulk_create(tasks, batch_size=ENQUEUE_BATCH_SIZE, ignore_conflicts=True)
+
+    def run(self, payloads):
+        if self.batch:
+            self.func(payloads)
+        else:
+            for payload in payloads:
+                self.func(**payload)
+
+
+def task(func=None, *, name=None, batch=False, max_attempts=5):
+    """Register ``func`` as a task named ``<module>.<function>`` unless ``name`` is given."""
+    def register(func):
+        task_function = TaskFunction(func, name or f'{func.__module__}.{func.__qualname__}', batch, max_attempts)
+        registry[task_function.name] = task_function
+        return task_function
+    return register if func is None else register(func)
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+    # Spread the retries of a batch that failed together
+    return delay * random.uniform(1, 1.25)
+
+
+def claim(worker, batch_size=DEFAULT_BATCH_SIZE, lease=DEFAULT_LEASE):
+    """Claim the oldest due task and, for batch tasks, more due tasks of the same name.
+
+    Each claim is a single ``UPDATE`` guarded on the tasks still being due,
+    so concurrent workers never run the same claim; no row locks needed.
+    A task whose lease ran out on its last attempt is marked failed instead:
+    it most likely took its worker down, and would take the next one too.
+    """
+    now = timezone.now()
+    abandoned = Task.objects.filter(status=Task.RUNNING, run_after__lte=now, attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, finished_at=now, last_error='The lease ran out on the last attempt',
+    )
+    if abandoned:
+        logger.warning('Gave up on %d tasks whose lease ran out on their last attempt', abandoned)
+    due = Task.objects.filter(status__in=(Task.QUEUED, Task.RUNNING), run_after__lte=now)
+    name = due.order_by('run_after', 'id').values_list('name', flat=True).first()
+    if name is None:
+        return None, []
+
+    task_function = registry.get(name)
+    limit = batch_size if task_function is not None and task_function.batch else 1
+    ids = list(due.filter(name=name).order_by('run_after', 'id').values_list('id', flat=True)[:limit])
+    token = f'{worker}:{uuid.uuid4().hex[:16]}'
+    claimed = due.filter(id__in=ids).update(
+        status=Task.RUNNING, claimed_by=token, run_after=now + lease, attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return name, []
+    return name, list(Task.objects.filter(claimed_by=token, status=Task.RUNNING).order_by('id'))
+
+
+def execute(name, payloads):
+    """Run a claimed batch; returns the traceback if it failed, else ``None``.
+
+    Errors come back as text rather than as exceptions, which may not
+    pickle on their way back from a worker process.
+    """
+    try:
+        task_function = registry.get(name)
+        if task_function is None:
+            raise LookupError(f'No task named {name!r} is registered')
+        task_function.run(payloads)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def _execute_in_pool(name, payloads):
+    # Pool threads and processes live long; treat each batch like a request
+    autodiscover()
+    close_old_connections()
+    try:
+        return execute(name, payloads)
+    finally:
+        close_old_connections()
+
+
+def finish(tasks, error):
+    """Record how a claimed batch went; returns the number of tasks updated.
+
+    Only tasks still running under this claim are touched. A task whose
+    lease ran out may have been taken over by another worker, and its
+    outcome is then that worker's to record.
+    """
+    now = timezone.now()
+    claimed = Task.objects.filter(claimed_by=tasks[0].claimed_by, status=Task.RUNNING)
+    if error is None:
+        updated = claimed.filter(pk__in=[t.pk for t in tasks]).update(status=Task.DONE, finished_at=now, last_error='')
+    else:
+        updated = 0
+        for t in tasks:
+            if t.attempts >= t.max_attempts:
+                updated += claimed.filter(pk=t.pk).update(status=Task.FAILED, finished_at=now, last_error=error)
+            else:
+                updated += claimed.filter(pk=t.pk).update(
+                    status=Task.QUEUED, run_after=now + backoff(t.attempts), claimed_by='', last_error=error
+                )
+    if updated < len(tasks):
+        logger.warning(
+            'Lost the lease on %d of %d %s tasks claimed as %s; leaving them to the worker that took them over',
+            len(tasks) - updated, len(tasks), tasks[0].name, tasks[0].claimed_by,
+        )
+    return updated
+
+
+def _executor(kind, concurrency):
+    if kind == 'process':
+        # Spawned rather than forked, so no child inherits the parent's
+        # database connection. Each child sets Django up before it unpickles
+        # its first batch, which imports this module and its models
+        return ProcessPoolExecutor(
+            max_workers=concurrency, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+        )
+    return ThreadPoolExecutor(max_workers=concurrency)
+
+
+def run_pending(worker='inline', batch_size=DEFAULT_BATCH_SIZE, lease=DEFAULT_LEASE, on_finish=None):
+    """Run due tasks in this thread until none are left; returns ``(done, failed)``."""
+    done = failed = 0
+    while True:
+        name, tasks = claim(worker, batch_size, lease)
+        if name is None:
+            return done, failed
+        if not tasks:
+            continue
+        error = execute(name, [t.payload for t in tasks])
+        finish(tasks, error)
+        if on_finish is not None:
+            on_finish(name, tasks, error)
+        if error is None:
+            done += len(tasks)
+        else:
+            failed += len(tasks)
+
+
+def run_worker(executor='thread', concurrency=4, batch_size=DEFAULT_BATCH_SIZE, lease=DEFAULT_LEASE,
+               poll_interval=1.0, once=False, on_finish=None):
+    """Claim batches and run them on a pool of ``concurrency`` threads or processes.
+
+    With ``once`` the worker returns when the queue is empty instead of
+    polling every ``poll_interval`` seconds. ``on_finish(name, tasks,
+    error)`` is called after every batch.
+    """
+    autodiscover()
+    worker = uuid.uuid4().hex[:8]
+    if executor == 'inline':
+        while True:
+            run_pending(worker, batch_size, lease, on_finish)
+            if once:
+                return
+            time.sleep(poll_interval)
+
+    running = {}
+    with _executor(executor, concurrency) as pool:
+        while True:
+            close_old_connections()
+            while len(running) < concurrency:
+                name, tasks = claim(worker, batch_size, lease)
+                if name is None:
+                    break
+                if tasks:
+                    future = pool.submit(_execute_in_pool, name, [t.payload for t in tasks])
+                    running[future] = (name, tasks)
+
+            if not running:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            finished, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, tasks = running.pop(future)
+                error = future.result()
+                finish(tasks, error)
+                if on_finish is not None:
+                    on_finish(name, tasks, error)
+
+
+def prune(older_than):
+    """Delete tasks that finished more than ``older_than`` ago; their keys can be reused."""
+    cutoff = timezone.now() - older_than
+    deleted, _ = Task.objects.filter(status__in=(Task.DONE, Task.FAILED), finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,390 @@
+import asyncio
+import copy
+import json
+import logging
+import math
+import multiprocessing
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from importlib import import_module
+
+import django
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from accounts.models import JobSeekerProfile
+from jobs.models import Job
+
+URLCONFS = ('main.urls', 'jobs.urls', 'accounts.urls')
+
+ROLES = ('anonymous', 'employer', 'job_seeker')
+
+# Views that change data even on a GET, or only accept POST.
+SKIPPED_VIEWS = {'accounts:logout', 'jobs:save_job', 'jobs:unsave_job'}
+
+PERCENTILES = (50, 95, 99)
+
+INTERFACES = ('wsgi', 'asgi')
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    return values[max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))]
+
+
+def default_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def url_names():
+    for module_name in URLCONFS:
+        module = import_module(module_name)
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            if pattern.name and name not in SKIPPED_VIEWS:
+                yield name, set(pattern.pattern.converters)
+
+
+class Fixtures:
+    """Existing rows the benchmark requests point at, picked once up front."""
+
+    def __init__(self, seed, sample_size=200):
+        rng = random.Random(seed)
+        active_jobs = list(Job.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:100000])
+        if not active_jobs:
+            raise ValueError('There are no active jobs; run "manage.py seed_data" first.')
+        self.job_ids = rng.sample(active_jobs, min(sample_size, len(active_jobs)))
+
+        employer_job = (
+            Job.objects.filter(is_active=True, applications__isnull=False)
+            .select_related('company__user_profile__user')
+            .order_by('id').first()
+        ) or Job.objects.select_related('company__user_profile__user').get(pk=self.job_ids[0])
+        self.employer = employer_job.company.user_profile.user
+        self.employer_job_ids = list(
+            Job.objects.filter(company=employer_job.company).order_by('id').values_list('id', flat=True)[:sample_size]
+        )
+
+        seeker = (
+            JobSeekerProfile.objects.filter(applications__isnull=False)
+            .select_related('user_profile__user').order_by('id').first()
+        ) or JobSeekerProfile.objects.select_related('user_profile__user').order_by('id').first()
+        self.job_seeker = seeker.user_profile.user if seeker else None
+
+    def user(self, role):
+        return {'employer': self.employer, 'job_seeker': self.job_seeker}.get(role)
+
+    def url(self, name, converters, role, rng):
+        kwargs = {}
+        if 'job_id' in converters:
+            ids = self.employer_job_ids if role == 'employer' else self.job_ids
+            kwargs['job_id'] = rng.choice(ids)
+        if 'uidb64' in converters:
+            user = self.job_seeker or self.employer
+            kwargs['uidb64'] = urlsafe_base64_encode(force_bytes(user.pk))
+            kwargs['token'] = default_token_generator.make_token(user)
+        return reverse(name, kwargs=kwargs)
+
+
+def client_for(user, host):
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+def session_cookie(user, host):
+    """The Cookie header of a client logged in as ``user`` (empty if ``None``)."""
+    if user is None:
+        return ''
+    cookies = client_for(user, host).cookies
+    return '; '.join(f'{morsel.key}={morsel.coded_value}' for morsel in cookies.values())
+
+
+def _run_worker(fixtures, name, converters, role, requests, warmup, host, seed):
+    rng = random.Random(seed)
+    client = client_for(fixtures.user(role), host)
+    samples = []
+    try:
+        for i in range(warmup + requests):
+            url = fixtures.url(name, converters, role, rng)
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            if i < warmup:
+                continue
+            stats = getattr(response.wsgi_request, 'query_stats', None)
+            samples.append((elapsed, stats.count if stats else None, response.status_code))
+    finally:
+        connections.close_all()
+    return samples
+
+
+async def _asgi_get(application, url, host, cookie):
+    """GET ``url`` from an ASGI application; returns ``(status, headers)``."""
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query.encode(),
+        'client': ('127.0.0.1', 0),
+        'server': (host, 80),
+        'headers': [(b'host', host.encode()), (b'cookie', cookie.encode())],
+    }
+    disconnected = asyncio.Event()
+    sent_request = False
+    response = {}
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode().lower(): value.decode() for name, value in message['headers']}
+
+    await application(scope, receive, send)
+    disconnected.set()
+    return response['status'], response['headers']
+
+
+async def _arun_worker(application, fixtures, name, converters, role, requests, warmup, host, seed, cookie):
+    rng = random.Random(seed)
+    samples = []
+    for i in range(warmup + requests):
+        url = fixtures.url(name, converters, role, rng)
+        started = time.perf_counter()
+        status, headers = await _asgi_get(application, url, host, cookie)
+        elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        count = headers.get('x-query-count')
+        samples.append((elapsed, int(count) if count is not None else None, status))
+    return samples
+
+
+async def _arun_workers(fixtures, name, converters, role, per_worker, warmup, host, seed, concurrency, cookies):
+    application = get_asgi_application()
+    results = await asyncio.gather(*(
+        _arun_worker(application, fixtures, name, converters, role, per_worker, warmup, host, seed + worker, cookie)
+        for worker, cookie in zip(range(concurrency), cookies)
+    ))
+    return [sample for samples in results for sample in samples]
+
+
+def run_benchmark(fixtures, requests=50, warmup=5, concurrency=1, roles=ROLES, only=None,
+                  host=None, seed=0, progress=None, interface='wsgi'):
+    """Request every URL as every role and return ``{label: result}``.
+
+    Each result holds the latency percentiles in milliseconds, the mean
+    number of queries per request, the throughput and the status codes seen.
+    With ``interface='wsgi'`` the clients are threads going through the WSGI
+    handler; with ``'asgi'`` they are coroutines on one event loop calling
+    the project's ASGI application, as an ASGI server would.
+    """
+    host = host or default_host()
+    results = {}
+    for name, converters in url_names():
+        for role in roles:
+            label = f'{name} [{role}]'
+            if only and not any(part in label for part in only):
+                continue
+            if role != 'anonymous' and fixtures.user(role) is None:
+                continue
+
+            per_worker = max(1, requests // concurrency)
+            started = time.perf_counter()
+            if interface == 'asgi':
+                # Log every worker in up front, the session lives in the database
+                cookies = [session_cookie(fixtures.user(role), host) for _ in range(concurrency)]
+                # The query counts come back in the X-Query-Count header
+                with override_settings(QUERY_COUNT_HEADERS=True):
+                    samples = asyncio.run(_arun_workers(
+                        fixtures, name, converters, role, per_worker, warmup, host, seed, concurrency, cookies
+                    ))
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    futures = [
+                        pool.submit(_run_worker, fixtures, name, converters, role, per_worker, warmup, host, seed + worker)
+                        for worker in range(concurrency)
+                    ]
+                    samples = [sample for future in futures for sample in future.result()]
+            wall = time.perf_counter() - started
+
+            latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+            queries = [count for _, count, _ in samples if count is not None]
+            statuses = {}
+            for _, _, status in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+            result = {
+                'requests': len(samples),
+                'mean_ms': round(sum(latencies) / len(latencies), 3),
+                **{f'p{p}_ms': round(percentile(latencies, p), 3) for p in PERCENTILES},
+                'queries': round(sum(queries) / len(queries), 2) if queries else None,
+                'throughput_rps': round(len(samples) / wall, 1),
+                'statuses': statuses,
+            }
+            results[label] = result
+            if progress:
+                progress(label, result)
+    return results
+
+
+def save_baseline(path, results, **meta):
+    with open(path, 'w') as f:
+        json.dump({'created': timezone.now().isoformat(), **meta, 'results': results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, results, threshold=0.2):
+    """Return ``(rows, regressions)`` comparing ``results`` with a stored baseline.
+
+    A view regresses when its p95 latency grows by more than ``threshold``
+    (a fraction) or it runs more queries per request than before.
+    """
+    rows, regressions = [], []
+    for label, result in results.items():
+        before = baseline['results'].get(label)
+        if before is None:
+            continue
+        p95_change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+        query_change = (
+            result['queries'] - before['queries']
+            if result['queries'] is not None and before.get('queries') is not None else 0.0
+        )
+        rows.append((label, before, result, p95_change, query_change))
+        if p95_change > threshold or query_change > 0.5:
+            regressions.append(label)
+    return rows, regressions
+
+
+STRESS_READS = ('jobs:job_list', 'jobs:job_detail')
+STRESS_WRITES = ('jobs:save_job', 'jobs:unsave_job', 'jobs:apply_job')
+
+
+def copy_database(source, target):
+    """Copy the SQLite database ``source`` to ``target`` with the backup API."""
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        # Start every copy from the stock rollback journal; a profile that
+        # wants WAL switches to it when it connects
+        dst.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        src.close()
+        dst.close()
+
+
+def use_database(profile, name):
+    """Point the default database at the file ``name`` with the settings of ``profile``."""
+    connections.close_all()
+    settings_dict = connections['default'].settings_dict
+    settings_dict.update({
+        'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+        **copy.deepcopy(settings.DATABASE_PROFILES[profile]),
+        'NAME': name,
+    })
+
+
+def _stress_worker(profile, name, operations, user_id, job_ids, duration, host, seed):
+    use_database(profile, name)
+    # Failed requests are counted, not logged one by one
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    rng = random.Random(seed)
+    client = client_for(User.objects.get(pk=user_id) if user_id else None, host)
+    samples = []
+    # Anonymous pages would otherwise be served from the page cache
+    with override_settings(PAGE_CACHE_ENABLED=False, QUERY_BUDGETS={}):
+        started = time.time()
+        while time.time() < started + duration:
+            operation = rng.choice(operations)
+            kwargs = {} if operation == 'jobs:job_list' else {'job_id': rng.choice(job_ids)}
+            url = reverse(operation, kwargs=kwargs)
+            request_started = time.perf_counter()
+            if operation in STRESS_WRITES:
+                response = client.post(url, {'cover_letter': 'Stress test'})
+            else:
+                response = client.get(url)
+            samples.append((operation, time.perf_counter() - request_started, response.status_code))
+    connections.close_all()
+    return samples, started, time.time()
+
+
+def run_stress(profile, name, readers=8, writers=4, duration=10.0, host=None, seed=0):
+    """Run concurrent readers and writers against the database file ``name`` for ``duration`` seconds.
+
+    Every client is its own process, like the workers of an application
+    server, connecting with the settings of ``profile``. Readers are
+    anonymous and list and open jobs; each writer is a different job seeker
+    saving, unsaving and applying for jobs. Returns ``{operation: result}``
+    plus an ``'all'`` entry; ``errors`` counts 5xx responses, which is how
+    "database is locked" shows.
+    """
+    host = host or default_host()
+    rng = random.Random(seed)
+    job_ids = list(Job.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:100000])
+    if not job_ids:
+        raise ValueError('There are no active jobs; run "manage.py seed_data" first.')
+    job_ids = rng.sample(job_ids, min(200, len(job_ids)))
+    seeker_ids = list(
+        JobSeekerProfile.objects.order_by('id').values_list('user_profile__user_id', flat=True)[:writers]
+    )
+    if len(seeker_ids) < writers:
+        raise ValueError(f'Stressing with {writers} writers needs as many job seekers.')
+    clients = [(STRESS_READS, None)] * readers + [(STRESS_WRITES, user_id) for user_id in seeker_ids]
+    connections.close_all()
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(clients), mp_context=context, initializer=django.setup) as pool:
+        futures = [
+            pool.submit(_stress_worker, profile, name, operations, user_id, job_ids, duration, host, seed + i)
+            for i, (operations, user_id) in enumerate(clients)
+        ]
+        outcomes = [future.result() for future in futures]
+    samples = [sample for worker_samples, _, _ in outcomes for sample in worker_samples]
+    wall = max(ended for _, _, ended in outcomes) - min(started for _, started, _ in outcomes)
+
+    results = {}
+    for label in (*STRESS_READS, *STRESS_WRITES, 'all'):
+        selected = [(elapsed, status) for operation, elapsed, status in samples if label in (operation, 'all')]
+        latencies = sorted(elapsed * 1000 for elapsed, _ in selected)
+        if not latencies:
+            continue
+        results[label] = {
+            'requests': len(latencies),
+            **{f'p{p}_ms': round(percentile(latencies, p), 3) for p in PERCENTILES},
+            'throughput_rps': round(len(latencies) / wall, 1),
+            'errors': sum(status >= 500 for _, status in selected),
+        }
+    return results
@@ -0,0 +1,182 @@
+"""A cache backend on an SQLite file that every process on the host shares.
+
+The page cache's generation counters and render locks (see
+``main.page_cache``), and the card and facet caches keyed on them, only
+work when a bump made by one process is seen by all the others: other web
+workers, ``run_tasks``, ``import_jobs``, ``expire_jobs``. Django's
+local-memory cache is per process, and its file-based one lists the whole
+cache directory on every set and doesn't ``add`` atomically. Here each
+operation is a single statement on a WAL-mode SQLite file, so ``add`` and
+``incr`` are atomic across processes and readers never wait for writers.
+
+Integers are stored as SQLite integers so ``incr`` can add to them in
+place; everything else is pickled.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Sets between two checks of the number of entries.
+CULL_INTERVAL = 1000
+
+# Keys per statement, below SQLite's limit on bound parameters.
+BATCH_SIZE = 500
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cache_entry (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS cache_entry_expires_idx ON cache_entry (expires);
+'''
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Losing the last writes to a power cut is fine for a cache
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+
+_NOT_EXPIRED = '(expires IS NULL OR expires > ?)'
+
+
+def _dump(value):
+    # Not bools, which must come back as bools
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _load(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = str(location)
+        self._local = threading.local()
+        self._sets = 0
+
+    @property
+    def _db(self):
+        # One connection per thread, and a new one in a forked child
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.location, timeout=PRAGMAS['busy_timeout'] / 1000, isolation_level=None)
+            for name, value in PRAGMAS.items():
+                connection.execute(f'PRAGMA {name} = {value}')
+            connection.executescript(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires <= ?',
+            (key, _dump(value), self.get_backend_timeout(timeout), time.time()),
+        )
+        self._count_set()
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            f'SELECT value FROM cache_entry WHERE key = ? AND {_NOT_EXPIRED}', (key, time.time())
+        ).fetchone()
+        return default if row is None else _load(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = {}
+        now = time.time()
+        for batch in _batches(list(keys)):
+            rows = self._db.execute(
+                f'SELECT key, value FROM cache_entry WHERE key IN ({", ".join("?" * len(batch))}) AND {_NOT_EXPIRED}',
+                (*batch, now),
+            )
+            found.update((keys[key], _load(value)) for key, value in rows)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [(self.make_and_validate_key(key, version=version), _dump(value), expires) for key, value in data.items()]
+        db = self._db
+        with db:
+            db.execute('BEGIN')
+            db.executemany('INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)', rows)
+        self._count_set(len(rows))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            f'UPDATE cache_entry SET expires = ? WHERE key = ? AND {_NOT_EXPIRED}',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        row = self._db.execute(
+            f'UPDATE cache_entry SET value = value + ? '
+            f"WHERE key = ? AND typeof(value) = 'integer' AND {_NOT_EXPIRED} RETURNING value",
+            (delta, self.make_and_validate_key(key, version=version), time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute(
+            f'SELECT 1 FROM cache_entry WHERE key = ? AND {_NOT_EXPIRED}', (key, time.time())
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute('DELETE FROM cache_entry WHERE key = ?', (key,)).rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        for batch in _batches(keys):
+            self._db.execute(f'DELETE FROM cache_entry WHERE key IN ({", ".join("?" * len(batch))})', batch)
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache_entry')
+
+    def _count_set(self, count=1):
+        self._sets += count
+        if self._sets >= CULL_INTERVAL:
+            self._sets = 0
+            self._cull()
+
+    def _cull(self):
+        """Drop the expired entries and, past ``MAX_ENTRIES``, those expiring soonest."""
+        db = self._db
+        db.execute('DELETE FROM cache_entry WHERE expires <= ?', (time.time(),))
+        (entries,) = db.execute('SELECT COUNT(*) FROM cache_entry').fetchone()
+        if entries <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        # Entries that never expire, like the generation counters, go last
+        db.execute(
+            'DELETE FROM cache_entry WHERE key IN '
+            '(SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)',
+            (entries // self._cull_frequency,),
+        )
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+UNSHARED_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def check_page_cache_backend(app_configs, **kwargs):
+    """The page cache's generations must be shared by every process; see main.page_cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if settings.PAGE_CACHE_ENABLED and backend in UNSHARED_BACKENDS:
+        return [Warning(
+            f'PAGE_CACHE_ENABLED is on with {backend.rpartition(".")[2]} as the default cache.',
+            hint=(
+                'Page, card and facet cache invalidations and ETags made in one process are not seen by '
+                'the others, which serve stale pages. Use a cache shared by every process, such as '
+                'main.cache.SQLiteCache.'
+            ),
+            id='main.W001',
+        )]
+    return []
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every page of the main, jobs and accounts apps as each kind of user and report '
+        'p50/p95/p99 latency, queries per request and throughput. Run it against seeded data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per page and role.')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests sent first by each worker.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Number of clients requesting in parallel.')
+        parser.add_argument('--interface', choices=benchmark.INTERFACES, default='wsgi',
+                            help='Serve the requests through the WSGI handler (threads) or the ASGI handler '
+                                 '(coroutines). Save a baseline with one and --compare with the other to see the difference.')
+        parser.add_argument('--role', action='append', choices=benchmark.ROLES, dest='roles',
+                            help='Only benchmark as this kind of user (repeatable).')
+        parser.add_argument('--only', action='append',
+                            help='Only benchmark pages whose label contains this text (repeatable).')
+        parser.add_argument('--host', help='Host header sent with every request (default: the first ALLOWED_HOSTS entry).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--save', metavar='PATH', help='Store the results as a JSON baseline.')
+        parser.add_argument('--compare', metavar='PATH', help='Compare the results with a stored baseline.')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Allowed p95 slowdown in percent before --compare fails.')
+
+    def handle(self, *args, **options):
+        try:
+            fixtures = benchmark.Fixtures(options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'{"page":<50} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8} {"req/s":>8}  statuses'
+        )
+        results = benchmark.run_benchmark(
+            fixtures,
+            requests=options['requests'],
+            warmup=options['warmup'],
+            concurrency=options['concurrency'],
+            roles=options['roles'] or benchmark.ROLES,
+            only=options['only'],
+            host=options['host'],
+            seed=options['seed'],
+            progress=self.report,
+            interface=options['interface'],
+        )
+
+        if options['save']:
+            benchmark.save_baseline(
+                options['save'], results,
+                requests=options['requests'], concurrency=options['concurrency'], interface=options['interface'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline to {options["save"]}.'))
+
+        if options['compare']:
+            baseline = benchmark.load_baseline(options['compare'])
+            rows, regressions = benchmark.compare(baseline, results, options['threshold'] / 100)
+            self.stdout.write(
+                f'\nCompared with {options["compare"]} ({baseline.get("interface", "wsgi")}, '
+                f'{baseline.get("created", "unknown date")}):'
+            )
+            for label, before, after, p95_change, query_change in rows:
+                line = (
+                    f'{label:<50} p95 {before["p95_ms"]:.1f} -> {after["p95_ms"]:.1f}ms ({p95_change:+.0%}), '
+                    f'queries {before.get("queries")} -> {after["queries"]}, '
+                    f'{before.get("throughput_rps")} -> {after["throughput_rps"]} req/s'
+                )
+                self.stdout.write(self.style.ERROR(line) if label in regressions else line)
+            if regressions:
+                raise CommandError(f'{len(regressions)} pages regressed: {", ".join(regressions)}')
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def report(self, label, result):
+        statuses = ' '.join(f'{status}x{count}' for status, count in sorted(result['statuses'].items()))
+        line = (
+            f'{label:<50} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} {result["p99_ms"]:>8.1f} '
+            f'{result["queries"] if result["queries"] is not None else "-":>8} {result["throughput_rps"]:>8.1f}  {statuses}'
+        )
+        self.stdout.write(self.style.ERROR(line) if any(s.startswith('5') for s in result['statuses']) else line)
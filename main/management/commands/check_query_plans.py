@@ -0,0 +1,140 @@
+import random
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from jobs.models import JobCategory
+from main import benchmark
+
+# Lookup tables small enough that reading them whole is the right plan.
+SMALL_TABLES = {
+    'jobs_jobcategory', 'jobs_jobfacetcount', 'jobs_skill', 'main_sitestatistics', 'django_content_type',
+}
+
+# Extra query strings requested for these views, on top of the bare URL.
+QUERY_STRINGS = {
+    'jobs:job_list': [
+        '?category={category}', '?job_type=full_time&experience_level=mid', '?remote_work=on',
+        '?location=Nairobi', '?query=python', '?skills=python,sql&skills_match=all',
+    ],
+}
+
+_CURSOR_RE = re.compile(r'[?&;]cursor=([\w-]+)')
+_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+_TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|RIGHT PART OF ORDER BY)')
+_ROWID_LOOKUP_RE = re.compile(r'^SEARCH \w+ USING INTEGER PRIMARY KEY \(rowid=\?\)$')
+
+
+def plan_problems(rows, tables):
+    """Return the full table scans and temp B-tree sorts in an EXPLAIN QUERY PLAN.
+
+    ``rows`` are ``(id, parent, notused, detail)`` tuples. Sorting is fine
+    when the rows being sorted were fetched by rowid from an ``IN (...)``
+    list, as for full-text or skill matches ordered by rank: the sort is
+    bounded by the number of matches rather than by the table.
+    """
+    # Query levels whose first table is read by rowid from a LIST SUBQUERY
+    first_access = {}
+    list_subqueries = set()
+    for _, parent, _, detail in rows:
+        if detail.startswith(('SCAN ', 'SEARCH ')):
+            first_access.setdefault(parent, detail)
+        elif detail.startswith('LIST SUBQUERY'):
+            list_subqueries.add(parent)
+    rowid_lookups = {
+        parent for parent, detail in first_access.items()
+        if parent in list_subqueries and _ROWID_LOOKUP_RE.match(detail)
+    }
+    problems = []
+    for _, parent, _, detail in rows:
+        match = _SCAN_RE.match(detail)
+        if match and match.group(1) in tables and match.group(1) not in SMALL_TABLES:
+            problems.append(detail)
+        elif _TEMP_SORT_RE.search(detail) and parent not in rowid_lookups:
+            problems.append(detail)
+    return problems
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN QUERY PLAN on every query the pages issue and fail if any of them '
+        'scans a whole table or sorts through a temporary B-tree. Run it against seeded data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', action='append',
+                            help='Only check pages whose label contains this text (repeatable).')
+        parser.add_argument('--host', help='Host header sent with every request.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN checks are only implemented for SQLite.')
+        try:
+            fixtures = benchmark.Fixtures(options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        host = options['host'] or benchmark.default_host()
+        rng = random.Random(options['seed'])
+        category = JobCategory.objects.order_by('id').values_list('id', flat=True).first() or ''
+        tables = set(connection.introspection.table_names())
+        failures = 0
+        checked = 0
+
+        for name, converters in benchmark.url_names():
+            for role in benchmark.ROLES:
+                label = f'{name} [{role}]'
+                if options['only'] and not any(part in label for part in options['only']):
+                    continue
+                if role != 'anonymous' and fixtures.user(role) is None:
+                    continue
+
+                client = benchmark.client_for(fixtures.user(role), host)
+                base = fixtures.url(name, converters, role, rng)
+                urls = [base] + [base + qs.format(category=category) for qs in QUERY_STRINGS.get(name, [])]
+
+                statements = {}
+                while urls:
+                    url = urls.pop(0)
+                    recorder = StatementRecorder()
+                    # Cached pages would hide the queries behind them
+                    with override_settings(PAGE_CACHE_ENABLED=False), connection.execute_wrapper(recorder):
+                        response = client.get(url)
+                        # Streamed responses run their queries while being read
+                        content = b''.join(response.streaming_content) if response.streaming else response.content
+                    for sql, params in recorder.statements:
+                        statements.setdefault(sql, (url, params))
+                    # Also check the second page of cursor-paginated lists
+                    next_page = _CURSOR_RE.search(content.decode(errors='ignore'))
+                    if next_page and 'cursor=' not in url:
+                        urls.append(f'{url}{"&" if "?" in url else "?"}cursor={next_page.group(1)}')
+
+                for sql, (url, params) in statements.items():
+                    checked += 1
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                        rows = cursor.fetchall()
+                    problems = plan_problems(rows, tables)
+                    if problems:
+                        failures += 1
+                        self.stdout.write(self.style.ERROR(f'{label} {url}'))
+                        self.stdout.write(f'  {sql}')
+                        for *_, detail in rows:
+                            self.stdout.write(f'    {"!" if detail in problems else " "} {detail}')
+
+        if failures:
+            raise CommandError(f'{failures} of {checked} queries scan a whole table or sort in a temp B-tree.')
+        self.stdout.write(self.style.SUCCESS(f'All {checked} queries use an index.'))
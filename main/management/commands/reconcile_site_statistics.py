@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from main import page_cache, stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the home page statistics and report any drift from the stored values.'
+
+    def handle(self, *args, **options):
+        stored, computed = stats.reconcile()
+        page_cache.bump('jobs')
+        if stored is None:
+            self.stdout.write('No statistics were stored yet.')
+        else:
+            for field in ('active_jobs', 'active_companies', 'categories'):
+                before, after = getattr(stored, field), getattr(computed, field)
+                if before != after:
+                    self.stdout.write(self.style.WARNING(f'{field}: {before} -> {after}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{computed.active_jobs} active jobs, {computed.active_companies} active companies, '
+            f'{len(computed.categories)} categories.'
+        ))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from main import background
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks: notification emails, recommendation refreshes and resume extraction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--executor', choices=background.EXECUTORS, default='thread',
+                            help='Run batches on a thread pool, a process pool or in this thread.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Batches run at the same time.')
+        parser.add_argument('--batch-size', type=int, default=background.DEFAULT_BATCH_SIZE,
+                            help='Most tasks of one kind handed to a batch task at once.')
+        parser.add_argument('--lease-seconds', type=int, default=int(background.DEFAULT_LEASE.total_seconds()),
+                            help='Time a batch may run before another worker takes it over.')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+        parser.add_argument('--prune-days', type=int, default=None,
+                            help='First delete tasks that finished more than this many days ago.')
+
+    def handle(self, *args, **options):
+        if options['prune_days'] is not None:
+            deleted = background.prune(timedelta(days=options['prune_days']))
+            self.stdout.write(f'Pruned {deleted} finished tasks.')
+
+        def report(name, tasks, error):
+            if error is None:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{name}: {len(tasks)} done')
+            else:
+                self.stderr.write(f'{name}: {len(tasks)} failed\n{error}')
+
+        background.run_worker(
+            executor=options['executor'],
+            concurrency=options['concurrency'],
+            batch_size=options['batch_size'],
+            lease=timedelta(seconds=options['lease_seconds']),
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            on_finish=report,
+        )
@@ -0,0 +1,284 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import EmployerProfile, JobSeekerProfile, UserProfile
+from jobs import counters, facets, recommendations, search, shards
+from jobs.models import Job, JobApplication, JobCategory, SavedJob
+from jobs.skills import sync_job_skills, sync_seeker_skills
+from main import page_cache, stats
+
+CATEGORIES = [
+    'Engineering', 'Design', 'Product', 'Marketing', 'Sales', 'Finance',
+    'Operations', 'Customer Support', 'Human Resources', 'Data Science', 'Legal', 'Healthcare',
+]
+
+SKILLS = [
+    'python', 'django', 'flask', 'sql', 'postgresql', 'javascript', 'typescript', 'react',
+    'vue', 'node.js', 'java', 'spring', 'go', 'rust', 'c#', '.net', 'php', 'laravel',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'linux', 'git',
+    'figma', 'photoshop', 'excel', 'tableau', 'power bi', 'machine learning', 'pandas',
+    'seo', 'copywriting', 'salesforce', 'accounting', 'project management', 'scrum', 'communication',
+]
+
+ROLES = [
+    'Software Engineer', 'Backend Developer', 'Frontend Developer', 'Data Analyst', 'Data Scientist',
+    'DevOps Engineer', 'Product Manager', 'UX Designer', 'Marketing Manager', 'Sales Representative',
+    'Accountant', 'Support Specialist', 'Recruiter', 'QA Engineer', 'Business Analyst',
+]
+
+LOCATIONS = [
+    'Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Kampala', 'Kigali',
+    'Dar es Salaam', 'Lagos', 'Accra', 'Johannesburg', 'Cape Town', 'Cairo', 'London', 'Berlin',
+]
+
+COMPANY_WORDS = ['Blue', 'Tech', 'Savanna', 'Labs', 'Digital', 'Works', 'Capital', 'Systems', 'Cloud', 'Health']
+
+COMPANY_SIZES = ['1-10', '11-50', '51-200', '201-500', '500+']
+
+EDUCATION = ['High School Diploma', 'Diploma in IT', 'BSc Computer Science', 'BCom Finance', 'MSc Data Science', 'MBA']
+
+SEED_PASSWORD = 'password'
+
+# Timestamps are spread over this many days before now.
+HISTORY_DAYS = 365
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the auto_now/auto_now_add values set on each row."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed the database with a reproducible synthetic job board using bulk inserts. '
+        'Production-scale example: --jobs 1000000 --applications 5000000.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employers', type=int, default=500)
+        parser.add_argument('--seekers', type=int, default=5000)
+        parser.add_argument('--jobs', type=int, default=20000)
+        parser.add_argument('--applications', type=int, default=100000)
+        parser.add_argument('--saved-jobs', type=int, default=50000)
+        parser.add_argument('--inactive-ratio', type=float, default=0.1,
+                            help='Share of jobs created inactive.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of the generated users.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--recommendations', action='store_true',
+                            help='Also precompute every seeker\'s recommendations afterwards.')
+
+    def handle(self, *args, **options):
+        if options['employers'] < 1 and options['jobs']:
+            raise CommandError('Jobs need at least one employer.')
+        if User.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(
+                f"Users prefixed '{options['prefix']}-' already exist. "
+                'Run "manage.py flush" first or pass another --prefix.'
+            )
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.password = make_password(SEED_PASSWORD)
+
+        categories = self.step('categories', self.create_categories)
+        employer_ids = self.step('employers', self.create_users, 'employer', options['employers'])
+        seeker_ids = self.step('job seekers', self.create_users, 'job_seeker', options['seekers'])
+        job_ids = self.step('jobs', self.create_jobs, options['jobs'], employer_ids, categories, options['inactive_ratio'])
+        self.step('applications', self.create_applications, options['applications'], seeker_ids, job_ids)
+        self.step('saved jobs', self.create_saved_jobs, options['saved_jobs'], seeker_ids, job_ids)
+
+        if search.fts_enabled():
+            self.step('search index', self.rebuild_search_index)
+        self.step('facet counts', facets.rebuild)
+        self.step('application counts', counters.repair)
+        self.step('site statistics', stats.reconcile)
+        page_cache.bump('jobs', 'companies', 'categories')
+        if options['recommendations']:
+            self.step('recommendations', recommendations.refresh_recommendations, full=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(employer_ids)} employers, {len(seeker_ids)} job seekers and {len(job_ids)} jobs. '
+            f'Every seeded user\'s password is "{SEED_PASSWORD}".'
+        ))
+
+    def step(self, label, func, *args, **kwargs):
+        self.stdout.write(f'Seeding {label}...', ending='')
+        self.stdout.flush()
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stdout.write(f' {time.perf_counter() - started:.1f}s')
+        return result
+
+    def past(self, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 24 * 60 * 60))
+
+    def create_categories(self):
+        JobCategory.objects.bulk_create(
+            [JobCategory(name=name, description=f'{name} roles') for name in CATEGORIES],
+            ignore_conflicts=True,
+        )
+        return list(JobCategory.objects.filter(name__in=CATEGORIES).values_list('id', flat=True))
+
+    def create_users(self, user_type, count):
+        """Create ``count`` users with their UserProfile and role profile; returns the role profile ids."""
+        kind = 'employer' if user_type == 'employer' else 'seeker'
+        profile_ids = []
+        created_at = UserProfile._meta.get_field('created_at')
+        for start in range(0, count, self.batch_size):
+            numbers = range(start, min(start + self.batch_size, count))
+            with transaction.atomic(), explicit_timestamps(created_at):
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'{self.prefix}-{kind}-{n}',
+                        email=f'{kind}{n}@example.com',
+                        first_name=kind.title(),
+                        last_name=str(n),
+                        password=self.password,
+                        date_joined=self.past(),
+                    )
+                    for n in numbers
+                ])
+                user_profiles = UserProfile.objects.bulk_create([
+                    UserProfile(
+                        user=user,
+                        user_type=user_type,
+                        phone=f'+2547{self.rng.randrange(10 ** 8):08d}',
+                        location=self.rng.choice(LOCATIONS),
+                        created_at=user.date_joined,
+                    )
+                    for user in users
+                ])
+                if user_type == 'employer':
+                    profiles = EmployerProfile.objects.bulk_create([
+                        EmployerProfile(
+                            user_profile=user_profile,
+                            company_name=f'{" ".join(self.rng.sample(COMPANY_WORDS, 2))} {n}',
+                            company_description='A growing company hiring across the region.',
+                            website=f'https://company{n}.example.com',
+                            company_size=self.rng.choice(COMPANY_SIZES),
+                        )
+                        for n, user_profile in zip(numbers, user_profiles)
+                    ])
+                else:
+                    profiles = JobSeekerProfile.objects.bulk_create([
+                        JobSeekerProfile(
+                            user_profile=user_profile,
+                            skills=', '.join(self.rng.sample(SKILLS, self.rng.randint(2, 8))),
+                            experience_years=self.rng.choice([0, 1, 2, 3, 4, 5, 7, 10, 15]),
+                            education=self.rng.choice(EDUCATION),
+                        )
+                        for user_profile in user_profiles
+                    ])
+                    sync_seeker_skills(*profiles)
+            profile_ids.extend(profile.pk for profile in profiles)
+        return profile_ids
+
+    def create_jobs(self, count, employer_ids, categories, inactive_ratio):
+        job_ids = []
+        timestamps = (Job._meta.get_field('created_at'), Job._meta.get_field('updated_at'))
+        for start in range(0, count, self.batch_size):
+            jobs = []
+            for _ in range(start, min(start + self.batch_size, count)):
+                role = self.rng.choice(ROLES)
+                skills = self.rng.sample(SKILLS, self.rng.randint(3, 6))
+                salary_min = self.rng.randrange(20, 200) * 1000
+                created_at = self.past()
+                jobs.append(Job(
+                    title=f'{self.rng.choice(["", "Junior ", "Senior ", "Lead "])}{role}',
+                    company_id=self.rng.choice(employer_ids),
+                    category_id=self.rng.choice(categories) if self.rng.random() > 0.05 else None,
+                    description=f'We are looking for a {role} with experience in {", ".join(skills)}.',
+                    requirements=f'{self.rng.randint(1, 8)}+ years of experience with {skills[0]}.',
+                    job_type=self.rng.choices([choice for choice, _ in Job.JOB_TYPES], weights=[60, 10, 15, 10, 5])[0],
+                    experience_level=self.rng.choice([choice for choice, _ in Job.EXPERIENCE_LEVELS]),
+                    salary_min=Decimal(salary_min) if self.rng.random() > 0.3 else None,
+                    salary_max=Decimal(salary_min + self.rng.randrange(5, 80) * 1000) if self.rng.random() > 0.3 else None,
+                    location=self.rng.choice(LOCATIONS),
+                    remote_work=self.rng.random() < 0.25,
+                    skills_required=', '.join(skills),
+                    application_deadline=(created_at + timedelta(days=self.rng.randint(14, 90))).date(),
+                    is_active=self.rng.random() >= inactive_ratio,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            with transaction.atomic(), explicit_timestamps(*timestamps):
+                Job.objects.bulk_create(jobs)
+                sync_job_skills(*jobs)
+            job_ids.extend(job.pk for job in jobs)
+        return job_ids
+
+    def _pairs(self, count, seeker_ids, job_ids):
+        """Yield ``count`` distinct (seeker id, job id) pairs spread evenly over the seekers."""
+        if not seeker_ids or not job_ids:
+            return
+        per_seeker, extra = divmod(count, len(seeker_ids))
+        for index, seeker_id in enumerate(seeker_ids):
+            wanted = min(per_seeker + (index < extra), len(job_ids))
+            for job_id in self.rng.sample(job_ids, wanted):
+                yield seeker_id, job_id
+
+    def _bulk_insert(self, rows, model, timestamps):
+        batch = []
+        with explicit_timestamps(*timestamps):
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    shards.bulk_create(model, batch)
+                    batch = []
+            if batch:
+                shards.bulk_create(model, batch)
+
+    def create_applications(self, count, seeker_ids, job_ids):
+        statuses = [choice for choice, _ in JobApplication.STATUS_CHOICES]
+
+        def rows():
+            for seeker_id, job_id in self._pairs(count, seeker_ids, job_ids):
+                applied_at = self.past()
+                yield JobApplication(
+                    job_id=job_id,
+                    applicant_id=seeker_id,
+                    cover_letter='I would love to join your team.',
+                    status=self.rng.choices(statuses, weights=[50, 20, 10, 5, 15])[0],
+                    applied_at=applied_at,
+                    updated_at=applied_at,
+                )
+
+        self._bulk_insert(rows(), JobApplication, (
+            JobApplication._meta.get_field('applied_at'), JobApplication._meta.get_field('updated_at'),
+        ))
+
+    def create_saved_jobs(self, count, seeker_ids, job_ids):
+        rows = (
+            SavedJob(job_id=job_id, job_seeker_id=seeker_id, saved_at=self.past())
+            for seeker_id, job_id in self._pairs(count, seeker_ids, job_ids)
+        )
+        self._bulk_insert(rows, SavedJob, (SavedJob._meta.get_field('saved_at'),))
+
+    def rebuild_search_index(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            search.rebuild_index(cursor)
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from main import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer a copy of the database with concurrent readers and writers (saving, unsaving and applying '
+        'for jobs) under each connection profile in DATABASE_PROFILES, and report latency, throughput and '
+        'failed requests. Run it against seeded data; the database itself is not modified.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles', choices=sorted(settings.DATABASE_PROFILES),
+                            help='Profile to run (repeatable; default: all of them).')
+        parser.add_argument('--readers', type=int, default=8, help='Threads browsing the job list and job pages.')
+        parser.add_argument('--writers', type=int, default=4, help='Threads saving, unsaving and applying for jobs.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds each profile runs for.')
+        parser.add_argument('--host', help='Host header sent with every request (default: the first ALLOWED_HOSTS entry).')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        source = connections['default'].settings_dict['NAME']
+        summary = []
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options['profiles'] or sorted(settings.DATABASE_PROFILES):
+                name = os.path.join(directory, f'{profile}.sqlite3')
+                benchmark.copy_database(source, name)
+                try:
+                    results = benchmark.run_stress(
+                        profile, name, readers=options['readers'], writers=options['writers'],
+                        duration=options['duration'], host=options['host'], seed=options['seed'],
+                    )
+                except ValueError as e:
+                    raise CommandError(str(e))
+
+                self.stdout.write(f'\n{profile}')
+                self.stdout.write(f'{"operation":<20} {"requests":>9} {"p50":>8} {"p95":>8} {"p99":>8} {"req/s":>8} {"errors":>7}')
+                for label, result in results.items():
+                    self.stdout.write(
+                        f'{label:<20} {result["requests"]:>9} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                        f'{result["p99_ms"]:>8.1f} {result["throughput_rps"]:>8.1f} {result["errors"]:>7}'
+                    )
+                summary.append((profile, results['all']))
+
+        self.stdout.write('')
+        for profile, result in summary:
+            self.stdout.write(
+                f'{profile}: {result["throughput_rps"]} req/s, p99 {result["p99_ms"]:.1f} ms, '
+                f'{result["errors"]} of {result["requests"]} requests failed'
+            )
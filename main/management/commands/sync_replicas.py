@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main import replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary database to the read replicas listed in JOBBOARD_DATABASE_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Replicas to sync; defaults to all of them.')
+        parser.add_argument('--interval', type=float, default=None,
+                            help=f'Keep running, syncing every this many seconds. Keep it well under '
+                                 f'REPLICA_MAX_LAG ({settings.REPLICA_MAX_LAG}s) or the replicas go unused.')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(f'Not a replica: {", ".join(sorted(unknown))}')
+        if not aliases:
+            raise CommandError('No replicas are configured; set JOBBOARD_DATABASE_REPLICAS.')
+        while True:
+            start = time.perf_counter()
+            replicas.sync_replicas(aliases)
+            if options['interval'] is None or options['verbosity'] > 1:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Synced {", ".join(aliases)} in {(time.perf_counter() - start) * 1000:.0f}ms.'
+                ))
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
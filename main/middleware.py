@@ -0,0 +1,155 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import replicas
+
+logger = logging.getLogger('main.queries')
+
+_current_stats = contextvars.ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    """Counts the SQL run while it is installed as a database execute wrapper.
+
+    Statements are grouped by their SQL text with the parameters left out, so
+    the same query issued once per row of a list shows up as a duplicate.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+        self.view_name = None
+        self.budget = None
+        # Async views run queries from several threads; see main.parallel
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.time += elapsed
+                self.count += 1
+                self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return {sql: count for sql, count in self.statements.items() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.duplicates.values())
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+
+def current_query_stats():
+    """The ``QueryStats`` of the current request, or ``None``."""
+    return _current_stats.get()
+
+
+def get_query_budget(view_name, method):
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """Record the queries of every request and check them against QUERY_BUDGETS.
+
+    The stats are left on ``request.query_stats``. Views that go over their
+    budget are logged as warnings on the ``main.queries`` logger, and with
+    ``QUERY_COUNT_HEADERS`` enabled the counters are also sent back as
+    ``X-Query-*`` response headers.
+
+    It is deliberately synchronous. Execute wrappers belong to one thread's
+    connections, and under ASGI Django runs a sync middleware in the thread
+    that the async views below it also use for their queries. The queries
+    ``main.parallel`` runs in other threads find the stats through
+    ``current_query_stats``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        request.query_stats = stats
+        token = _current_stats.set(stats)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        stats.view_name = match.view_name if match else None
+        stats.budget = get_query_budget(stats.view_name, request.method)
+
+        if stats.over_budget:
+            logger.warning(
+                '%s ran %d queries (budget %d, %d duplicated) in %.1fms',
+                stats.view_name, stats.count, stats.budget, stats.duplicate_count, stats.time * 1000,
+                extra={'duplicates': stats.duplicates},
+            )
+        else:
+            logger.debug(
+                '%s ran %d queries (%d duplicated) in %.1fms',
+                stats.view_name, stats.count, stats.duplicate_count, stats.time * 1000,
+            )
+
+        if getattr(settings, 'QUERY_COUNT_HEADERS', False):
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time'] = f'{stats.time * 1000:.1f}ms'
+            response['X-Query-Duplicates'] = str(stats.duplicate_count)
+            if stats.budget is not None:
+                response['X-Query-Budget'] = str(stats.budget)
+        return response
+
+
+class ReplicaMiddleware:
+    """Track where each request reads from and whether it wrote; see ``main.replicas``.
+
+    A request that wrote pins its visitor to the primary until the replicas
+    catch up, so it must run inside ``SessionMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replicas.start_request()
+        try:
+            return self.get_response(request)
+        finally:
+            replicas.finish_request(request, token)
+
+    async def __acall__(self, request):
+        token = replicas.start_request()
+        try:
+            return await self.get_response(request)
+        finally:
+            replicas.finish_request(request, token)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_jobs', models.PositiveIntegerField(default=0)),
+                ('active_companies', models.PositiveIntegerField(default=0)),
+                ('categories', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Site statistics',
+            },
+        ),
+    ]
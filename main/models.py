@@ -1,3 +1,70 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class SiteStatistics(models.Model):
+    """Single-row summary of the active job set shown on the home page.
+
+    Kept up to date incrementally by the signals in ``main.signals``; run
+    ``reconcile_site_statistics`` to repair any drift.
+    """
+    active_jobs = models.PositiveIntegerField(default=0)
+    active_companies = models.PositiveIntegerField(default=0)
+    # {"<category id>": {"name": ..., "count": ...}} for categories with active jobs
+    categories = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Site statistics"
+
+    def __str__(self):
+        return f"{self.active_jobs} active jobs at {self.active_companies} companies"
+
+
+class Task(models.Model):
+    """A unit of deferred work for the ``run_tasks`` worker; see ``main.background``."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    # Enqueueing a key that is already in the table does nothing, also after
+    # the first task ran; rows are only removed by pruning
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # When a queued task may run. A claimed task is leased until this time,
+    # after which another worker takes it over
+    run_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class ReplicaHeartbeat(models.Model):
+    """When ``sync_replicas`` last started copying the primary; see ``main.replicas``.
+
+    A replica's copy of this single row says how far behind the primary it is.
+    """
+    beat_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Replicas synced at {self.beat_at}"
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from .replicas import current_replica
+
+GENERATION_KEY = 'page:generation:{}'
+LOCK_TIMEOUT = 10
+
+# How long a request that lost the race for a render lock waits for the
+# winner's page before rendering it itself, without storing the result.
+# Locks and generations span processes as long as the cache is shared by
+# all of them, as main.cache is (see main.checks).
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _seed():
+    # A fresh counter starts from the clock rather than from 1, so a counter
+    # that was evicted never comes back at a value old pages were stored under.
+    return time.time_ns() // 1000
+
+
+def get_generations(names):
+    """Current generation of each name, in order, with one cache round trip."""
+    keys = [GENERATION_KEY.format(name) for name in names]
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        for key in missing:
+            cache.add(key, _seed(), None)
+        generations.update(cache.get_many(missing))
+    return [generations.get(key, 0) for key in keys]
+
+
+async def aget_generations(names):
+    """Async version of ``get_generations``."""
+    keys = [GENERATION_KEY.format(name) for name in names]
+    generations = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, _seed(), None)
+        generations.update(await cache.aget_many(missing))
+    return [generations.get(key, 0) for key in keys]
+
+
+def bump(*names):
+    """Invalidate every cached page that depends on any of ``names``."""
+    for name in names:
+        key = GENERATION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed(), None)
+
+
+def normalized_url(request):
+    """The path and query string with parameters sorted and empty ones dropped.
+
+    ``?b=2&a=1&c=`` and ``?a=1&b=2`` normalize to the same URL.
+    """
+    params = sorted(
+        (name, value) for name, values in request.GET.lists() for value in values if value != ''
+    )
+    return request.path + '?' + '&'.join(f'{name}={value}' for name, value in params)
+
+
+def page_key(request, view_name, generations):
+    """Cache key for a page: the view, its dependency generations and the normalized URL."""
+    digest = hashlib.sha1(normalized_url(request).encode()).hexdigest()
+    return f'page:{view_name}:{".".join(map(str, generations))}:{digest}'
+
+
+def page_etag(request, *parts):
+    """ETag for a page built from ``parts``, as seen by the current visitor.
+
+    Every page shows the visitor's name and role in the navigation bar, so
+    those are part of the tag. Returns ``None`` while flash messages are
+    pending, since they are shown once and must not be skipped by a 304.
+    """
+    if len(get_messages(request)):
+        return None
+    if request.user.is_authenticated:
+        viewer = f'{request.user.pk}:{request.profile.user_type}'
+    else:
+        viewer = 'anonymous'
+    return hashlib.sha1('|'.join(map(str, (viewer, *parts))).encode()).hexdigest()
+
+
+def is_cacheable_request(request):
+    return (
+        settings.PAGE_CACHE_ENABLED
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def is_cacheable_response(request, response):
+    # A page that asked for a CSRF token embeds it, and the token belongs to
+    # this visitor's cookie only.
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def page_timeout():
+    # A page rendered from a replica may already be behind the primary, and
+    # a generation bumped meanwhile would keep it; don't keep it for longer
+    # than replicas may lag
+    if current_replica() is not None:
+        return min(settings.PAGE_CACHE_TIMEOUT, settings.REPLICA_MAX_LAG)
+    return settings.PAGE_CACHE_TIMEOUT
+
+
+def _from_cache(entry, status):
+    content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = status
+    return response
+
+
+def cache_anonymous_page(*depends_on):
+    """Serve anonymous GETs of the decorated view from the cache.
+
+    ``depends_on`` names the generation counters the page is built from;
+    they may reference the view's keyword arguments, e.g. ``'job:{job_id}'``.
+    Bumping any of them (see ``bump``) makes every page built from the old
+    value unreachable, so entries never need to be deleted and the timeout
+    (``settings.PAGE_CACHE_TIMEOUT``) only bounds memory.
+
+    Only one request renders a missing page at a time: the others wait
+    briefly for its result instead of all running the same queries. Works
+    for both sync and async views.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                await request.profile.aload()
+                if not is_cacheable_request(request):
+                    return await view_func(request, *args, **kwargs)
+
+                names = [name.format(**kwargs) for name in depends_on]
+                key = page_key(request, request.resolver_match.view_name, await aget_generations(names))
+                entry = await cache.aget(key)
+                if entry is not None:
+                    return _from_cache(entry, 'hit')
+
+                lock_key = f'{key}:lock'
+                if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+                    deadline = time.monotonic() + LOCK_WAIT
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(LOCK_POLL_INTERVAL)
+                        found = await cache.aget_many([key, lock_key])
+                        if key in found:
+                            return _from_cache(found[key], 'hit')
+                        if lock_key not in found:
+                            break
+                    response = await view_func(request, *args, **kwargs)
+                    response['X-Page-Cache'] = 'miss'
+                    return response
+
+                try:
+                    response = await view_func(request, *args, **kwargs)
+                    if is_cacheable_response(request, response):
+                        await cache.aset(key, (response.content, response['Content-Type']), page_timeout())
+                finally:
+                    await cache.adelete(lock_key)
+                response['X-Page-Cache'] = 'miss'
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            names = [name.format(**kwargs) for name in depends_on]
+            key = page_key(request, request.resolver_match.view_name, get_generations(names))
+            entry = cache.get(key)
+            if entry is not None:
+                return _from_cache(entry, 'hit')
+
+            lock_key = f'{key}:lock'
+            if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+                deadline = time.monotonic() + LOCK_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    found = cache.get_many([key, lock_key])
+                    if key in found:
+                        return _from_cache(found[key], 'hit')
+                    if lock_key not in found:
+                        # The render finished without a cacheable page
+                        break
+                response = view_func(request, *args, **kwargs)
+                response['X-Page-Cache'] = 'miss'
+                return response
+
+            try:
+                response = view_func(request, *args, **kwargs)
+                if is_cacheable_response(request, response):
+                    cache.set(key, (response.content, response['Content-Type']), page_timeout())
+            finally:
+                cache.delete(lock_key)
+            response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(etag_func):
+    """``condition(etag_func=...)`` that also works for async views.
+
+    Django calls the ETag function inline, which async code cannot do when
+    it queries the database; for async views it runs in a thread instead.
+    """
+    def decorator(view_func):
+        if not iscoroutinefunction(view_func):
+            return condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            await request.profile.aload()
+            etag = await sync_to_async(etag_func)(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
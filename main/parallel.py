@@ -0,0 +1,72 @@
+"""Run an async view's independent queries at the same time.
+
+``sync_to_async`` runs every call of a request in one thread, the one
+Django's async ORM uses as well, so ``asyncio.gather`` over such calls still
+runs their queries one after another. ``run_in_parallel`` runs each call in
+a pool thread with its own connections instead, like ``jobs.shards.fan_out``,
+and counts its queries in the request's ``QueryBudgetMiddleware`` stats.
+
+Another thread can't see the writes of a transaction that is still open,
+so inside one (as in a ``TestCase``) the calls run one after another in the
+request's thread. So they do with ``settings.PARALLEL_QUERY_WORKERS`` at 0.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .middleware import current_query_stats
+
+_lock = threading.Lock()
+
+_executor = None
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+def _one_after_another(calls):
+    return [call() for call in calls]
+
+
+def _counted(call):
+    stats = current_query_stats()
+    with ExitStack() as stack:
+        if stats is not None:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+        return call()
+
+
+def _in_pool(context, call):
+    # Pool threads live long; treat each call like a request
+    close_old_connections()
+    try:
+        return context.run(_counted, call)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.PARALLEL_QUERY_WORKERS, thread_name_prefix='queries')
+    return _executor
+
+
+async def run_in_parallel(*calls):
+    """Run the sync callables ``calls`` at the same time; returns their results in order."""
+    if len(calls) < 2 or not settings.PARALLEL_QUERY_WORKERS or await sync_to_async(_in_transaction)():
+        return await sync_to_async(_one_after_another)(calls)
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, _in_pool, contextvars.copy_context(), call) for call in calls
+    ))
@@ -0,0 +1,179 @@
+"""Read replicas for the read-only pages.
+
+Views decorated with ``@read_from_replica`` run their queries against one of
+``settings.DATABASE_REPLICAS``: SQLite copies of the primary that
+``manage.py sync_replicas`` refreshes with the backup API. Every other view,
+and every write, uses the primary ``default`` database.
+
+Replicas lag behind the primary. Each sync first stamps the primary's
+``ReplicaHeartbeat``, so a replica's copy of it says how old the replica is,
+and one older than ``settings.REPLICA_MAX_LAG`` seconds is skipped. After a
+request writes, its session remembers when, and that visitor reads from the
+primary until a replica has been synced since: everyone sees their own
+changes at once.
+"""
+import contextvars
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+
+from .models import ReplicaHeartbeat
+
+HEARTBEAT_ID = 1
+
+SESSION_KEY = '_replica_last_write'
+
+# Always read from, and never pin a visitor to, the primary. The session
+# decides whether a replica may be used at all, and a changed password must
+# end the other sessions at once.
+PRIMARY_ONLY_APPS = {'sessions', 'auth'}
+
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+# alias -> (monotonic time of the check, heartbeat timestamp or None)
+_heartbeats = {}
+
+
+class Routing:
+    """Where the current request reads from, and whether it has written."""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def current_replica():
+    """The replica the current request reads from, or ``None``."""
+    routing = _routing.get()
+    return routing.replica if routing is not None else None
+
+
+def replica_heartbeat(alias):
+    """When ``alias`` was last synced, as a timestamp; ``None`` if it can't be read.
+
+    Each process rereads it at most every ``REPLICA_LAG_CHECK_INTERVAL``
+    seconds, so routing a request usually costs no query.
+    """
+    now = time.monotonic()
+    checked = _heartbeats.get(alias)
+    if checked is not None and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+    try:
+        beat_at = ReplicaHeartbeat.objects.using(alias).filter(pk=HEARTBEAT_ID).values_list('beat_at', flat=True).first()
+    except DatabaseError:
+        # Never synced, or not migrated yet when it was
+        beat_at = None
+    heartbeat = beat_at.timestamp() if beat_at is not None else None
+    _heartbeats[alias] = (now, heartbeat)
+    return heartbeat
+
+
+def pick_replica(request):
+    """A replica recent enough for this visitor, or ``None`` to use the primary."""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    now = time.time()
+    last_write = request.session.get(SESSION_KEY, 0) if hasattr(request, 'session') else 0
+    fresh = []
+    for alias in settings.DATABASE_REPLICAS:
+        heartbeat = replica_heartbeat(alias)
+        if heartbeat is not None and heartbeat > last_write and now - heartbeat <= settings.REPLICA_MAX_LAG:
+            fresh.append(alias)
+    return random.choice(fresh) if fresh else None
+
+
+def read_from_replica(view_func):
+    """Run the decorated view's queries on a replica when the visitor may use one.
+
+    Needs ``ReplicaMiddleware``; without it every query goes to the primary.
+    Works for both sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            routing = _routing.get()
+            if routing is not None:
+                routing.replica = await sync_to_async(pick_replica)(request)
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        routing = _routing.get()
+        if routing is not None:
+            routing.replica = pick_replica(request)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Send reads of a ``@read_from_replica`` view to its replica, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and routing.replica and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return routing.replica
+        # Not left to Django, which would read the jobs and profiles of a
+        # sharded row from its shard
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get the schema with the data
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def start_request():
+    return _routing.set(Routing())
+
+
+def finish_request(request, token):
+    """Pin the visitor to the primary if the request wrote; see ``ReplicaMiddleware``."""
+    routing = _routing.get()
+    _routing.reset(token)
+    if routing.wrote and hasattr(request, 'session'):
+        request.session[SESSION_KEY] = time.time()
+
+
+def sync_replicas(aliases=None):
+    """Copy the primary to each replica with SQLite's backup API; returns the new heartbeat.
+
+    The heartbeat is stamped before copying, so it never claims a replica
+    is more recent than it is.
+    """
+    beat_at = timezone.now()
+    ReplicaHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(pk=HEARTBEAT_ID, defaults={'beat_at': beat_at})
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    for alias in settings.DATABASE_REPLICAS if aliases is None else aliases:
+        target = sqlite3.connect(connections[alias].settings_dict['NAME'], timeout=30)
+        try:
+            # In WAL mode the copy doesn't wait for the replica's readers,
+            # nor they for it
+            target.execute('PRAGMA journal_mode = WAL')
+            with primary.wrap_database_errors:
+                primary.connection.backup(target)
+        finally:
+            target.close()
+        _heartbeats.pop(alias, None)
+    return beat_at
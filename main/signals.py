@@ -0,0 +1,78 @@
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import EmployerProfile
+from jobs.models import Job, JobCategory
+from jobs.signals import TRACKED_JOB_FIELDS, job_state
+from . import page_cache, stats
+
+# Companies being deleted in this thread, mapped to the states of their jobs.
+# Their cascaded job deletions are recorded as one batch once the company is
+# gone, since counting distinct companies job by job would decrement the
+# company once per job.
+_deleting = threading.local()
+
+
+def _companies_being_deleted():
+    if not hasattr(_deleting, 'companies'):
+        _deleting.companies = {}
+    return _deleting.companies
+
+
+@receiver(post_save, sender=Job)
+def record_saved_job(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    stats.record_job_changes([(getattr(instance, '_previous_state', None), job_state(instance))])
+
+
+@receiver(post_delete, sender=Job)
+def record_deleted_job(sender, instance, **kwargs):
+    if instance.company_id in _companies_being_deleted():
+        return
+    stats.record_job_changes([(job_state(instance), None)])
+
+
+@receiver(pre_delete, sender=EmployerProfile)
+def remember_company_jobs(sender, instance, **kwargs):
+    _companies_being_deleted()[instance.pk] = list(
+        Job.objects.filter(company=instance).values(*TRACKED_JOB_FIELDS)
+    )
+
+
+@receiver(post_delete, sender=EmployerProfile)
+def record_deleted_company_jobs(sender, instance, **kwargs):
+    job_states = _companies_being_deleted().pop(instance.pk, [])
+    stats.record_job_changes([(state, None) for state in job_states])
+
+
+@receiver(post_save, sender=JobCategory)
+def rename_category(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    stats.rename_category(instance)
+
+
+@receiver(pre_delete, sender=JobCategory)
+def remove_category(sender, instance, **kwargs):
+    stats.remove_category(instance.pk)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_pages(sender, instance, raw=False, **kwargs):
+    page_cache.bump('jobs', f'job:{instance.pk}')
+
+
+@receiver(post_save, sender=JobCategory)
+@receiver(post_delete, sender=JobCategory)
+def invalidate_category_pages(sender, instance, raw=False, **kwargs):
+    page_cache.bump('categories')
+
+
+@receiver(post_save, sender=EmployerProfile)
+@receiver(post_delete, sender=EmployerProfile)
+def invalidate_company_pages(sender, instance, raw=False, **kwargs):
+    page_cache.bump('companies')
@@ -0,0 +1,120 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+
+from jobs.models import Job, JobCategory
+from .models import SiteStatistics
+
+STATISTICS_ID = 1
+
+
+def compute():
+    """Recompute the statistics from scratch (three aggregate queries)."""
+    active = Job.objects.filter(is_active=True)
+    categories = {
+        str(category['id']): {'name': category['name'], 'count': category['count']}
+        for category in JobCategory.objects.filter(job__is_active=True)
+        .values('id', 'name').annotate(count=Count('job'))
+    }
+    return SiteStatistics(
+        pk=STATISTICS_ID,
+        active_jobs=active.count(),
+        active_companies=active.values('company').distinct().count(),
+        categories=categories,
+    )
+
+
+def reconcile():
+    """Overwrite the stored statistics with freshly computed ones.
+
+    Returns ``(stored, computed)`` so callers can report the drift.
+    """
+    with transaction.atomic():
+        stored = SiteStatistics.objects.select_for_update().filter(pk=STATISTICS_ID).first()
+        computed = compute()
+        computed.save()
+    return stored, computed
+
+
+def get_statistics():
+    stats = SiteStatistics.objects.filter(pk=STATISTICS_ID).first()
+    if stats is None:
+        _, stats = reconcile()
+    return stats
+
+
+def record_job_changes(changes):
+    """Apply a batch of job changes to the stored statistics.
+
+    ``changes`` is an iterable of ``(previous, current)`` job states, dicts
+    with ``is_active``, ``company_id`` and ``category_id``; ``previous`` is
+    ``None`` for created jobs and ``current`` is ``None`` for deleted ones.
+    Must be called after the changes are written to the jobs table.
+    """
+    job_delta = 0
+    company_deltas = Counter()
+    category_deltas = Counter()
+    for previous, current in changes:
+        for state, sign in ((previous, -1), (current, 1)):
+            if state and state['is_active']:
+                job_delta += sign
+                company_deltas[state['company_id']] += sign
+                if state['category_id'] is not None:
+                    category_deltas[state['category_id']] += sign
+
+    company_deltas = {company: delta for company, delta in company_deltas.items() if delta}
+    category_deltas = {category: delta for category, delta in category_deltas.items() if delta}
+    if not (job_delta or company_deltas or category_deltas):
+        return
+
+    with transaction.atomic():
+        stats = SiteStatistics.objects.select_for_update().filter(pk=STATISTICS_ID).first()
+        if stats is None:
+            compute().save()
+            return
+
+        # A company counts while it has at least one active job, so compare
+        # each touched company's active job count now with what it was
+        # before this batch of changes.
+        active_now = dict(
+            Job.objects.filter(company_id__in=company_deltas, is_active=True)
+            .values('company_id').annotate(count=Count('id')).values_list('company_id', 'count')
+        )
+        for company, delta in company_deltas.items():
+            now = active_now.get(company, 0)
+            stats.active_companies += (now > 0) - (now - delta > 0)
+
+        stats.active_jobs = max(stats.active_jobs + job_delta, 0)
+        stats.active_companies = max(stats.active_companies, 0)
+
+        missing_names = [c for c in category_deltas if str(c) not in stats.categories]
+        names = dict(JobCategory.objects.filter(pk__in=missing_names).values_list('pk', 'name'))
+        for category, delta in category_deltas.items():
+            entry = stats.categories.get(str(category))
+            if entry is None:
+                if category not in names:
+                    continue
+                entry = {'name': names[category], 'count': 0}
+            entry['count'] += delta
+            if entry['count'] > 0:
+                stats.categories[str(category)] = entry
+            else:
+                stats.categories.pop(str(category), None)
+        stats.save()
+
+
+def rename_category(category):
+    with transaction.atomic():
+        stats = SiteStatistics.objects.select_for_update().filter(pk=STATISTICS_ID).first()
+        entry = stats.categories.get(str(category.pk)) if stats else None
+        if entry is not None and entry['name'] != category.name:
+            entry['name'] = category.name
+            stats.save(update_fields=['categories', 'updated_at'])
+
+
+def remove_category(category_id):
+    with transaction.atomic():
+        stats = SiteStatistics.objects.select_for_update().filter(pk=STATISTICS_ID).first()
+        if stats is not None and stats.categories.pop(str(category_id), None) is not None:
+            stats.save(update_fields=['categories', 'updated_at'])
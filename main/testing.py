@@ -0,0 +1,111 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from accounts.models import EmployerProfile, JobSeekerProfile, UserProfile
+from jobs.models import Job, JobApplication, JobCategory, SavedJob
+from jobs import counters, shards
+from jobs.recommendations import refresh_recommendations
+
+PASSWORD = 'password'
+
+SKILLS = ['python', 'django', 'sql', 'javascript', 'react', 'aws', 'docker', 'excel']
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru']
+
+
+def create_job_board(employers=4, jobs_per_employer=15, seekers=4, applications_per_seeker=25):
+    """Populate a job board big enough that every list page spans several pages.
+
+    Returns ``(employer_profiles, jobseeker_profiles, jobs)``. Every user's
+    password is ``PASSWORD``.
+    """
+    categories = [JobCategory.objects.create(name=name) for name in ('Engineering', 'Design', 'Sales', 'Finance')]
+
+    employer_profiles = []
+    for i in range(employers):
+        user = User.objects.create_user(f'employer{i}', f'employer{i}@example.com', PASSWORD)
+        user_profile = UserProfile.objects.create(user=user, user_type='employer', location=LOCATIONS[i % len(LOCATIONS)])
+        employer_profiles.append(EmployerProfile.objects.create(user_profile=user_profile, company_name=f'Company {i}'))
+
+    jobs = []
+    for i in range(employers * jobs_per_employer):
+        jobs.append(Job.objects.create(
+            title=f'{SKILLS[i % len(SKILLS)].title()} Developer {i}',
+            company=employer_profiles[i % employers],
+            category=categories[i % len(categories)],
+            description='Build and maintain our products.',
+            requirements='Experience shipping production software.',
+            job_type=Job.JOB_TYPES[i % len(Job.JOB_TYPES)][0],
+            experience_level=Job.EXPERIENCE_LEVELS[i % len(Job.EXPERIENCE_LEVELS)][0],
+            location=LOCATIONS[i % len(LOCATIONS)],
+            remote_work=i % 3 == 0,
+            skills_required=', '.join(SKILLS[i % len(SKILLS):][:3]),
+        ))
+
+    jobseeker_profiles = []
+    for i in range(seekers):
+        user = User.objects.create_user(f'seeker{i}', f'seeker{i}@example.com', PASSWORD, first_name='Seeker', last_name=str(i))
+        user_profile = UserProfile.objects.create(user=user, user_type='job_seeker', location=LOCATIONS[i % len(LOCATIONS)])
+        jobseeker_profiles.append(JobSeekerProfile.objects.create(
+            user_profile=user_profile,
+            skills=', '.join(SKILLS[i:i + 4]),
+            experience_years=i * 2,
+        ))
+
+    for jobseeker_profile in jobseeker_profiles:
+        shards.bulk_create(JobApplication, (
+            JobApplication(job=job, applicant=jobseeker_profile, cover_letter='Hello')
+            for job in jobs[:applications_per_seeker]
+        ))
+        shards.bulk_create(SavedJob, (
+            SavedJob(job=job, job_seeker=jobseeker_profile) for job in jobs[:applications_per_seeker]
+        ))
+
+    counters.repair()
+    refresh_recommendations()
+    return employer_profiles, jobseeker_profiles, jobs
+
+
+class QueryBudgetMixin:
+    """TestCase mixin checking responses against settings.QUERY_BUDGETS."""
+
+    def assertWithinQueryBudget(self, url, client=None, **extra):
+        """Check the second GET of ``url``; ``extra`` is passed on as request headers."""
+        client = client or self.client
+        # Measure the view itself rather than a page cache hit
+        with self.settings(PAGE_CACHE_ENABLED=False):
+            # The first request may still fill session and profile caches
+            with self.settings(QUERY_BUDGETS={}):
+                client.get(url, **extra)
+            response = client.get(url, **extra)
+        stats = response.wsgi_request.query_stats
+        self.assertIsNotNone(stats.budget, f'{stats.view_name} has no entry in QUERY_BUDGETS')
+        duplicates = '\n'.join(f'  {count}x {sql}' for sql, count in stats.duplicates.items())
+        self.assertLessEqual(
+            stats.count, stats.budget,
+            f'{url} ({stats.view_name}) ran {stats.count} queries, budget is {stats.budget}\n{duplicates}',
+        )
+        return response
+
+
+class TestRunner(DiscoverRunner):
+    """Point the shared cache at a temporary file, as fresh as the test database."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.cache_settings = override_settings(CACHES={
+            alias: {**config, 'LOCATION': os.path.join(self.cache_directory.name, f'{alias}.sqlite3')}
+            if config['BACKEND'] == 'main.cache.SQLiteCache' else config
+            for alias, config in settings.CACHES.items()
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
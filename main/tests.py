@@ -1,3 +1,541 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from jobs import views as job_views
+from jobs.models import Job, JobCategory, SavedJob
+from . import background, page_cache, replicas, stats, views
+from .cache import SQLiteCache
+from .checks import check_page_cache_backend
+from .management.commands.check_query_plans import plan_problems
+from .models import ReplicaHeartbeat, SiteStatistics, Task
+from .testing import PASSWORD, QueryBudgetMixin, create_job_board
+
+
+@background.task(name='main.tests.flaky', max_attempts=2)
+def flaky(fail):
+    if fail:
+        raise ValueError('try again')
+
+
+class HomeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board()
+
+    def test_home(self):
+        self.assertWithinQueryBudget(reverse('main:home'))
+        self.client.login(username=self.seekers[0].user_profile.user.username, password=PASSWORD)
+        self.assertWithinQueryBudget(reverse('main:home'))
+
+    def test_static_pages(self):
+        self.assertWithinQueryBudget(reverse('main:about'))
+        self.assertWithinQueryBudget(reverse('main:contact'))
+
+
+@override_settings(QUERY_BUDGETS={'main:home': 100}, PAGE_CACHE_ENABLED=False)
+class QueryBudgetMiddlewareTests(TestCase):
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_headers(self):
+        response = self.client.get(reverse('main:home'))
+        stats = response.wsgi_request.query_stats
+        self.assertEqual(stats.view_name, 'main:home')
+        self.assertEqual(response['X-Query-Count'], str(stats.count))
+        self.assertEqual(response['X-Query-Budget'], str(stats.budget))
+        self.assertIn('X-Query-Time', response)
+        self.assertIn('X-Query-Duplicates', response)
+
+    @override_settings(QUERY_COUNT_HEADERS=False)
+    def test_no_headers_in_production(self):
+        response = self.client.get(reverse('main:home'))
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(QUERY_BUDGETS={'main:home': 0})
+    def test_over_budget_is_logged(self):
+        with self.assertLogs('main.queries', 'WARNING') as logs:
+            self.client.get(reverse('main:home'))
+        self.assertIn('main:home ran', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'main:home': {'POST': 0}})
+    def test_budgets_per_method(self):
+        with self.assertNoLogs('main.queries', 'WARNING'):
+            response = self.client.get(reverse('main:home'))
+        self.assertIsNone(response.wsgi_request.query_stats.budget)
+
+
+class QueryPlanTests(SimpleTestCase):
+    TABLES = {'jobs_job', 'jobs_jobskill', 'jobs_jobcategory'}
+    RANKED_MATCHES = [
+        (0, 'SEARCH jobs_job USING INTEGER PRIMARY KEY (rowid=?)'),
+        (0, 'LIST SUBQUERY 1'),
+        (3, 'SEARCH jobs_jobskill USING COVERING INDEX jobskill_skill_job_idx (skill_id=?)'),
+        (0, 'USE TEMP B-TREE FOR ORDER BY'),
+    ]
+
+    def problems(self, *rows):
+        # (parent, detail) pairs, numbered from 2 as SQLite does
+        return plan_problems([(id, parent, 0, detail) for id, (parent, detail) in enumerate(rows, 2)], self.TABLES)
+
+    def test_full_scans(self):
+        self.assertEqual(self.problems((0, 'SCAN jobs_job')), ['SCAN jobs_job'])
+        # Small lookup tables and subquery results may be read whole
+        self.assertEqual(self.problems((0, 'SCAN jobs_jobcategory')), [])
+        self.assertEqual(self.problems((0, 'SCAN subquery')), [])
+        self.assertEqual(self.problems((0, 'SEARCH jobs_job USING INDEX job_active_recent_idx (is_active=?)')), [])
+
+    def test_temp_sorts(self):
+        sort = (0, 'USE TEMP B-TREE FOR ORDER BY')
+        self.assertEqual(
+            self.problems((0, 'SEARCH jobs_job USING INDEX job_updated_idx (updated_at>?)'), sort), [sort[1]]
+        )
+        # Rowid lookups that don't come from a LIST SUBQUERY aren't bounded by the matches
+        self.assertEqual(
+            self.problems((0, 'SEARCH jobs_job USING INTEGER PRIMARY KEY (rowid=?)'), sort), [sort[1]]
+        )
+
+    def test_sorting_rows_fetched_from_a_list_subquery(self):
+        self.assertEqual(self.problems(*self.RANKED_MATCHES), [])
+        # The sort is allowed, a full scan inside the subquery is not
+        rows = list(self.RANKED_MATCHES)
+        rows[2] = (3, 'SCAN jobs_jobskill')
+        self.assertEqual(self.problems(*rows), ['SCAN jobs_jobskill'])
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class AsyncViewTests(TestCase):
+    """The async views served through the ASGI handler, as under an ASGI server."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board()
+
+    async def assertPagesWithinBudget(self):
+        for url in (reverse('main:home'), reverse('jobs:job_list'), reverse('jobs:job_detail', args=[self.jobs[0].id])):
+            # The first request may still fill session and profile caches
+            with self.settings(QUERY_BUDGETS={}):
+                await self.async_client.get(url)
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            stats = response.asgi_request.query_stats
+            self.assertLessEqual(stats.count, stats.budget, url)
+        return response
+
+    async def test_anonymous(self):
+        response = await self.assertPagesWithinBudget()
+        etag = response['ETag']
+        response = await self.async_client.get(reverse('jobs:job_detail', args=[self.jobs[0].id]), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_job_seeker(self):
+        await self.async_client.alogin(username=self.seekers[0].user_profile.user.username, password=PASSWORD)
+        await self.assertPagesWithinBudget()
+        response = await self.async_client.get(reverse('jobs:saved_jobs'))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_employer_is_redirected_from_saved_jobs(self):
+        await self.async_client.alogin(username=self.employers[0].user_profile.user.username, password=PASSWORD)
+        response = await self.async_client.get(reverse('jobs:saved_jobs'))
+        self.assertRedirects(response, reverse('jobs:job_list'), fetch_redirect_response=False)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, QUERY_BUDGETS={}, PARALLEL_QUERY_WORKERS=4)
+class ParallelQueryTests(TransactionTestCase):
+    """The async views' independent queries, outside a transaction as in production."""
+
+    def setUp(self):
+        self.employers, self.seekers, self.jobs = create_job_board(
+            employers=1, jobs_per_employer=4, seekers=1, applications_per_seeker=2
+        )
+
+    def assertRunTogether(self, url, module, *names):
+        """GET ``url`` with the functions ``names`` of ``module`` each waiting until all of them run.
+
+        Run one after another, the first one would wait in vain.
+        """
+        barrier = threading.Barrier(len(names), timeout=5)
+
+        def waiting(func):
+            def wrapper(*args, **kwargs):
+                barrier.wait()
+                return func(*args, **kwargs)
+            return wrapper
+
+        with ExitStack() as stack:
+            for name in names:
+                stack.enter_context(mock.patch.object(module, name, waiting(getattr(module, name))))
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+    def test_queries_overlap(self):
+        self.assertRunTogether(reverse('main:home'), views, 'recent_job_cards', 'get_statistics')
+        self.assertRunTogether(
+            reverse('jobs:job_list'), job_views, 'get_facet_counts', 'job_card_page', 'capped_count'
+        )
+        self.client.login(username=self.seekers[0].user_profile.user.username, password=PASSWORD)
+        # Both steps: the page and the count, then the cards and the applied flags
+        self.assertRunTogether(reverse('jobs:saved_jobs'), job_views, 'saved_job_page_rows', 'saved_job_count')
+        self.assertRunTogether(reverse('jobs:saved_jobs'), job_views, 'attach_cards', 'get_applied_job_ids')
+
+    def test_queries_in_other_threads_are_counted(self):
+        url = reverse('jobs:job_list')
+        self.client.get(url)
+        in_parallel = self.client.get(url).wsgi_request.query_stats
+        with self.settings(PARALLEL_QUERY_WORKERS=0):
+            one_after_another = self.client.get(url).wsgi_request.query_stats
+        self.assertEqual(in_parallel.count, one_after_another.count)
+        self.assertEqual(in_parallel.statements, one_after_another.statements)
+
+
+class SiteStatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, _, cls.jobs = create_job_board(employers=3, jobs_per_employer=2, seekers=0)
+        cls.category = JobCategory.objects.get(name='Engineering')
+
+    def assertStatistics(self, active_jobs, active_companies):
+        stored, computed = stats.get_statistics(), stats.compute()
+        self.assertEqual((stored.active_jobs, stored.active_companies), (active_jobs, active_companies))
+        self.assertEqual((stored.active_jobs, stored.active_companies, stored.categories), (computed.active_jobs, computed.active_companies, computed.categories))
+
+    def test_counters_follow_job_changes(self):
+        self.assertStatistics(6, 3)
+        Job.objects.create(
+            title='Designer', company=self.employers[0], category=self.category,
+            description='Design things.', requirements='None', location='Nairobi',
+        )
+        self.assertStatistics(7, 3)
+        self.assertEqual(stats.get_statistics().categories[str(self.category.pk)]['count'], Job.objects.filter(category=self.category).count())
+
+        for job in Job.objects.filter(company=self.employers[1]):
+            job.is_active = False
+            job.save()
+        self.assertStatistics(5, 2)
+        job.is_active = True
+        job.save()
+        self.assertStatistics(6, 3)
+
+        Job.objects.filter(company=self.employers[2]).first().delete()
+        self.assertStatistics(5, 3)
+        self.employers[2].delete()
+        self.assertStatistics(4, 2)
+
+    def test_reconcile_fixes_drift(self):
+        stats.get_statistics()
+        SiteStatistics.objects.update(active_jobs=99, active_companies=0, categories={})
+        out = StringIO()
+        call_command('reconcile_site_statistics', stdout=out)
+        self.assertIn('active_jobs: 99 -> 6', out.getvalue())
+        self.assertStatistics(6, 3)
+
+
+class SharedCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+
+    def test_processes_share_generations_and_locks(self):
+        first, second = SQLiteCache(self.location, {}), SQLiteCache(self.location, {})
+        self.assertTrue(first.add('generation', 1, None))
+        self.assertEqual(second.incr('generation'), 2)
+        self.assertEqual(first.get('generation'), 2)
+        self.assertTrue(first.add('lock', 1, 10))
+        self.assertFalse(second.add('lock', 1, 10))
+        first.delete('lock')
+        self.assertTrue(second.add('lock', 1, 10))
+
+    def test_management_commands_invalidate_pages(self):
+        config = {'BACKEND': 'main.cache.SQLiteCache', 'LOCATION': self.location}
+        with override_settings(CACHES={'default': config}):
+            before = page_cache.get_generations(['jobs'])
+            subprocess.run(
+                [sys.executable, 'manage.py', 'shell', '-c', 'from main import page_cache; page_cache.bump("jobs")'],
+                cwd=settings.BASE_DIR, env={**os.environ, 'JOBBOARD_CACHE_FILE': self.location}, check=True,
+            )
+            self.assertNotEqual(page_cache.get_generations(['jobs']), before)
+
+    def test_per_process_cache_is_reported(self):
+        self.assertEqual(check_page_cache_backend(None), [])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_page_cache_backend(None)], ['main.W001'])
+            with override_settings(PAGE_CACHE_ENABLED=False):
+                self.assertEqual(check_page_cache_backend(None), [])
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(employers=1, jobs_per_employer=3, seekers=1, applications_per_seeker=0)
+        cls.job = cls.jobs[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def assertCache(self, url, status):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get('X-Page-Cache'), status)
+        return response
+
+    def test_only_anonymous_pages_are_cached(self):
+        url = reverse('jobs:job_detail', args=[self.job.id])
+        self.assertCache(url, 'miss')
+        self.assertCache(url, 'hit')
+        self.client.login(username='seeker0', password=PASSWORD)
+        self.assertCache(url, None)
+        self.assertCache(url, None)
+
+    def test_writes_invalidate_pages(self):
+        urls = [reverse('main:home'), reverse('jobs:job_list'), reverse('jobs:job_detail', args=[self.job.id])]
+        for url in urls:
+            self.assertCache(url, 'miss')
+            self.assertCache(url, 'hit')
+
+        self.job.title = 'Renamed Role'
+        self.job.save()
+        for url in urls:
+            self.assertContains(self.assertCache(url, 'miss'), 'Renamed Role')
+
+        # Other jobs' pages don't depend on it
+        self.assertCache(reverse('jobs:job_detail', args=[self.jobs[1].id]), 'miss')
+        self.assertCache(reverse('jobs:job_detail', args=[self.jobs[1].id]), 'hit')
+        self.job.save()
+        self.assertCache(reverse('jobs:job_detail', args=[self.jobs[1].id]), 'hit')
+
+        self.employers[0].company_name = 'Renamed Company'
+        self.employers[0].save()
+        self.assertContains(self.assertCache(urls[1], 'miss'), 'Renamed Company')
+
+    def test_one_request_renders_a_missing_page(self):
+        renders = []
+
+        @page_cache.cache_anonymous_page('jobs')
+        def view(request):
+            renders.append(request)
+            time.sleep(0.2)
+            return HttpResponse('rendered')
+
+        def get(responses, start):
+            request = RequestFactory().get('/jobs/')
+            request.user = AnonymousUser()
+            request.resolver_match = resolve('/jobs/')
+            start.wait()
+            responses.append(view(request))
+
+        responses, start = [], threading.Barrier(5)
+        threads = [threading.Thread(target=get, args=(responses, start)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(renders), 1)
+        self.assertEqual(sorted(response['X-Page-Cache'] for response in responses), ['hit'] * 4 + ['miss'])
+        self.assertEqual({response.content for response in responses}, {b'rendered'})
+
+
+class BackgroundTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employers, cls.seekers, cls.jobs = create_job_board(jobs_per_employer=2, applications_per_seeker=0)
+        background.run_pending()
+
+    def test_application_is_notified_after_the_response(self):
+        job = self.jobs[0]
+        employer = job.company.user_profile.user
+        self.client.login(username=self.seekers[0].user_profile.user.username, password=PASSWORD)
+        with self.settings(QUERY_BUDGETS={}):
+            self.client.post(reverse('jobs:apply_job', args=[job.id]), {'cover_letter': 'Hello'})
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(background.run_pending(), (1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [[employer.email]])
+
+        application = job.applications.get()
+        application.status = 'interview'
+        application.save()
+        application.status = 'interview'
+        application.save()
+        self.assertEqual(background.run_pending(), (1, 0))
+        self.assertEqual(mail.outbox[1].to, [self.seekers[0].user_profile.user.email])
+
+    def test_idempotency_keys(self):
+        flaky.enqueue({'fail': False}, key='once')
+        flaky.enqueue({'fail': False}, key='once')
+        self.assertEqual(background.run_pending(), (1, 0))
+        flaky.enqueue({'fail': False}, key='once')
+        self.assertEqual(Task.objects.filter(idempotency_key='once').count(), 1)
+        self.assertEqual(background.run_pending(), (0, 0))
+
+    def test_failures_are_retried_with_backoff(self):
+        flaky.enqueue({'fail': True})
+        self.assertEqual(background.run_pending(), (0, 1))
+        task = Task.objects.get(name='main.tests.flaky')
+        self.assertEqual((task.status, task.attempts), (Task.QUEUED, 1))
+        self.assertGreater(task.run_after, timezone.now())
+        self.assertIn('try again', task.last_error)
+
+        Task.objects.filter(pk=task.pk).update(run_after=timezone.now())
+        self.assertEqual(background.run_pending(), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+
+    def test_lost_lease_is_left_to_the_new_worker(self):
+        flaky.enqueue({'fail': False})
+        _, stale = background.claim('a', lease=timedelta(0))
+        _, current = background.claim('b')
+        self.assertEqual([t.pk for t in current], [t.pk for t in stale])
+
+        for error in (None, 'too slow'):
+            with self.assertLogs('main.background', 'WARNING'):
+                self.assertEqual(background.finish(stale, error), 0)
+            task = Task.objects.get(pk=stale[0].pk)
+            self.assertEqual((task.status, task.claimed_by, task.last_error), (Task.RUNNING, current[0].claimed_by, ''))
+
+        self.assertEqual(background.finish(current, None), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+
+    def test_task_crashing_its_workers_is_given_up(self):
+        flaky.enqueue({'fail': False})
+        # Workers that died without finishing it
+        for worker in ('a', 'b'):
+            _, tasks = background.claim(worker, lease=timedelta(0))
+            self.assertEqual(len(tasks), 1)
+
+        with self.assertLogs('main.background', 'WARNING'):
+            self.assertEqual(background.claim('c'), (None, []))
+        task = Task.objects.get(pk=tasks[0].pk)
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+        self.assertIsNotNone(task.finished_at)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_production_profile_sets_up_connections(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        default = connections['default']
+        connection = type(default)({
+            **default.settings_dict,
+            **settings.DATABASE_PROFILES['production'],
+            'NAME': os.path.join(directory.name, 'db.sqlite3'),
+        }, alias='production_profile')
+        self.addCleanup(connection.close)
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+# The replica connections below only exist in the test's thread
+@override_settings(
+    DATABASE_REPLICAS=['replica_a', 'replica_b'], REPLICA_LAG_CHECK_INTERVAL=0,
+    PAGE_CACHE_ENABLED=False, QUERY_BUDGETS={}, PARALLEL_QUERY_WORKERS=0,
+)
+class ReplicaTests(TransactionTestCase):
+    """Routing between the primary and two replicas, each a local SQLite file."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        default = connections['default']
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias] = type(default)({
+                **default.settings_dict,
+                'NAME': os.path.join(directory.name, f'{alias}.sqlite3'),
+            }, alias=alias)
+            self.addCleanup(connections.__delitem__, alias)
+            self.addCleanup(connections[alias].close)
+
+        self.employers, self.seekers, self.jobs = create_job_board(
+            employers=1, jobs_per_employer=4, seekers=1, applications_per_seeker=0
+        )
+        self.seeker = self.seekers[0]
+        replicas.sync_replicas()
+
+    def get(self, url):
+        """GET ``url``; returns the response and the number of page queries the replicas ran."""
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in settings.DATABASE_REPLICAS
+            }
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, sum(
+            ReplicaHeartbeat._meta.db_table not in query['sql']
+            for queries in captured.values() for query in queries
+        )
+
+    def test_read_only_pages_read_from_a_replica(self):
+        job = Job.objects.create(
+            title='Fresh Job', company=self.employers[0], description='New', requirements='None',
+            job_type='full_time', experience_level='entry', location='Nairobi',
+        )
+        for url in (reverse('main:home'), reverse('jobs:job_list')):
+            response, replica_queries = self.get(url)
+            self.assertGreater(replica_queries, 0, url)
+            self.assertNotContains(response, 'Fresh Job')
+
+        replicas.sync_replicas()
+        response, _ = self.get(reverse('jobs:job_list'))
+        self.assertContains(response, 'Fresh Job')
+        response, replica_queries = self.get(reverse('jobs:job_detail', args=[job.id]))
+        self.assertGreater(replica_queries, 0)
+
+        # Other pages, and all writes, use the primary
+        self.assertEqual(router.db_for_write(Job), 'default')
+        _, replica_queries = self.get(reverse('main:about'))
+        self.assertEqual(replica_queries, 0)
+
+    def test_visitors_read_their_own_writes(self):
+        self.client.login(username=self.seeker.user_profile.user.username, password=PASSWORD)
+        _, replica_queries = self.get(reverse('jobs:saved_jobs'))
+        self.assertGreater(replica_queries, 0)
+
+        self.client.get(reverse('jobs:save_job', args=[self.jobs[0].id]))
+        response, replica_queries = self.get(reverse('jobs:saved_jobs'))
+        self.assertEqual(replica_queries, 0)
+        self.assertContains(response, self.jobs[0].title)
+
+        # Someone else's write doesn't pin this visitor
+        SavedJob.objects.create(job=self.jobs[1], job_seeker=self.seeker)
+        replicas.sync_replicas()
+        SavedJob.objects.create(job=self.jobs[2], job_seeker=self.seeker)
+        response, replica_queries = self.get(reverse('jobs:saved_jobs'))
+        self.assertGreater(replica_queries, 0)
+        self.assertContains(response, self.jobs[1].title)
+        self.assertNotContains(response, self.jobs[2].title)
+
+    def test_lagging_replicas_are_skipped(self):
+        ReplicaHeartbeat.objects.using('replica_a').update(beat_at=timezone.now() - timedelta(hours=1))
+        for _ in range(5):
+            with CaptureQueriesContext(connections['replica_a']) as queries:
+                self.client.get(reverse('jobs:job_list'))
+            self.assertEqual([query['sql'] for query in queries if ReplicaHeartbeat._meta.db_table not in query['sql']], [])
+
+        ReplicaHeartbeat.objects.using('replica_b').update(beat_at=timezone.now() - timedelta(hours=1))
+        _, replica_queries = self.get(reverse('jobs:job_list'))
+        self.assertEqual(replica_queries, 0)
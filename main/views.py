@@ -1,18 +1,29 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.db.models import Count
-from jobs.models import Job, JobCategory
+from jobs.cards import attach_cards
+from jobs.models import Job
 from jobs.forms import JobSearchForm
+from .page_cache import cache_anonymous_page
+from .parallel import run_in_parallel
+from .replicas import read_from_replica
+from .stats import get_statistics
 
-def home(request):
-    # Get recent jobs
-    recent_jobs = Job.objects.filter(is_active=True)[:6]
-    
-    # Get job categories with job counts
-    categories = JobCategory.objects.annotate(job_count=Count('job')).filter(job_count__gt=0)
-    
-    # Get job statistics
-    total_jobs = Job.objects.filter(is_active=True).count()
-    total_companies = Job.objects.filter(is_active=True).values('company').distinct().count()
+def recent_job_cards():
+    return attach_cards(Job.objects.filter(is_active=True).select_related('company', 'category')[:6])
+
+@read_from_replica
+@cache_anonymous_page('jobs', 'companies', 'categories')
+async def home(request):
+    # Recent jobs, job statistics and per-category counts (kept up to date by
+    # signals) don't depend on each other
+    recent_jobs, stats = await run_in_parallel(recent_job_cards, get_statistics)
+    categories = sorted(
+        (
+            {'id': int(category_id), 'name': entry['name'], 'job_count': entry['count']}
+            for category_id, entry in stats.categories.items()
+        ),
+        key=lambda category: category['name']
+    )
     
     # Initialize search form
     search_form = JobSearchForm()
@@ -20,11 +31,11 @@ def home(request):
     context = {
         'recent_jobs': recent_jobs,
         'categories': categories,
-        'total_jobs': total_jobs,
-        'total_companies': total_companies,
+        'total_jobs': stats.active_jobs,
+        'total_companies': stats.active_companies,
         'search_form': search_form,
     }
-    return render(request, 'main/home.html', context)
+    return await sync_to_async(render)(request, 'main/home.html', context)
 
 def about(request):
     return render(request, 'main/about.html')